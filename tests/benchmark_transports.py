@@ -0,0 +1,109 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+"""Benchmark of the HTTP/1.1 (urllib3) and HTTP/2 (httpx) transports against the local test servers.
+
+Run from the repository root with: python -m tests.benchmark_transports --help
+
+Servers delay each new connection to emulate the costly connection setup (e.g. TLS through a corporate proxy).
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import urllib3
+
+from threedi_models_and_simulations.api_calls.transports import Http2PoolManager, http2_available
+
+from .conftest import FileServerHandler, Http2FileServer
+
+
+class CountingFileServerHandler(FileServerHandler):
+    """File server request handler counting opened connections."""
+
+    def setup(self):
+        with self.server.lock:
+            self.server.connections += 1
+        super().setup()
+
+
+def start_http1_server(connection_delay: float, request_delay: float) -> ThreadingHTTPServer:
+    """Start HTTP/1.1 file server in the background thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingFileServerHandler)
+    server.files = {}
+    server.connections = 0
+    server.lock = threading.Lock()
+    server.connection_delay = connection_delay
+    server.request_delay = request_delay
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_workload(pool_manager, server, requests: int, transfers: int, transfer_size: int, workers: int) -> float:
+    """Make API-like JSON requests and file uploads/downloads concurrently, returning elapsed time."""
+    server.files["/api/simulations/"] = json.dumps([{"id": i, "name": f"simulation {i}"} for i in range(50)]).encode()
+    content = b"3" * transfer_size
+
+    def api_request(_):
+        response = pool_manager.request("GET", f"{server.url}/api/simulations/")
+        assert response.status == 200
+
+    def transfer(i):
+        url = f"{server.url}/files/{i}.bin"
+        assert (
+            pool_manager.request("PUT", url, body=content, headers={"Content-Length": str(len(content))}).status == 200
+        )
+        response = pool_manager.request("GET", url, preload_content=False)
+        assert sum(len(chunk) for chunk in response.stream(64 * 1024)) == len(content)
+        response.release_conn()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        futures = [executor.submit(api_request, i) for i in range(requests)]
+        futures += [executor.submit(transfer, i) for i in range(transfers)]
+        for future in futures:
+            future.result()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="number of the API-like JSON requests")
+    parser.add_argument("--transfers", type=int, default=16, help="number of the file uploads/downloads")
+    parser.add_argument("--transfer-size", type=int, default=1024**2, help="transferred file size in bytes")
+    parser.add_argument("--workers", type=int, default=16, help="number of the concurrent client threads")
+    parser.add_argument("--pool-size", type=int, default=4, help="urllib3 connections kept per host")
+    parser.add_argument("--connection-delay", type=float, default=0.1, help="connection setup time in seconds")
+    parser.add_argument("--request-delay", type=float, default=0.005, help="request handling time in seconds")
+    args = parser.parse_args()
+    if not http2_available():
+        parser.error("HTTP/2 transport requires 'httpx[http2]' package.")
+    workload = (args.requests, args.transfers, args.transfer_size, args.workers)
+
+    http1_server = start_http1_server(args.connection_delay, args.request_delay)
+    pool_manager = urllib3.PoolManager(maxsize=args.pool_size)
+    http1_elapsed = run_workload(pool_manager, http1_server, *workload)
+    pool_manager.clear()
+    http1_server.shutdown()
+
+    http2_server = Http2FileServer(args.connection_delay, args.request_delay)
+    pool_manager = Http2PoolManager(max_connections=1, http1=False)
+    http2_elapsed = run_workload(pool_manager, http2_server, *workload)
+    pool_manager.clear()
+    http2_server.shutdown()
+
+    print(f"{'Transport':<20}{'Time [s]':>10}{'Requests/s':>12}{'Connections':>13}")
+    for name, elapsed, server in [
+        ("urllib3 (HTTP/1.1)", http1_elapsed, http1_server),
+        ("httpx (HTTP/2)", http2_elapsed, http2_server),
+    ]:
+        requests_per_second = (args.requests + 2 * args.transfers) / elapsed
+        print(f"{name:<20}{elapsed:>10.2f}{requests_per_second:>12.1f}{server.connections:>13}")
+
+
+if __name__ == "__main__":
+    main()
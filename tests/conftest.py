@@ -1,6 +1,12 @@
 # 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
 # Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import asyncio
 import datetime
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
 
 TEST_API_PARAMETERS = ("TEST_USERNAME", "TEST_PASSWORD", "TEST_API")
 REPO_DATA_LIST = [
@@ -228,3 +234,169 @@ class SimpleApiException(Exception):
 
     def __init__(self, body):
         self.body = body
+
+
+class FileServerHandler(BaseHTTPRequestHandler):
+    """Simple in-memory file server request handler used for testing."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        time.sleep(getattr(self.server, "connection_delay", 0))
+        super().setup()
+
+    def do_GET(self):
+        time.sleep(getattr(self.server, "request_delay", 0))
+        content = self.server.files.get(self.path)
+        if content is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_PUT(self):
+        time.sleep(getattr(self.server, "request_delay", 0))
+        content_length = int(self.headers["Content-Length"])
+        self.server.files[self.path] = self.rfile.read(content_length)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def http_cache_dir(tmp_path, monkeypatch):
+    """Keep the HTTP cache databases of the API clients created by tests out of the plugin directory."""
+    cache_dir = tmp_path / "http_cache"
+    monkeypatch.setattr("threedi_models_and_simulations.api_calls.http_cache.HTTP_CACHE_PATH", str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture
+def file_server():
+    """Local HTTP file server with keep-alive connections."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FileServerHandler)
+    server.files = {}
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class Http2FileServer:
+    """Simple in-memory HTTP/2 (cleartext, prior knowledge) file server used for testing."""
+
+    def __init__(self, connection_delay=0.0, request_delay=0.0):
+        self.files = {}
+        self.connection_delay = connection_delay
+        self.request_delay = request_delay
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handle_connection, "127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def handle_connection(self, reader, writer):
+        from h2.config import H2Configuration
+        from h2.connection import H2Connection
+        from h2.events import (
+            ConnectionTerminated,
+            DataReceived,
+            RemoteSettingsChanged,
+            RequestReceived,
+            StreamEnded,
+            WindowUpdated,
+        )
+
+        self.connections += 1
+        await asyncio.sleep(self.connection_delay)
+        connection = H2Connection(H2Configuration(client_side=False, header_encoding="utf-8"))
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+        requests = {}
+        window_updated = asyncio.Event()
+        try:
+            while True:
+                data = await reader.read(65535)
+                if not data:
+                    break
+                for event in connection.receive_data(data):
+                    if isinstance(event, RequestReceived):
+                        requests[event.stream_id] = (dict(event.headers), bytearray())
+                    elif isinstance(event, DataReceived):
+                        requests[event.stream_id][1].extend(event.data)
+                        connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, StreamEnded):
+                        headers, body = requests.pop(event.stream_id)
+                        asyncio.ensure_future(
+                            self.respond(connection, writer, window_updated, event.stream_id, headers, bytes(body))
+                        )
+                    elif isinstance(event, (WindowUpdated, RemoteSettingsChanged)):
+                        window_updated.set()
+                    elif isinstance(event, ConnectionTerminated):
+                        return
+                writer.write(connection.data_to_send())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, connection, writer, window_updated, stream_id, headers, body):
+        from h2.exceptions import StreamClosedError
+
+        await asyncio.sleep(self.request_delay)
+        path = headers[":path"]
+        if headers[":method"] == "PUT":
+            self.files[path] = body
+            status, content = 200, b""
+        else:
+            content = self.files.get(path)
+            status, content = (404, b"") if content is None else (200, content)
+        try:
+            response_headers = [(":status", str(status)), ("content-length", str(len(content)))]
+            connection.send_headers(stream_id, response_headers, end_stream=not content)
+            writer.write(connection.data_to_send())
+            while content:
+                window = min(connection.local_flow_control_window(stream_id), connection.max_outbound_frame_size)
+                if window <= 0:
+                    window_updated.clear()
+                    await window_updated.wait()
+                    continue
+                chunk, content = content[:window], content[window:]
+                connection.send_data(stream_id, chunk, end_stream=not content)
+                writer.write(connection.data_to_send())
+            await writer.drain()
+        except (StreamClosedError, ConnectionError):
+            pass
+
+    def shutdown(self):
+        async def close():
+            self.server.close()
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+
+@pytest.fixture
+def http2_file_server():
+    """Local HTTP/2 file server multiplexing requests over a single connection."""
+    pytest.importorskip("h2")
+    server = Http2FileServer()
+    yield server
+    server.shutdown()
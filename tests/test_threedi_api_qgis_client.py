@@ -1,23 +1,72 @@
 # 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
 # Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import base64
+import gzip
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 
 import pytest
+import urllib3
 from threedi_api_client.openapi import (
     Action,
     ApiException,
+    ApiTypeError,
     ConstantRain,
     CurrentStatus,
     Progress,
     Repository,
     Revision,
     Simulation,
+    SimulationStatus,
     ThreediModel,
     TimeseriesRain,
 )
 from threedi_api_client.openapi.api.v3_api import V3Api
 
-from threedi_models_and_simulations.api_calls.threedi_calls import ThreediCalls, get_api_client
+from threedi_models_and_simulations.api_calls import delta_sync
+from threedi_models_and_simulations.api_calls.client_pool import ApiClientPool, source_api_client
+from threedi_models_and_simulations.api_calls.delta_sync import DeltaStore
+from threedi_models_and_simulations.api_calls.filters import filter_items, split_filters, supported_params
+from threedi_models_and_simulations.api_calls.api_cache import is_read_method
+from threedi_models_and_simulations.api_calls.http_cache import (
+    CachedResponse,
+    ConditionalPoolManager,
+    HttpCache,
+    http_cache_path,
+)
+from threedi_models_and_simulations.api_calls.metrics import (
+    METRICS_EXPORT_ENV_VAR,
+    ApiMetrics,
+    metrics_export_path,
+    percentile,
+)
+from threedi_models_and_simulations.api_calls.polling import Poller, PollTimeoutError, PollTimings
+from threedi_models_and_simulations.api_calls.rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    is_retryable,
+    retry_after_delay,
+)
+from threedi_models_and_simulations.api_calls.simulation_journal import SimulationJournal, batch_fingerprints
+from threedi_models_and_simulations.api_calls.threedi_calls import (
+    ThreediCalls,
+    get_api_client,
+    get_api_client_with_personal_api_token,
+    get_api_client_with_tokens,
+)
+from threedi_models_and_simulations.api_calls.transports import (
+    HTTP2_TRANSPORT,
+    Http2PoolManager,
+    Http2Response,
+    http2_available,
+)
+from threedi_models_and_simulations.api_calls.upload_registry import UploadRegistry
+from threedi_models_and_simulations.data_models import simulation_data_models as dm
 
 from .conftest import (
     ACTION_DATA,
@@ -145,6 +194,35 @@ def test_add_custom_precipitation():
         assert getattr(custom_rain, k) == v
 
 
+@patch.object(V3Api, "statuses_list")
+@patch.object(V3Api, "simulations_progress_list")
+@patch.object(V3Api, "simulations_status_list")
+def test_all_simulations_progress_bulk(
+    mock_simulations_status_list, mock_simulations_progress_list, mock_statuses_list
+):
+    sims = [Simulation(**data) for data in SIM_DATA_LIST]
+    sim1, sim2 = sims
+    statuses = [SimulationStatus(simulation_id=sim.id, **data) for sim, data in zip(sims, CURRENT_STATUSES_LIST)]
+    mock_statuses_list.return_value = Mock(results=statuses, count=len(statuses))
+    prog1 = Progress(**PROGRESS_DATA)
+    mock_simulations_progress_list.return_value = prog1
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    progress_dict = tc.fetch_simulations_progresses(sims, bulk=True)
+    mock_simulations_status_list.assert_not_called()
+    assert mock_statuses_list.call_count == 1
+    assert mock_statuses_list.call_args.kwargs["simulation_id__in"] == f"{sim1.id},{sim2.id}"
+    mock_simulations_progress_list.assert_called_once_with(str(sim1.id), limit=tc.FETCH_LIMIT)
+    s1, cs1, p1 = progress_dict[sim1.id]
+    s2, cs2, p2 = progress_dict[sim2.id]
+    assert s1 == sim1
+    assert cs1.name == "initialized"
+    assert p1 == prog1
+    assert s2 == sim2
+    assert cs2.name == "finished"
+    assert p2.to_dict() == {"percentage": 100, "time": 72000}
+
+
 @patch.object(V3Api, "revisions_list")
 def test_fetch_revisions(mock_revisions_list):
     revs = [Revision(**data) for data in REVISION_DATA_LIST]
@@ -174,3 +252,651 @@ def test_fetch_revision_3di_models(mock_revisions_threedimodels):
         for k, v in raw_data.items():
             assert hasattr(res, k)
             assert getattr(res, k) == v
+
+
+def paginated_api_method(items, failing_offset=None):
+    """Return fake list endpoint serving given items in pages."""
+
+    def api_method(offset=0, limit=None):
+        if offset == failing_offset:
+            raise ApiException(500)
+        return Mock(results=items[offset : offset + limit], count=len(items))
+
+    return api_method
+
+
+def test_paginated_fetch_keeps_order():
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    items = list(range(2 * tc.MAX_FETCH_LIMIT + 3))
+    results = tc.paginated_fetch(paginated_api_method(items))
+    assert results == items
+
+
+def test_paginated_fetch_capped_page_size():
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    items = list(range(tc.FETCH_LIMIT * 10))
+    api_method = paginated_api_method(items)
+
+    def capped_api_method(offset=0, limit=None):
+        return api_method(offset=offset, limit=min(limit, tc.FETCH_LIMIT))
+
+    results = tc.paginated_fetch(capped_api_method)
+    assert results == items
+
+
+def test_paginated_fetch_failed_page():
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    items = list(range(tc.FETCH_LIMIT * 10))
+    failing_offset = tc.FETCH_LIMIT
+    with pytest.raises(ApiException):
+        tc.paginated_fetch(paginated_api_method(items, failing_offset=failing_offset))
+
+
+@patch.object(V3Api, "contracts_list")
+def test_concurrent_paginated_fetches_are_independent(mock_contracts_list):
+    items = list(range(600))
+    api_method = paginated_api_method(items)
+    first_page_requested = threading.Barrier(2, timeout=5)
+
+    def slow_contracts_list(offset=0, limit=None):
+        if offset == 0:
+            time.sleep(0.2)
+        return api_method(offset=offset, limit=limit)
+
+    mock_contracts_list.side_effect = slow_contracts_list
+    api = get_api_client(*TEST_API_PARAMETERS)
+
+    def fetch_contracts():
+        first_page_requested.wait()
+        return ThreediCalls(api).fetch_contracts()
+
+    with ThreadPoolExecutor(2) as executor:
+        first_results, second_results = executor.map(lambda _: fetch_contracts(), range(2))
+    assert first_results == second_results == items
+    assert first_results is not second_results
+
+
+def test_iter_paginated_is_lazy():
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    items = list(range(tc.FETCH_LIMIT * 3))
+    api_method = Mock(side_effect=paginated_api_method(items))
+    iterator = tc.iter_paginated(api_method)
+    api_method.assert_not_called()
+    assert next(iterator) == items[0]
+    assert api_method.call_count == 1
+    assert list(iterator) == items[1:]
+    assert api_method.call_count == 3
+
+
+def test_iter_paginated_pages():
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    items = list(range(tc.FETCH_LIMIT + 1))
+    pages = list(tc.iter_paginated_pages(paginated_api_method(items)))
+    assert pages == [items[: tc.FETCH_LIMIT], items[tc.FETCH_LIMIT :]]
+
+
+@patch.object(V3Api, "threedimodels_delete")
+@patch.object(V3Api, "threedimodels_read")
+def test_cached_fetch_invalidated_by_write(mock_threedimodels_read, mock_threedimodels_delete):
+    mock_threedimodels_read.return_value = Mock(id=1)
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api, cached=True)
+    model = tc.fetch_3di_model(1)
+    cached_model = ThreediCalls(api, cached=True).fetch_3di_model("1")
+    assert cached_model.id == model.id and cached_model is not model
+    assert mock_threedimodels_read.call_count == 1
+    assert ThreediCalls(api).fetch_3di_model(1).id == model.id
+    assert mock_threedimodels_read.call_count == 2
+    ThreediCalls(api).delete_3di_model(1)
+    tc.fetch_3di_model(1)
+    assert mock_threedimodels_read.call_count == 3
+    stats = tc.cache_stats
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["methods"]["threedimodels_read"] == {"hits": 1, "misses": 2}
+
+
+@patch.object(V3Api, "revisions_threedimodels")
+@patch.object(V3Api, "threedimodels_read")
+def test_reads_without_write_suffix_keep_cache(mock_threedimodels_read, mock_revisions_threedimodels):
+    assert is_read_method("revisions_threedimodels")
+    assert not is_read_method("schematisations_revisions_commit")
+    assert not is_read_method("simulations_events_lateral_file_processed")
+    mock_threedimodels_read.return_value = Mock(id=1)
+    mock_revisions_threedimodels.return_value = []
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api, cached=True)
+    tc.fetch_3di_model(1)
+    tc.threedi_api.revisions_threedimodels(1)
+    tc.fetch_3di_model(1)
+    assert mock_threedimodels_read.call_count == 1
+    assert tc.cache_stats["invalidations"] == 0
+    assert tc.single_flight_stats["executions"] == 1
+
+
+@patch.object(V3Api, "contracts_list")
+def test_cache_lru_eviction(mock_contracts_list):
+    mock_contracts_list.return_value = Mock(results=[], count=0)
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api, cached=True)
+    tc.threedi_api.cache.max_entries = 2
+    for organisation_uuid in ["a", "b", "c"]:
+        tc.fetch_contracts(organisation__unique_id=organisation_uuid)
+    tc.fetch_contracts(organisation__unique_id="c")
+    assert mock_contracts_list.call_count == 3
+    tc.fetch_contracts(organisation__unique_id="a")
+    assert mock_contracts_list.call_count == 4
+    assert tc.cache_stats["entries"] == 2
+
+
+def test_conditional_get_revalidation(tmp_path):
+    pool_manager = Mock()
+    http_cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    conditional_pool_manager = ConditionalPoolManager(pool_manager, http_cache)
+    url = "https://api.3di.live/v3/threedimodels/1/"
+    pool_manager.request.return_value = urllib3.HTTPResponse(
+        body=b'{"id": 1}', headers={"ETag": '"v1"', "Content-Type": "application/json"}, status=200
+    )
+    response = conditional_pool_manager.request("GET", url, fields=[], headers={})
+    assert response.data == b'{"id": 1}'
+    pool_manager.request.return_value = urllib3.HTTPResponse(body=b"", status=304)
+    response = conditional_pool_manager.request("GET", url, fields=[], headers={})
+    assert pool_manager.request.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert response.status == 200
+    assert response.data == b'{"id": 1}'
+    assert response.headers["Content-Type"] == "application/json"
+    assert conditional_pool_manager.revalidated == 1
+
+
+def test_http_cache_size_cap(tmp_path):
+    http_cache = HttpCache(str(tmp_path / "cache.sqlite"), max_size=10)
+    for key in ["a", "b", "c"]:
+        http_cache.set(key, CachedResponse('"etag"', None, {}, b"12345"))
+    assert http_cache.get("a") is None
+    assert http_cache.get("c").body == b"12345"
+    assert http_cache.size() == 10
+    http_cache.set("c", CachedResponse('"etag"', None, {}, b"123"))
+    assert http_cache.total_size == http_cache.size() == 8
+    assert HttpCache(http_cache.db_path, max_size=10).size() == 8
+
+
+def test_http_cache_path_per_user_and_host(tmp_path):
+    api = get_api_client(*TEST_API_PARAMETERS)
+    other_user_parameters = ("other_user",) + TEST_API_PARAMETERS[1:]
+    other_user_api = get_api_client(*other_user_parameters)
+    assert http_cache_path(api, str(tmp_path)) != http_cache_path(other_user_api, str(tmp_path))
+    assert http_cache_path(api, str(tmp_path)) == http_cache_path(get_api_client(*TEST_API_PARAMETERS), str(tmp_path))
+    custom_cache_dir = tmp_path / "custom_http_cache"
+    api = get_api_client(*TEST_API_PARAMETERS, http_cache_dir=str(custom_cache_dir))
+    assert api._client.rest_client.pool_manager.http_cache.db_path == http_cache_path(api, str(custom_cache_dir))
+
+
+def test_http_cache_path_per_token_user(tmp_path):
+    def token(claims):
+        payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+        return f"header.{payload}.signature"
+
+    host = TEST_API_PARAMETERS[2]
+    api = get_api_client_with_tokens(host, token({"sub": "user", "exp": 1}), token({"sub": "user", "exp": 2}))
+    next_login_api = get_api_client_with_tokens(host, token({"sub": "user", "exp": 3}), token({"sub": "user", "exp": 4}))
+    other_user_api = get_api_client_with_tokens(host, token({"sub": "other", "exp": 3}), token({"sub": "other", "exp": 4}))
+    assert http_cache_path(api, str(tmp_path)) == http_cache_path(next_login_api, str(tmp_path))
+    assert http_cache_path(api, str(tmp_path)) != http_cache_path(other_user_api, str(tmp_path))
+    anonymous_api = get_api_client_with_tokens(host, "not-a-jwt", "not-a-jwt", http_cache_dir=str(tmp_path))
+    assert http_cache_path(anonymous_api, str(tmp_path)) is None
+    assert not isinstance(anonymous_api._client.rest_client.pool_manager, ConditionalPoolManager)
+
+
+@patch.object(V3Api, "threedimodels_read")
+def test_single_flight_coalescing(mock_threedimodels_read):
+    release_response = threading.Event()
+
+    def slow_threedimodels_read(threedimodel_id):
+        release_response.wait(5)
+        return Mock(id=threedimodel_id)
+
+    mock_threedimodels_read.side_effect = slow_threedimodels_read
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    callers_count = 4
+    with ThreadPoolExecutor(callers_count) as executor:
+        futures = [executor.submit(ThreediCalls(api).fetch_3di_model, 1) for _ in range(callers_count)]
+        deadline = time.monotonic() + 5
+        while tc.single_flight_stats["coalesced"] < callers_count - 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release_response.set()
+        models = [future.result() for future in futures]
+    assert mock_threedimodels_read.call_count == 1
+    assert all(model.id == 1 for model in models)
+    assert len({id(model) for model in models}) == callers_count
+    stats = tc.single_flight_stats
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == callers_count - 1
+    assert stats["methods"] == {"threedimodels_read": callers_count - 1}
+    assert stats["in_flight"] == 0
+
+
+def test_rate_limiter_retries_with_retry_after():
+    rate_limiter = RateLimiter(backoff_base=0.001)
+    throttled_error = ApiException(status=429)
+    throttled_error.headers = {"Retry-After": "0"}
+    api_method = Mock(side_effect=[throttled_error, ApiException(status=503), "updated"])
+    assert rate_limiter.call("simulations_update", api_method) == "updated"
+    assert api_method.call_count == 3
+    assert rate_limiter.stats()["retries"] == 2
+    create_method = Mock(side_effect=[throttled_error, "created"])
+    assert rate_limiter.call("simulations_create", create_method) == "created"
+    assert create_method.call_count == 2
+
+
+def test_rate_limiter_gives_up():
+    rate_limiter = RateLimiter(max_retries=1, backoff_base=0.001)
+    api_method = Mock(side_effect=ApiException(status=503))
+    with pytest.raises(ApiException):
+        rate_limiter.call("simulations_read", api_method)
+    assert api_method.call_count == 2
+    for method_name in ["simulations_create", "simulations_partial_update"]:
+        unavailable_method = Mock(side_effect=ApiException(status=503))
+        with pytest.raises(ApiException):
+            rate_limiter.call(method_name, unavailable_method)
+        assert unavailable_method.call_count == 1
+    not_found_method = Mock(side_effect=ApiException(status=404))
+    with pytest.raises(ApiException):
+        rate_limiter.call("simulations_read", not_found_method)
+    assert not_found_method.call_count == 1
+    start_method = Mock(side_effect=ApiException(status=429))
+    with pytest.raises(ApiException):
+        rate_limiter.call("simulations_actions_create", start_method)
+    assert start_method.call_count == 1
+
+
+def test_retry_policy():
+    assert is_retryable("simulations_list", 503)
+    assert is_retryable("simulations_delete", 503)
+    assert is_retryable("simulations_update", 503)
+    assert not is_retryable("simulations_partial_update", 503)
+    assert not is_retryable("simulations_events_lateral_timeseries_create", 503)
+    assert is_retryable("simulations_events_lateral_timeseries_create", 429)
+    assert not is_retryable("simulations_actions_create", 429)
+    assert not is_retryable("simulations_read", 500)
+
+
+def test_token_bucket_throttling():
+    bucket = TokenBucket(rate=100.0, capacity=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() > 0
+
+
+def test_retry_after_delay():
+    error = ApiException(status=429)
+    assert retry_after_delay(error) is None
+    error.headers = {"Retry-After": "2.5"}
+    assert retry_after_delay(error) == 2.5
+    error.headers = {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    assert retry_after_delay(error) == 0
+
+
+@patch.object(V3Api, "simulations_read")
+def test_api_metrics(mock_simulations_read, tmp_path):
+    mock_simulations_read.side_effect = [Simulation(**SINGLE_SIM_DATA), ApiException(status=404)]
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    metrics = tc.metrics
+    metrics.reset()
+    metrics.enable()
+    try:
+        tc.fetch_simulation(1)
+        with pytest.raises(ApiException):
+            tc.fetch_simulation(2)
+    finally:
+        metrics.disable()
+    summary = metrics.summary()["methods"]["simulations_read"]
+    assert summary["calls"] == 2
+    assert summary["errors"] == 1
+    assert 0 < summary["latency_p50"] <= summary["latency_p99"]
+    csv_path = tmp_path / "metrics.csv"
+    metrics.export(str(csv_path))
+    csv_lines = csv_path.read_text().splitlines()
+    assert csv_lines[0].startswith("name,calls,errors,retries")
+    assert csv_lines[1].startswith("simulations_read,2,1,0")
+    json_path = tmp_path / "metrics.json"
+    metrics.export(str(json_path))
+    assert "simulations_read" in json_path.read_text()
+    metrics.reset()
+
+
+@patch.object(V3Api, "simulations_read")
+def test_api_metrics_exclude_retry_delays(mock_simulations_read):
+    unavailable_error = ApiException(status=503)
+    unavailable_error.headers = {"Retry-After": "0.2"}
+    mock_simulations_read.side_effect = [unavailable_error, Simulation(**SINGLE_SIM_DATA)]
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    metrics = tc.metrics
+    metrics.reset()
+    metrics.enable()
+    try:
+        tc.fetch_simulation(1)
+    finally:
+        metrics.disable()
+    summary = metrics.summary()["methods"]["simulations_read"]
+    assert summary["calls"] == 2
+    assert summary["errors"] == 1
+    assert summary["retries"] == 1
+    assert summary["throttled_time"] >= 0.2
+    assert summary["latency_p99"] < 0.2
+    metrics.reset()
+
+
+def test_api_metrics_disabled():
+    metrics = ApiMetrics()
+    metrics.record_retry("simulations_create")
+    metrics.record_transfer("upload", 1024)
+    assert metrics.summary() == {
+        "methods": {},
+        "transfers": {
+            "upload": {"calls": 0, "errors": 0, "bytes": 0},
+            "download": {"calls": 0, "errors": 0, "bytes": 0},
+        },
+    }
+
+
+def test_metrics_export_path(monkeypatch):
+    monkeypatch.delenv(METRICS_EXPORT_ENV_VAR, raising=False)
+    assert metrics_export_path() is None
+    monkeypatch.setenv(METRICS_EXPORT_ENV_VAR, "")
+    assert metrics_export_path() is None
+    monkeypatch.setenv(METRICS_EXPORT_ENV_VAR, "/tmp/3di_metrics.csv")
+    assert metrics_export_path() == "/tmp/3di_metrics.csv"
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0.0
+
+
+@patch.object(V3Api, "statuses_list")
+def test_fetch_simulation_statuses_raw(mock_statuses_list):
+    rows = [
+        {"id": i, "name": "finished", "simulation_id": 1000 + i, "created": "2023-05-01T12:00:00Z"} for i in range(3)
+    ]
+
+    def statuses_list(offset=0, limit=None, **params):
+        assert params["_preload_content"] is False
+        page = {"count": len(rows), "results": rows[offset : offset + limit]}
+        return Mock(data=json.dumps(page).encode())
+
+    mock_statuses_list.side_effect = statuses_list
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    tc.FETCH_LIMIT = 2
+    statuses = tc.fetch_simulation_statuses_raw(fields=["simulation_id", "name", "paused"], name="finished")
+    assert [status.simulation_id for status in statuses] == [1000, 1001, 1002]
+    assert statuses[0]._fields == ("simulation_id", "name", "paused")
+    assert statuses[0].paused is None
+    assert mock_statuses_list.call_args.kwargs["name"] == "finished"
+    all_fields_statuses = tc.fetch_simulation_statuses_raw()
+    assert all_fields_statuses[2]._asdict() == rows[2]
+
+
+@patch.object(V3Api, "threedimodels_potentialbreaches_list")
+def test_fetch_3di_model_potential_breaches_raw(mock_potentialbreaches_list):
+    rows = [
+        {"id": i, "url": f"https://api.3di.live/v3/threedimodels/1/potentialbreaches/{i}/", "connected_pnt_id": 10 + i}
+        for i in range(5)
+    ]
+
+    def potentialbreaches_list(threedimodel_pk, offset=0, limit=None, **params):
+        assert threedimodel_pk == "1"
+        page = {"count": len(rows), "results": rows[offset : offset + limit]}
+        return Mock(data=json.dumps(page).encode())
+
+    mock_potentialbreaches_list.side_effect = potentialbreaches_list
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    tc.FETCH_LIMIT = 2
+    breaches = tc.fetch_3di_model_potential_breaches_raw("1", fields=["connected_pnt_id", "url"])
+    assert {breach.connected_pnt_id: breach.url for breach in breaches} == {
+        row["connected_pnt_id"]: row["url"] for row in rows
+    }
+
+
+@patch.object(V3Api, "statuses_list")
+def test_fetch_simulation_statuses_delta(mock_statuses_list, tmp_path, monkeypatch):
+    monkeypatch.setattr(delta_sync, "DELTA_SYNC_PATH", str(tmp_path))
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    server_rows = [
+        {"id": 1, "name": "finished", "simulation_id": 101, "created": f"{today}T08:00:00Z"},
+        {"id": 2, "name": "finished", "simulation_id": 102, "created": f"{today}T09:00:00Z"},
+    ]
+
+    def statuses_list(offset=0, limit=None, created__gt=None, **params):
+        rows = [row for row in server_rows if created__gt is None or row["created"] > created__gt]
+        page = {"count": len(rows), "results": rows[offset : offset + limit]}
+        return Mock(data=json.dumps(page).encode())
+
+    mock_statuses_list.side_effect = statuses_list
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    statuses = tc.fetch_simulation_statuses_delta(fields=["simulation_id"], name="finished")
+    assert [status.simulation_id for status in statuses] == [101, 102]
+    assert "created__gt" not in mock_statuses_list.call_args.kwargs
+    server_rows.append({"id": 3, "name": "finished", "simulation_id": 103, "created": f"{today}T10:00:00Z"})
+    statuses = tc.fetch_simulation_statuses_delta(fields=["simulation_id"], name="finished")
+    assert [status.simulation_id for status in statuses] == [101, 102, 103]
+    assert mock_statuses_list.call_args.kwargs["created__gt"] == f"{today}T09:00:00Z"
+    # Expiration date moving to the next day keeps using the same store
+    monkeypatch.setattr(ThreediCalls, "EXPIRATION_TIME", ThreediCalls.EXPIRATION_TIME + timedelta(days=1))
+    statuses = tc.fetch_simulation_statuses_delta(fields=["simulation_id"], name="finished")
+    assert [status.simulation_id for status in statuses] == [101, 102, 103]
+    assert mock_statuses_list.call_args.kwargs["created__gt"] == f"{today}T10:00:00Z"
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_split_filters():
+    def api_method(**kwargs):
+        """List items.
+
+        :param str name: name
+        :param str state__in: Multiple values may be separated by commas.
+        :param bool active: active
+        """
+
+    pushed, local = split_filters(
+        api_method, {"name": "a", "state__in": ["valid", "processing"], "active": True, "x": 1}
+    )
+    assert pushed == {"name": "a", "state__in": "valid,processing", "active": "true"}
+    assert local == {"x": 1}
+    items = [{"id": 1, "periodic": "daily"}, Mock(id=2, periodic=None), {"id": 3, "periodic": None}]
+    assert [item["id"] for item in filter_items(items[::2], {"periodic__ne": "daily"})] == [3]
+    assert list(filter_items(items, {"id__gte": 2, "periodic__isnull": True})) == items[1:]
+
+
+def test_supported_params_of_generated_method():
+    assert supported_params(V3Api.simulations_events_lateral_file_list) == {"limit", "offset"}
+    assert {"name", "name__in", "created__gt", "limit"} <= supported_params(V3Api.statuses_list)
+
+
+def test_iter_filtered_fallback():
+    rows = [Mock(id=1, dimension="one_d"), Mock(id=2, dimension="two_d"), Mock(id=3, dimension="one_d")]
+
+    def api_method(offset=0, limit=None, **kwargs):
+        """List items.
+
+        :param str dimension: dimension
+        """
+        if kwargs:
+            raise ApiTypeError("Got an unexpected keyword argument")
+        return Mock(results=rows[offset : offset + limit], count=len(rows))
+
+    api = get_api_client(*TEST_API_PARAMETERS)
+    tc = ThreediCalls(api)
+    assert tc.filtered_fetch(api_method, filters={"dimension": "one_d", "id__gt": 1}) == rows[2:]
+    assert tc.filtered_fetch(api_method, filters={"dimension": "three_d"}) == []
+
+
+def test_api_client_pool():
+    api = get_api_client(*TEST_API_PARAMETERS)
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": time.time() + 3600}).encode()).decode().rstrip("=")
+    access_token = f"header.{payload}.signature"
+
+    def refresh_hook(configuration):
+        time.sleep(0.05)
+        configuration.api_key["Authorization"] = access_token
+
+    api._client.configuration.refresh_api_key_hook = refresh_hook
+    client_pool = ApiClientPool(api, max_connections=8, max_clients=4)
+    barrier = threading.Barrier(4)
+
+    def checked_out_client(_):
+        with client_pool.checkout() as threedi_api:
+            # All clients are checked out at the same time
+            barrier.wait(timeout=5)
+            return threedi_api, threedi_api._client.configuration.get_api_key_with_prefix("Authorization")
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(checked_out_client, range(4)))
+    clients = {id(threedi_api) for threedi_api, _ in results}
+    assert len(clients) == 4 and id(api) not in clients
+    assert {authorization for _, authorization in results} == {f"Bearer {access_token}"}
+    assert client_pool.stats() == {"clients_created": 4, "idle_clients": 4, "token_refreshes": 1}
+    for threedi_api, _ in results:
+        assert threedi_api._client.rest_client.pool_manager is api._client.rest_client.pool_manager
+        assert source_api_client(threedi_api) is api
+
+    # Clients are reused by the threads of the later executors, and the pool never grows above its size
+    def reused_client(_):
+        with client_pool.checkout() as threedi_api:
+            time.sleep(0.01)
+            return id(threedi_api)
+
+    with ThreadPoolExecutor(8) as executor:
+        reused_clients = set(executor.map(reused_client, range(16)))
+    assert reused_clients <= clients
+    assert client_pool.stats()["clients_created"] == 4
+    assert api._client.rest_client.pool_manager.connection_pool_kw["maxsize"] == 8
+
+
+@pytest.mark.skipif(not http2_available(), reason="HTTP/2 transport dependencies not installed")
+def test_http2_api_transport(file_server):
+    repos = {"count": 1, "next": None, "previous": None, "results": REPO_DATA_LIST[:1]}
+    file_server.files["/v3/repositories/?limit=10"] = json.dumps(repos).encode()
+    api = get_api_client_with_personal_api_token("TOKEN", file_server.url, transport=HTTP2_TRANSPORT)
+    try:
+        assert isinstance(api._client.rest_client.pool_manager.pool_manager, Http2PoolManager)
+        assert ThreediCalls(api).threedi_api.repositories_list(limit=10).results[0].id == REPO_DATA_LIST[0]["id"]
+    finally:
+        api._client.rest_client.pool_manager.clear()
+
+
+@pytest.mark.skipif(not http2_available(), reason="HTTP/2 transport dependencies not installed")
+def test_http2_response_headers():
+    import httpx
+
+    content = gzip.compress(b"{}")
+    headers = [("Content-Encoding", "gzip"), ("Content-Length", str(len(content))), ("Link", "<a>"), ("Link", "<b>")]
+    response = Http2Response(httpx.Response(200, headers=headers, content=content))
+    assert response.headers.getlist("Link") == ["<a>", "<b>"]
+    assert "Content-Encoding" not in response.headers
+    assert "Content-Length" not in response.headers
+    assert response.data == b"{}"
+
+
+def test_poller_backoff_and_deadline():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(delay):
+        sleeps.append(delay)
+        now[0] += delay
+
+    timings = PollTimings(initial_delay=1.0, max_delay=4.0, multiplier=2.0, jitter=0.0)
+    poller = Poller("test", timeout=10.0, timings=timings, sleep=sleep, clock=lambda: now[0])
+    assert list(poller) == [1, 2, 3, 4, 5]
+    assert sleeps == [1.0, 2.0, 4.0, 3.0]
+    sleeps.clear()
+    now[0] = 0.0
+    results = iter([None, None, "valid"])
+    poller = Poller("test", timeout=10.0, timings=timings, sleep=sleep, clock=lambda: now[0])
+    assert poller.poll(lambda: next(results)) == "valid"
+    assert sleeps == [1.0, 2.0]
+    poller = Poller("test", timeout=5.0, timings=timings, sleep=sleep, clock=lambda: now[0])
+    with pytest.raises(PollTimeoutError):
+        poller.poll(lambda: None)
+
+
+def test_upload_registry(tmp_path):
+    registry_path = str(tmp_path / "registry" / "user.json")
+    registry = UploadRegistry(registry_path)
+    assert registry.get(1, "initial_waterlevel_file", "abc") is None
+    registry.register(1, "initial_waterlevel_file", "abc", 10)
+    registry.register(2, "initial_waterlevel_file", "abc", 20)
+    assert UploadRegistry(registry_path).get(1, "initial_waterlevel_file", "abc") == 10
+    assert registry.get(1, "initial_concentration_file", "abc") is None
+    registry.remove(1, "initial_waterlevel_file", "abc")
+    assert registry.get(1, "initial_waterlevel_file", "abc") is None
+    assert registry.get(2, "initial_waterlevel_file", "abc") == 20
+    with open(registry_path, "w") as registry_file:
+        registry_file.write("[corrupted")
+    assert registry.get(2, "initial_waterlevel_file", "abc") is None
+    registry.clear()
+    assert registry.load() == {}
+
+
+def test_delta_store(tmp_path):
+    store_path = str(tmp_path / "delta_sync" / "user_statuses.json")
+    store = DeltaStore(store_path)
+    assert store.high_water_mark() is None
+    rows = store.merge([{"id": 2, "created": "2024-01-02T00:00:00Z"}, {"id": 1, "created": "2024-01-01T00:00:00Z"}])
+    assert [row["id"] for row in rows] == [1, 2]
+    assert DeltaStore(store_path).lock is store.lock
+    assert DeltaStore(store_path).high_water_mark() == "2024-01-02T00:00:00Z"
+    with open(store_path, "w") as store_file:
+        store_file.write('{"records": []}')
+    assert store.load() == {"high_water_mark": None, "records": {}}
+    store.clear()
+    assert store.load() == store.empty()
+
+
+def test_simulation_journal(tmp_path):
+    def new_simulation(name):
+        return dm.NewSimulation(None, name, [], "5", "org", datetime(2024, 1, 1), datetime(2024, 1, 2), 86400.0)
+
+    first, repeated, other = batch_fingerprints([new_simulation("sim"), new_simulation("sim"), new_simulation("other")])
+    assert len({first, repeated, other}) == 3
+    assert repeated == f"{first}-2"
+    simulation = new_simulation("sim")
+    simulation.simulation = SimpleNamespace(id=10)
+    assert batch_fingerprints([simulation]) == [first]
+
+    journal_path = str(tmp_path / "journal" / "user.json")
+    journal = SimulationJournal(journal_path)
+    assert journal.get(first) is None
+    journal.complete_step(first, "include_settings")
+    assert journal.get(first) is None
+    journal.start(first, "sim", 10)
+    journal.begin_step(first, "include_substances")
+    journal.complete_step(first, "include_substances", {"salt": 3})
+    journal.begin_step(first, "include_laterals")
+    journal.begin_step(first, "include_breaches")
+    journal.fail_step(first, "include_laterals")
+    entry = SimulationJournal(journal_path).get(first)
+    assert entry["simulation_id"] == 10
+    assert entry["steps"] == {"include_substances": {"salt": 3}}
+    assert entry["failed_step"] == "include_laterals"
+    assert SimulationJournal.partial_steps(entry) == ["include_breaches", "include_laterals"]
+    journal.start(repeated, "sim", 11)
+    journal.remove(first)
+    assert journal.get(first) is None
+    assert journal.get(repeated)["simulation_id"] == 11
+    journal.clear()
+    assert journal.load() == {}
@@ -1,16 +1,30 @@
 # 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
 # Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import SimpleNamespace
 
 import pytest
+import urllib3
 
+from threedi_models_and_simulations.api_calls.metrics import get_api_metrics
+from threedi_models_and_simulations.api_calls.transfers import JsonBody, TransferError, TransferPool
+from threedi_models_and_simulations.api_calls.transports import HTTP2_TRANSPORT, Http2PoolManager, http2_available
 from threedi_models_and_simulations.utils import (
     apply_24h_timeseries,
+    data_checksum,
     extract_error_message,
+    file_checksum,
+    get_download_file,
     mmh_to_mmtimestep,
     mmh_to_ms,
     mmtimestep_to_mmh,
     ms_to_mmh,
+    run_dependency_graph,
+    timeseries_rain_events,
+    upload_json_data,
+    upload_local_file,
 )
 
 from .conftest import (
@@ -138,3 +152,170 @@ def test_apply_24h_timeseries_extend_uneven_hours():
     expected_ts_values += ts_values[1 : end_shift_hours + 1]  # Adding time steps for additional hours
     extended_ts_values = [v for t, v in apply_24h_timeseries(start_datetime, end_datetime, TIMESERIES24)]
     assert extended_ts_values == expected_ts_values
+
+
+def test_upload_and_download_file(file_server, tmp_path):
+    content = b"3Di" * 1024
+    local_filepath = tmp_path / "upload.bin"
+    local_filepath.write_bytes(content)
+    upload = SimpleNamespace(put_url=f"{file_server.url}/file.bin")
+    upload_local_file(upload, local_filepath)
+    assert file_server.files["/file.bin"] == content
+    download = SimpleNamespace(get_url=f"{file_server.url}/file.bin")
+    downloaded_filepath = tmp_path / "download.bin"
+    get_download_file(download, downloaded_filepath)
+    assert downloaded_filepath.read_bytes() == content
+
+
+def test_upload_json_data(file_server):
+    values = [{"id": i, "values": [[0, 1.5], [3600, 2.0]], "name": "lateral ü"} for i in range(1000)]
+    body = JsonBody(values, chunk_size=1024)
+    expected_content = json.dumps(values).encode()
+    assert body.content_length == len(expected_content)
+    assert b"".join(body) == b"".join(body) == expected_content
+    chunks = list(body)
+    assert len(chunks) > 1
+    assert all(len(chunk) < 2 * 1024 for chunk in chunks)
+    upload_json_data(SimpleNamespace(put_url=f"{file_server.url}/laterals.json"), values)
+    assert file_server.files["/laterals.json"] == expected_content
+
+
+def test_upload_retries_with_backoff(file_server, monkeypatch):
+    transfer_pool = TransferPool(retries=2, backoff_factor=0.5)
+    request = transfer_pool.pool_manager.request
+    failures, delays = [], []
+
+    def flaky_request(method, url, **kwargs):
+        if len(failures) < 2:
+            failures.append(url)
+            raise urllib3.exceptions.ProtocolError("Connection aborted")
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(transfer_pool.pool_manager, "request", flaky_request)
+    monkeypatch.setattr("threedi_models_and_simulations.api_calls.transfers.time", SimpleNamespace(sleep=delays.append))
+    transfer_pool.upload_json(f"{file_server.url}/data.json", [1, 2, 3])
+    assert file_server.files["/data.json"] == b"[1, 2, 3]"
+    assert len(delays) == 2 and 0 <= delays[0] <= 0.5 and 0 <= delays[1] <= 1.0
+    transfer_pool.clear()
+
+
+def test_download_missing_file(file_server, tmp_path):
+    download = SimpleNamespace(get_url=f"{file_server.url}/missing.bin")
+    with pytest.raises(TransferError):
+        get_download_file(download, tmp_path / "missing.bin")
+
+
+def test_transfer_metrics(file_server, tmp_path):
+    content = b"3Di" * 1024
+    local_filepath = tmp_path / "upload.bin"
+    local_filepath.write_bytes(content)
+    metrics = get_api_metrics()
+    metrics.reset()
+    metrics.enable()
+    try:
+        upload_local_file(SimpleNamespace(put_url=f"{file_server.url}/file.bin"), local_filepath)
+        get_download_file(SimpleNamespace(get_url=f"{file_server.url}/file.bin"), tmp_path / "download.bin")
+    finally:
+        metrics.disable()
+    transfers = metrics.summary()["transfers"]
+    assert transfers["upload"] == {"calls": 1, "errors": 0, "bytes": len(content)}
+    assert transfers["download"] == {"calls": 1, "errors": 0, "bytes": len(content)}
+    metrics.reset()
+
+
+@pytest.mark.skipif(not http2_available(), reason="HTTP/2 transport dependencies not installed")
+def test_http2_transfer_pool(file_server, tmp_path):
+    content = b"3Di" * 100000
+    local_filepath = tmp_path / "upload.bin"
+    local_filepath.write_bytes(content)
+    transfer_pool = TransferPool(transport=HTTP2_TRANSPORT)
+    try:
+        assert isinstance(transfer_pool.pool_manager, Http2PoolManager)
+        with open(local_filepath, "rb") as file:
+            transfer_pool.upload_fileobj(f"{file_server.url}/file.bin", file)
+        assert file_server.files["/file.bin"] == content
+        transfer_pool.upload_json(f"{file_server.url}/data.json", {"content": content.decode()})
+        assert json.loads(file_server.files["/data.json"]) == {"content": content.decode()}
+        assert b"".join(transfer_pool.iter_download(f"{file_server.url}/file.bin", chunk_size=1024)) == content
+        with pytest.raises(TransferError):
+            list(transfer_pool.iter_download(f"{file_server.url}/missing.bin"))
+    finally:
+        transfer_pool.clear()
+
+
+@pytest.mark.skipif(not http2_available(), reason="HTTP/2 transport dependencies not installed")
+def test_http2_multiplexed_requests(http2_file_server):
+    http2_file_server.files = {f"/file_{i}.bin": bytes([i]) * 100000 for i in range(20)}
+    pool_manager = Http2PoolManager(max_connections=1, http1=False)
+    try:
+        with ThreadPoolExecutor(10) as executor:
+            responses = list(
+                executor.map(lambda i: pool_manager.request("GET", f"{http2_file_server.url}/file_{i}.bin"), range(20))
+            )
+        assert [response.data for response in responses] == [bytes([i]) * 100000 for i in range(20)]
+        response = pool_manager.request("PUT", f"{http2_file_server.url}/new.bin", body=b"3Di")
+        assert response.status == 200 and http2_file_server.files["/new.bin"] == b"3Di"
+        assert pool_manager.request("GET", f"{http2_file_server.url}/missing.bin").status == 404
+        assert not pool_manager.stream_lock.locked()
+    finally:
+        pool_manager.clear()
+    assert http2_file_server.connections == 1
+
+
+def test_timeseries_rain_events():
+    values = [[t * 300, t / 10] for t in range(7)]
+    substances = [{"substance": 1, "concentrations": [[0, 50.0]]}]
+    events = timeseries_rain_events(values, 60, 3600, "m/s", False, substances, chunk_length=3)
+    assert [event["offset"] for event in events] == [60, 960, 1860]
+    assert events[1]["values"] == [[0, 0.3], [300, 0.4], [600, 0.5]]
+    assert events[2]["values"] == [[0, 0.6]]
+    assert events[1]["substances"] == [{"substance": 1, "concentrations": [[0, 50.0], [300, 50.0], [600, 50.0]]}]
+    assert all(event["duration"] == 3600 for event in events)
+    assert all(event["units"] == "m/s" and event["interpolate"] is False for event in events)
+    assert substances == [{"substance": 1, "concentrations": [[0, 50.0]]}]
+    assert len(timeseries_rain_events(values, 0, 3600, "m/s", True, [])) == 1
+
+
+def test_run_dependency_graph():
+    started, finished = [], []
+
+    def task(name):
+        def run():
+            started.append(name)
+            assert all(dependency in finished for dependency in dependencies[name])
+            return name.upper()
+
+        return run
+
+    dependencies = {"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"], "e": []}
+    tasks = {name: task(name) for name in dependencies}
+    results = run_dependency_graph(tasks, dependencies, max_workers=3, on_task_done=finished.append)
+    assert results == {name: name.upper() for name in dependencies}
+    assert started[-1] == "d"
+    assert sorted(finished) == sorted(dependencies)
+    with pytest.raises(ValueError):
+        run_dependency_graph(tasks, {"a": ["b"], "b": ["a"]})
+    with pytest.raises(ValueError):
+        run_dependency_graph(tasks, {"a": ["x"]})
+
+
+def test_run_dependency_graph_failure():
+    def fail():
+        raise RuntimeError("Failed task")
+
+    tasks = {"a": fail, "b": lambda: "b", "c": lambda: "c"}
+    with pytest.raises(RuntimeError):
+        run_dependency_graph(tasks, {"b": ["a"], "c": []})
+    results = {}
+    tasks["b"] = lambda: results.setdefault("b", True)
+    with pytest.raises(RuntimeError):
+        run_dependency_graph(tasks, {"b": ["a"]}, max_workers=1)
+    assert "b" not in results
+
+
+def test_checksums(tmp_path):
+    file_path = tmp_path / "raster.tif"
+    file_path.write_bytes(b"3Di" * 1000)
+    assert file_checksum(str(file_path), chunk_size=7) == file_checksum(str(file_path))
+    assert data_checksum({"a": 1, "b": [1, 2]}) == data_checksum({"b": [1, 2], "a": 1})
+    assert data_checksum({"a": 1}) != data_checksum({"a": 2})
@@ -0,0 +1,291 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Tuple
+from weakref import WeakKeyDictionary
+
+from threedi_api_client import ThreediApi
+
+from .client_pool import ApiClientPool
+from .metrics import ApiMetrics
+from .rate_limiter import RateLimiter
+from .single_flight import SingleFlight
+
+MAX_CACHE_ENTRIES = 512
+DEFAULT_TTL = 60.0
+# Time to live (in seconds) of the cached responses - only the API methods listed here are cached
+METHOD_TTLS = {
+    "auth_profile_list": 600.0,
+    "organisations_list": 600.0,
+    "contracts_list": 300.0,
+    "repositories_list": 300.0,
+    "simulation_templates_list": 120.0,
+    "simulations_settings_overview": 120.0,
+    "schematisations_read": 120.0,
+    "schematisations_list": 60.0,
+    "schematisations_revisions_list": 60.0,
+    "threedimodels_read": 120.0,
+    "threedimodels_list": 60.0,
+}
+# Changes of the resources also affecting other resources, e.g. deleted model frees a model slot of the contract
+RELATED_RESOURCES = {
+    "threedimodels": ("contracts",),
+    "schematisations": ("threedimodels",),
+}
+WRITE_ACTION_SUFFIXES = ("_create", "_update", "_partial_update", "_delete", "_upload", "_processed")
+# Write methods not following the `{resource}_{action}` naming of the write actions
+WRITE_METHODS = frozenset(
+    {
+        "files_destroy_file",
+        "schematisations_revisions_check",
+        "schematisations_revisions_commit",
+        "schematisations_revisions_create_threedimodel",
+        "simulations_actions_reset_pause_timeout",
+        "simulations_clone",
+        "simulations_from_template",
+        "simulations_results_post_processing_lizard_start_retry",
+        "simulations_status_patch",
+    }
+)
+
+
+def method_resource(method_name: str) -> str:
+    """Return the resource (first part of the `{resource}_{action}` name) of the API method."""
+    return method_name.split("_", 1)[0]
+
+
+def is_read_method(method_name: str) -> bool:
+    """Check if API method is read-only."""
+    return not method_name.endswith(WRITE_ACTION_SUFFIXES) and method_name not in WRITE_METHODS
+
+
+class ApiCache:
+    """Thread-safe LRU cache of the API responses with the per-method time to live.
+
+    Responses are copied when stored and when returned, so callers modifying them don't change the cached ones.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MAX_CACHE_ENTRIES,
+        default_ttl: float = DEFAULT_TTL,
+        method_ttls: Dict[str, float] = None,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.method_ttls = dict(METHOD_TTLS if method_ttls is None else method_ttls)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.method_counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+        # Bumped on each invalidation, so responses requested before the write are not stored afterwards
+        self.generation = 0
+
+    def is_cached_method(self, method_name: str) -> bool:
+        """Check if responses of the API method should be cached."""
+        return self.method_ttls.get(method_name, 0) > 0
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Get (found, value) pair for the given key, counting cache hits and misses."""
+        method_name = key[0]
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                self.method_counters[method_name]["misses"] += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.method_counters[method_name]["hits"] += 1
+            value = entry[1]
+        # Stored value is never modified, so it can be copied outside the lock
+        return True, copy.deepcopy(value)
+
+    def set(self, key: Tuple, value: Any, generation: int = None):
+        """Store value under the given key, evicting the least recently used entries if needed."""
+        ttl = self.method_ttls.get(key[0], self.default_ttl)
+        value = copy.deepcopy(value)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, resource: str):
+        """Remove all entries of the given resource and the resources related to it."""
+        resources = {resource, *RELATED_RESOURCES.get(resource, ())}
+        with self.lock:
+            self.generation += 1
+            stale_keys = [key for key in self.entries if method_resource(key[0]) in resources]
+            for key in stale_keys:
+                del self.entries[key]
+            self.invalidations += len(stale_keys)
+
+    def clear(self):
+        """Remove all entries."""
+        with self.lock:
+            self.entries.clear()
+
+    def reset_counters(self):
+        """Reset hit/miss counters."""
+        with self.lock:
+            self.hits = self.misses = self.invalidations = 0
+            self.method_counters.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "methods": {method_name: dict(counters) for method_name, counters in self.method_counters.items()},
+            }
+
+
+class CachedThreediApi:
+    """Proxy of the ThreediApi with cached and coalesced read calls, and write calls invalidating the cache."""
+
+    def __init__(
+        self,
+        threedi_api: ThreediApi,
+        cache: ApiCache,
+        single_flight: SingleFlight = None,
+        rate_limiter: RateLimiter = None,
+        metrics: ApiMetrics = None,
+        cache_reads: bool = True,
+        client_pool: ApiClientPool = None,
+    ):
+        self.threedi_api = threedi_api
+        self.cache = cache
+        self.single_flight = single_flight
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.cache_reads = cache_reads
+        self.client_pool = client_pool
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.threedi_api, name)
+        if name.startswith("_") or not callable(attr) or hasattr(type(self.threedi_api), name):
+            return attr
+        if self.client_pool is not None:
+            # Calls are made by the API client checked out from the pool for the time of the call
+            attr = self.client_pool.method(name, attr)
+        if not is_read_method(name):
+            return self.invalidating_call(name, attr)
+        if self.cache.is_cached_method(name):
+            return self.cached_call(name, attr)
+        return self.plain_call(name, attr)
+
+    def plain_call(self, method_name: str, api_method: Callable) -> Callable:
+        """Wrap read API method, which is not cached, with the rate limiting and metrics only."""
+
+        @wraps(api_method)
+        def wrapper(*args, **kwargs):
+            return self.call_api(method_name, api_method, *args, **kwargs)
+
+        return wrapper
+
+    def cached_call(self, method_name: str, api_method: Callable) -> Callable:
+        """Wrap cacheable read API method with the cache lookup and coalescing of the identical in-flight requests."""
+        use_cache = self.cache_reads
+
+        @wraps(api_method)
+        def wrapper(*args, **kwargs):
+            if kwargs.get("_preload_content") is False:
+                return self.call_api(method_name, api_method, *args, **kwargs)
+            key = self.cache_key(method_name, args, kwargs)
+            if key is None:
+                return self.call_api(method_name, api_method, *args, **kwargs)
+            if use_cache:
+                found, value = self.cache.get(key)
+                if found:
+                    return value
+            generation = self.cache.generation
+            if self.single_flight is not None:
+                value = self.single_flight.do(
+                    key + (generation,), self.call_api, method_name, api_method, *args, **kwargs
+                )
+            else:
+                value = self.call_api(method_name, api_method, *args, **kwargs)
+            if use_cache:
+                self.cache.set(key, value, generation)
+            return value
+
+        return wrapper
+
+    def invalidating_call(self, method_name: str, api_method: Callable) -> Callable:
+        """Wrap write API method with the invalidation of the cached resource entries."""
+
+        @wraps(api_method)
+        def wrapper(*args, **kwargs):
+            try:
+                return self.call_api(method_name, api_method, *args, **kwargs)
+            finally:
+                self.cache.invalidate(method_resource(method_name))
+
+        return wrapper
+
+    def call_api(self, method_name: str, api_method: Callable, *args, **kwargs) -> Any:
+        """Call API method, within the rate limits if the rate limiter is set."""
+        if self.metrics is not None and self.metrics.enabled:
+            api_method = self.measured_method(method_name, api_method)
+        if self.rate_limiter is None:
+            return api_method(*args, **kwargs)
+        return self.rate_limiter.call(method_name, api_method, *args, **kwargs)
+
+    def measured_method(self, method_name: str, api_method: Callable) -> Callable:
+        """Wrap API method with the measurement of each request, without the rate limiter waits and retry delays."""
+
+        @wraps(api_method)
+        def wrapper(*args, **kwargs):
+            with self.metrics.measure(method_name):
+                return api_method(*args, **kwargs)
+
+        return wrapper
+
+    @staticmethod
+    def cache_key(method_name: str, args: Tuple, kwargs: Dict[str, Any]) -> Hashable:
+        """Build hashable cache key out of the API call arguments (None if arguments are not hashable)."""
+        key = (method_name, tuple(str(arg) for arg in args), tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+
+_api_caches = WeakKeyDictionary()
+_api_caches_lock = threading.Lock()
+
+
+def get_api_cache(threedi_api: ThreediApi) -> ApiCache:
+    """Return the cache shared by all users of the given API client, creating it on first use."""
+    with _api_caches_lock:
+        try:
+            cache = _api_caches[threedi_api]
+        except KeyError:
+            cache = _api_caches[threedi_api] = ApiCache()
+        return cache
+
+
+def clear_api_cache(threedi_api: ThreediApi):
+    """Clear cached responses of the given API client."""
+    with _api_caches_lock:
+        cache = _api_caches.get(threedi_api)
+    if cache is not None:
+        cache.clear()
@@ -0,0 +1,185 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+from weakref import WeakKeyDictionary
+
+import urllib3
+from threedi_api_client import ThreediApi
+from threedi_api_client.auth import is_token_usable
+from threedi_api_client.openapi import Configuration
+
+from .http_cache import ConditionalPoolManager
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = 16
+MAX_CLIENTS = 16
+NUM_POOLS = 4
+
+
+def api_client_config(threedi_api: ThreediApi) -> Dict[str, str]:
+    """Build ThreediApi config with the credentials of the given API client."""
+    configuration = threedi_api._client.configuration
+    config = {"THREEDI_API_HOST": configuration.host}
+    if configuration.username == "__key__":
+        config["THREEDI_API_PERSONAL_API_TOKEN"] = configuration.password
+    elif configuration.api_key.get("Authorization"):
+        config["THREEDI_API_ACCESS_TOKEN"] = configuration.api_key["Authorization"]
+        config["THREEDI_API_REFRESH_TOKEN"] = configuration.api_key.get("refresh")
+    else:
+        config["THREEDI_API_USERNAME"] = configuration.username
+        config["THREEDI_API_PASSWORD"] = configuration.password
+    return config
+
+
+class SharedCredentials:
+    """Credentials of the API client shared by its pooled counterparts, with tokens refreshed one at a time."""
+
+    def __init__(self, configuration: Configuration):
+        self.configuration = configuration
+        self.refresh_hook = configuration.refresh_api_key_hook
+        self.lock = threading.Lock()
+        self.refreshes = 0
+        if self.refresh_hook is not None:
+            configuration.refresh_api_key_hook = self.refresh
+
+    def refresh(self, configuration: Configuration):
+        """Refresh hook of the client configurations - tokens are refreshed once and copied to the calling client."""
+        if is_token_usable(configuration.api_key.get("Authorization")):
+            return
+        with self.lock:
+            if not is_token_usable(self.configuration.api_key.get("Authorization")):
+                self.refresh_hook(self.configuration)
+                self.refreshes += 1
+            if configuration is not self.configuration:
+                configuration.api_key.update(self.configuration.api_key)
+
+
+def shared_pool_manager(threedi_api: ThreediApi, max_connections: int) -> Any:
+    """Return connection pool manager of the API client, resized to keep up to `max_connections` per host."""
+    rest_client = threedi_api._client.rest_client
+    pool_manager = rest_client.pool_manager
+    conditional_pool_manager = pool_manager if isinstance(pool_manager, ConditionalPoolManager) else None
+    if conditional_pool_manager is not None:
+        pool_manager = conditional_pool_manager.pool_manager
+    if (
+        type(pool_manager) is not urllib3.PoolManager
+        or pool_manager.connection_pool_kw.get("maxsize", 1) >= max_connections
+    ):
+        # Proxy managers are kept as they are
+        return rest_client.pool_manager
+    pool_kwargs = dict(pool_manager.connection_pool_kw, maxsize=max_connections)
+    resized_pool_manager = urllib3.PoolManager(num_pools=NUM_POOLS, **pool_kwargs)
+    pool_manager.clear()
+    if conditional_pool_manager is not None:
+        conditional_pool_manager.pool_manager = resized_pool_manager
+    else:
+        rest_client.pool_manager = resized_pool_manager
+    return rest_client.pool_manager
+
+
+class ApiClientPool:
+    """Bounded pool of the API clients sharing credentials and connection pool of the given API client.
+
+    The generated API client and its token refresh are not safe to use from many threads at once, so each call
+    checks out a client for its exclusive use and returns it afterwards, while connections, HTTP cache and tokens
+    are shared. Clients are created on demand, up to `max_clients`, and reused by any thread.
+    """
+
+    def __init__(self, threedi_api: ThreediApi, max_connections: int = MAX_CONNECTIONS, max_clients: int = MAX_CLIENTS):
+        self.threedi_api = threedi_api
+        self.credentials = SharedCredentials(threedi_api._client.configuration)
+        self.pool_manager = shared_pool_manager(threedi_api, max_connections)
+        self.max_clients = max_clients
+        self.idle_clients = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.clients_created = 0
+
+    @contextmanager
+    def checkout(self) -> Iterator[ThreediApi]:
+        """Check out an idle API client (creating it if the pool isn't full yet), returning it to the pool after use."""
+        try:
+            threedi_api = self.idle_clients.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                create = self.clients_created < self.max_clients
+                if create:
+                    self.clients_created += 1
+            if create:
+                try:
+                    threedi_api = self.create_client()
+                except Exception:
+                    with self.lock:
+                        self.clients_created -= 1
+                    raise
+            else:
+                threedi_api = self.idle_clients.get()
+        try:
+            yield threedi_api
+        finally:
+            self.idle_clients.put(threedi_api)
+
+    def create_client(self) -> ThreediApi:
+        """Create new API client using shared credentials and connection pool."""
+        source_configuration = self.threedi_api._client.configuration
+        threedi_api = ThreediApi(config=api_client_config(self.threedi_api), version=self.threedi_api.version)
+        configuration = threedi_api._client.configuration
+        configuration.retries = source_configuration.retries
+        if configuration.refresh_api_key_hook is not None:
+            configuration.api_key.update(source_configuration.api_key)
+            configuration.refresh_api_key_hook = self.credentials.refresh
+        rest_client = threedi_api._client.rest_client
+        rest_client.pool_manager.clear()
+        rest_client.pool_manager = self.pool_manager
+        with _client_pools_lock:
+            _pooled_clients[threedi_api] = self.threedi_api
+        logger.debug("Created pooled API client in thread %s", threading.current_thread().name)
+        return threedi_api
+
+    def method(self, name: str, api_method: Callable = None) -> Callable:
+        """Return function calling API method of the client checked out from the pool for the time of the call."""
+
+        def pooled_method(*args, **kwargs):
+            with self.checkout() as threedi_api:
+                return getattr(threedi_api, name)(*args, **kwargs)
+
+        if api_method is not None:
+            pooled_method.__name__ = name
+            pooled_method.__doc__ = api_method.__doc__
+        return pooled_method
+
+    def stats(self) -> Dict[str, Any]:
+        """Return client pool statistics."""
+        with self.lock:
+            clients_created = self.clients_created
+        return {
+            "clients_created": clients_created,
+            "idle_clients": self.idle_clients.qsize(),
+            "token_refreshes": self.credentials.refreshes,
+        }
+
+
+_client_pools = WeakKeyDictionary()
+_client_pools_lock = threading.Lock()
+_pooled_clients = WeakKeyDictionary()
+
+
+def source_api_client(threedi_api: ThreediApi) -> ThreediApi:
+    """Return API client the given (pooled) client was created from."""
+    with _client_pools_lock:
+        return _pooled_clients.get(threedi_api, threedi_api)
+
+
+def get_client_pool(threedi_api: ThreediApi) -> ApiClientPool:
+    """Return the client pool of the given API client, creating it on first use."""
+    threedi_api = source_api_client(threedi_api)
+    with _client_pools_lock:
+        try:
+            client_pool = _client_pools[threedi_api]
+        except KeyError:
+            client_pool = _client_pools[threedi_api] = ApiClientPool(threedi_api)
+        return client_pool
@@ -0,0 +1,68 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from dateutil.parser import isoparse
+from threedi_api_client import ThreediApi
+
+from ..utils import CACHE_PATH
+from .json_store import JsonStore, user_store_path
+
+DELTA_SYNC_PATH = os.path.join(CACHE_PATH, "delta_sync")
+
+
+def delta_store_path(threedi_api: ThreediApi, collection: str, params: Dict[str, Any], store_dir: str = None) -> str:
+    """Return local store path of the collection queried with given filters by the user of the API client.
+
+    Filters should be stable between the syncs, so parameters like the expiration date must not be included.
+    """
+    if store_dir is None:
+        store_dir = DELTA_SYNC_PATH
+    params_hash = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return user_store_path(threedi_api, store_dir, collection, params_hash)
+
+
+class DeltaStore(JsonStore):
+    """Local store of the API records synced incrementally, with the high-water mark of the newest record."""
+
+    description = "delta sync store"
+
+    def __init__(self, store_path: str, mark_field: str = "created"):
+        super().__init__(store_path)
+        self.mark_field = mark_field
+
+    def empty(self) -> Dict[str, Any]:
+        """Return content of the missing (or discarded) store."""
+        return {"high_water_mark": None, "records": {}}
+
+    def validate(self, data: Any) -> Dict[str, Any]:
+        """Check loaded store content, raising ValueError, KeyError or TypeError if it is corrupted."""
+        if not isinstance(data["records"], dict):
+            raise TypeError("records are not a mapping")
+        return {"high_water_mark": data["high_water_mark"], "records": data["records"]}
+
+    def merge(self, new_rows: Iterable[Dict[str, Any]], min_date: str = None) -> List[Dict[str, Any]]:
+        """Merge newly fetched rows into the store and return all the stored rows ordered by id.
+
+        Rows created on `min_date` or earlier are dropped from the store.
+        """
+        with self.lock:
+            store = self.load()
+            high_water_mark, records = store["high_water_mark"], store["records"]
+            for row in new_rows:
+                records[str(row["id"])] = row
+            if min_date is not None:
+                records = {pk: row for pk, row in records.items() if (row.get(self.mark_field) or "")[:10] > min_date}
+            marks = [row[self.mark_field] for row in records.values() if row.get(self.mark_field)]
+            if marks:
+                high_water_mark = max(marks, key=isoparse)
+            self.save({"high_water_mark": high_water_mark, "records": records})
+        return sorted(records.values(), key=lambda row: row["id"])
+
+    def high_water_mark(self) -> Optional[str]:
+        """Return the newest record mark."""
+        with self.lock:
+            return self.load()["high_water_mark"]
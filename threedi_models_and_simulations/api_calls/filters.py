@@ -0,0 +1,77 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import re
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, Tuple
+
+# Lookups evaluated on the client side - "ne" has no query parameter counterpart, so it is never pushed down
+LOOKUPS = {
+    "exact": lambda value, expected: value == expected,
+    "ne": lambda value, expected: value != expected,
+    "in": lambda value, expected: value in expected,
+    "gt": lambda value, expected: value is not None and value > expected,
+    "gte": lambda value, expected: value is not None and value >= expected,
+    "lt": lambda value, expected: value is not None and value < expected,
+    "lte": lambda value, expected: value is not None and value <= expected,
+    "isnull": lambda value, expected: (value is None) == bool(expected),
+    "contains": lambda value, expected: value is not None and expected in value,
+    "icontains": lambda value, expected: value is not None and expected.lower() in value.lower(),
+}
+# Typed query parameters - `async_req` option and the required path parameters are skipped
+PARAM_PATTERN = re.compile(r"^\s*:param (?!async_req\b)\S+ (\w+):(?! \(required\))", re.MULTILINE)
+_supported_params_cache = {}
+
+
+def supported_params(api_method: Callable) -> FrozenSet[str]:
+    """Return query parameters accepted by the generated API method (read from its docstring)."""
+    doc = getattr(api_method, "__doc__", None) or ""
+    try:
+        return _supported_params_cache[doc]
+    except KeyError:
+        params = _supported_params_cache[doc] = frozenset(PARAM_PATTERN.findall(doc))
+        return params
+
+
+def query_value(value: Any) -> Any:
+    """Convert filter value into the query parameter value."""
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return ",".join(str(item) for item in value)
+    return value
+
+
+def split_filters(api_method: Callable, filters: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Split filters into the ones pushed down to the API as query parameters and the ones applied locally."""
+    params = supported_params(api_method)
+    pushed_filters, local_filters = {}, {}
+    for lookup, value in filters.items():
+        if lookup in params:
+            pushed_filters[lookup] = query_value(value)
+        else:
+            local_filters[lookup] = value
+    return pushed_filters, local_filters
+
+
+def parse_lookup(lookup: str) -> Tuple[str, Callable]:
+    """Split `field__lookup` into the field name and the lookup function."""
+    field_name, _, lookup_name = lookup.rpartition("__")
+    if field_name and lookup_name in LOOKUPS:
+        return field_name, LOOKUPS[lookup_name]
+    return lookup, LOOKUPS["exact"]
+
+
+def matches(item: Any, filters: Dict[str, Any]) -> bool:
+    """Check if item (API model, record or dict) fulfils all filters."""
+    for lookup, expected in filters.items():
+        field_name, lookup_function = parse_lookup(lookup)
+        value = item.get(field_name) if isinstance(item, dict) else getattr(item, field_name, None)
+        if not lookup_function(value, expected):
+            return False
+    return True
+
+
+def filter_items(items: Iterable[Any], filters: Dict[str, Any]) -> Iterator[Any]:
+    """Lazily filter items on the client side."""
+    if not filters:
+        return iter(items)
+    return (item for item in items if matches(item, filters))
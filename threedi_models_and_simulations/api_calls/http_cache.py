@@ -0,0 +1,287 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import base64
+import binascii
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+from urllib.parse import urlencode, urlparse
+
+import urllib3
+from threedi_api_client import ThreediApi
+
+from ..utils import CACHE_PATH
+from .metrics import get_api_metrics
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_PATH = os.path.join(CACHE_PATH, "http_cache")
+HTTP_CACHE_MAX_SIZE = 50 * 1024**2
+
+
+class CachedResponse(NamedTuple):
+    """Stored API response together with its validators."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    body: bytes
+
+
+class HttpCache:
+    """Persistent, size capped store of the API GET responses and their ETag/Last-Modified validators."""
+
+    def __init__(self, db_path: str, max_size: int = HTTP_CACHE_MAX_SIZE):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.connection = None
+        self.total_size = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the cache database on first use."""
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            self.connection.commit()
+            self.total_size = self.stored_size(self.connection)
+        return self.connection
+
+    @staticmethod
+    def stored_size(connection: sqlite3.Connection) -> int:
+        """Return total size of the responses stored in the database."""
+        return connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Get stored response for the given key."""
+        with self.lock:
+            row = (
+                self.connect()
+                .execute("SELECT etag, last_modified, headers, body FROM responses WHERE key = ?", (key,))
+                .fetchone()
+            )
+        if row is None:
+            return None
+        etag, last_modified, headers, body = row
+        return CachedResponse(etag, last_modified, json.loads(headers), body)
+
+    def set(self, key: str, response: CachedResponse):
+        """Store response under the given key, evicting the least recently used responses above the size cap."""
+        size = len(response.body)
+        if size > self.max_size:
+            return
+        with self.lock:
+            connection = self.connect()
+            replaced = connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.etag,
+                    response.last_modified,
+                    json.dumps(response.headers),
+                    response.body,
+                    size,
+                    time.time(),
+                ),
+            )
+            self.total_size += size - (replaced[0] if replaced else 0)
+            if self.total_size > self.max_size:
+                self.evict(connection)
+            connection.commit()
+
+    def touch(self, key: str):
+        """Mark response as recently used."""
+        with self.lock:
+            connection = self.connect()
+            connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            connection.commit()
+
+    def evict(self, connection: sqlite3.Connection):
+        """Remove the least recently used responses until the total size fits into the size cap."""
+        # Recounted, as other processes may share the database
+        total_size = self.stored_size(connection)
+        if total_size <= self.max_size:
+            self.total_size = total_size
+            return
+        stale_keys = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if total_size <= self.max_size:
+                break
+            stale_keys.append((key,))
+            total_size -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+        self.total_size = total_size
+
+    def size(self) -> int:
+        """Return total size of the stored responses."""
+        with self.lock:
+            return self.stored_size(self.connect())
+
+    def clear(self):
+        """Remove all stored responses."""
+        with self.lock:
+            connection = self.connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+            self.total_size = 0
+
+    def close(self):
+        """Close the cache database."""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+class ConditionalPoolManager:
+    """Pool manager wrapper revalidating stored GET responses with the conditional requests."""
+
+    def __init__(self, pool_manager: urllib3.PoolManager, http_cache: HttpCache):
+        self.pool_manager = pool_manager
+        self.http_cache = http_cache
+        self.revalidated = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.pool_manager, name)
+
+    def request(self, method: str, url: str, fields=None, headers=None, preload_content=True, **kwargs):
+        """Make a request, serving unchanged GET responses from the cache."""
+        if method != "GET" or not preload_content:
+            response = self.pool_manager.request(
+                method, url, fields=fields, headers=headers, preload_content=preload_content, **kwargs
+            )
+            if preload_content:
+                get_api_metrics().record_response_size(len(response.data or b""))
+            return response
+        key = f"{url}?{urlencode(sorted(fields or []))}"
+        try:
+            cached_response = self.http_cache.get(key)
+        except sqlite3.Error as e:
+            logger.warning("HTTP cache lookup failed: %s", e)
+            cached_response = None
+        request_headers = dict(headers or {})
+        if cached_response is not None:
+            if cached_response.etag:
+                request_headers["If-None-Match"] = cached_response.etag
+            if cached_response.last_modified:
+                request_headers["If-Modified-Since"] = cached_response.last_modified
+        response = self.pool_manager.request(
+            method, url, fields=fields, headers=request_headers, preload_content=True, **kwargs
+        )
+        get_api_metrics().record_response_size(len(response.data or b""))
+        try:
+            if response.status == 304 and cached_response is not None:
+                self.http_cache.touch(key)
+                self.revalidated += 1
+                return urllib3.HTTPResponse(
+                    body=io.BytesIO(cached_response.body),
+                    headers=cached_response.headers,
+                    status=200,
+                    reason="OK",
+                    preload_content=True,
+                    decode_content=False,
+                )
+            if response.status == 200 and self.is_storable(response):
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                response_headers = {k: v for k, v in response.headers.items() if k.lower() != "set-cookie"}
+                self.http_cache.set(key, CachedResponse(etag, last_modified, response_headers, response.data))
+        except sqlite3.Error as e:
+            logger.warning("HTTP cache update failed: %s", e)
+        return response
+
+    @staticmethod
+    def is_storable(response: urllib3.HTTPResponse) -> bool:
+        """Check if response has validators and may be stored."""
+        cache_control = response.headers.get("Cache-Control", "")
+        if re.search(r"\bno-store\b", cache_control, re.IGNORECASE):
+            return False
+        return bool(response.headers.get("ETag") or response.headers.get("Last-Modified"))
+
+
+def token_user_identity(token: Optional[str]) -> Optional[str]:
+    """Return the user identity claim of the JWT access or refresh token (None if it can't be read)."""
+    if not token:
+        return None
+    try:
+        payload = token.split()[-1].split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError, binascii.Error):
+        return None
+    if not isinstance(claims, dict):
+        return None
+    for claim in ("sub", "user_id", "username"):
+        if claims.get(claim):
+            return f"{claim}:{claims[claim]}"
+    return None
+
+
+def api_host_key(threedi_api: ThreediApi) -> str:
+    """Return key identifying the API host of the given API client, safe to use in the file names."""
+    configuration = threedi_api._client.configuration
+    return re.sub(r"[^\w.-]", "_", urlparse(configuration.host).netloc or configuration.host)
+
+
+def api_user_key(threedi_api: ThreediApi) -> Optional[str]:
+    """Return key identifying the user and API host of the given API client, safe to use in the file names.
+
+    Returns None if the client has no stable user identity.
+    """
+    configuration = threedi_api._client.configuration
+    host = api_host_key(threedi_api)
+    if configuration.username and configuration.username != "__key__":
+        user_identity = configuration.username
+    elif configuration.password:
+        user_identity = configuration.password
+    else:
+        # Tokens change on each login, but the user they were issued to doesn't
+        user_identity = token_user_identity(configuration.api_key.get("refresh")) or token_user_identity(
+            configuration.api_key.get("Authorization")
+        )
+        if user_identity is None:
+            return None
+    user_hash = hashlib.sha256(f"{host}|{user_identity}".encode()).hexdigest()[:16]
+    return f"{host}_{user_hash}"
+
+
+def http_cache_path(threedi_api: ThreediApi, cache_dir: str = None) -> Optional[str]:
+    """Return the cache database path of the user and API host of the given API client (None if user is unknown)."""
+    user_key = api_user_key(threedi_api)
+    if user_key is None:
+        return None
+    if cache_dir is None:
+        cache_dir = HTTP_CACHE_PATH
+    return os.path.join(cache_dir, f"{user_key}.sqlite")
+
+
+def install_http_cache(
+    threedi_api: ThreediApi, cache_dir: str = None, max_size: int = HTTP_CACHE_MAX_SIZE
+) -> Optional[HttpCache]:
+    """Add persistent conditional GET cache to the given API client (skipped if the user can't be identified)."""
+    rest_client = threedi_api._client.rest_client
+    if isinstance(rest_client.pool_manager, ConditionalPoolManager):
+        return rest_client.pool_manager.http_cache
+    db_path = http_cache_path(threedi_api, cache_dir)
+    if db_path is None:
+        logger.debug("User of the API client can't be identified, persistent HTTP cache is not used")
+        return None
+    http_cache = HttpCache(db_path, max_size)
+    rest_client.pool_manager = ConditionalPoolManager(rest_client.pool_manager, http_cache)
+    return http_cache
@@ -0,0 +1,74 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict
+
+from threedi_api_client import ThreediApi
+
+from .http_cache import api_host_key, api_user_key
+
+logger = logging.getLogger(__name__)
+
+_store_locks = {}
+_store_locks_lock = threading.Lock()
+
+
+def user_store_path(threedi_api: ThreediApi, store_dir: str, *name_parts: str) -> str:
+    """Return path of the JSON store of the user and API host of the given API client."""
+    user_key = api_user_key(threedi_api) or f"{api_host_key(threedi_api)}_unidentified"
+    file_name = "_".join((user_key,) + name_parts)
+    return os.path.join(store_dir, f"{file_name}.json")
+
+
+class JsonStore:
+    """Local JSON file store, replaced atomically on save.
+
+    Stores of the same path share the lock, so the read-modify-write cycles of the concurrent threads don't interleave.
+    """
+
+    description = "JSON store"
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        with _store_locks_lock:
+            self.lock = _store_locks.setdefault(store_path, threading.Lock())
+
+    def empty(self) -> Dict[str, Any]:
+        """Return content of the missing (or discarded) store."""
+        return {}
+
+    def validate(self, data: Any) -> Dict[str, Any]:
+        """Check loaded store content, raising ValueError, KeyError or TypeError if it is corrupted."""
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.description} is not a mapping")
+        return data
+
+    def load(self) -> Dict[str, Any]:
+        """Load store content."""
+        try:
+            with open(self.store_path) as store_file:
+                return self.validate(json.load(store_file))
+        except FileNotFoundError:
+            return self.empty()
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Discarding corrupted %s %s: %s", self.description, self.store_path, e)
+            return self.empty()
+
+    def save(self, data: Dict[str, Any]):
+        """Save store content, replacing the store file atomically."""
+        os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+        temp_path = f"{self.store_path}.tmp"
+        with open(temp_path, "w") as store_file:
+            json.dump(data, store_file)
+        os.replace(temp_path, self.store_path)
+
+    def clear(self):
+        """Remove the store file."""
+        with self.lock:
+            try:
+                os.remove(self.store_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,208 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import csv
+import io
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+LATENCY_SAMPLES = 1000
+# Path of the JSON (or CSV) file the plugin writes collected metrics to - metrics are collected only if it is set
+METRICS_EXPORT_ENV_VAR = "THREEDI_API_METRICS_EXPORT"
+CSV_COLUMNS = [
+    "name",
+    "calls",
+    "errors",
+    "retries",
+    "throttled_time",
+    "latency_mean",
+    "latency_p50",
+    "latency_p95",
+    "latency_p99",
+    "bytes",
+]
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Return nearest-rank percentile of the sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class MethodMetrics:
+    """Metrics of the single API method."""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled_time = 0.0
+        self.response_bytes = 0
+        self.total_latency = 0.0
+        self.latencies = deque(maxlen=samples)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return metrics summary with the latency percentiles (in seconds)."""
+        latencies = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttled_time": self.throttled_time,
+            "latency_mean": self.total_latency / self.calls if self.calls else 0.0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "latency_p99": percentile(latencies, 99),
+            "bytes": self.response_bytes,
+        }
+
+
+class TransferMetrics:
+    """Metrics of the file uploads or downloads."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Return metrics summary."""
+        return {"calls": self.calls, "errors": self.errors, "bytes": self.bytes}
+
+
+class ApiMetrics:
+    """Per-method API calls metrics and file transfers metrics, collected only when enabled."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.methods = {}
+        self.transfers = {"upload": TransferMetrics(), "download": TransferMetrics()}
+
+    def enable(self):
+        """Start collecting metrics."""
+        self.enabled = True
+
+    def disable(self):
+        """Stop collecting metrics."""
+        self.enabled = False
+
+    def reset(self):
+        """Remove collected metrics."""
+        with self.lock:
+            self.methods.clear()
+            self.transfers = {"upload": TransferMetrics(), "download": TransferMetrics()}
+
+    def method_metrics(self, method_name: str) -> MethodMetrics:
+        """Return metrics of the given method, creating them if needed. Must be called with lock held."""
+        try:
+            return self.methods[method_name]
+        except KeyError:
+            metrics = self.methods[method_name] = MethodMetrics()
+            return metrics
+
+    @contextmanager
+    def measure(self, method_name: str):
+        """Measure the API request made within the context (each retry is measured as a separate request)."""
+        self.local.method_name = method_name
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            self.local.method_name = None
+            with self.lock:
+                metrics = self.method_metrics(method_name)
+                metrics.calls += 1
+                metrics.errors += failed
+                metrics.total_latency += latency
+                metrics.latencies.append(latency)
+
+    def record_retry(self, method_name: str):
+        """Count retry of the API call."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.method_metrics(method_name).retries += 1
+
+    def record_throttle(self, method_name: str, wait_time: float):
+        """Add time the API call waited for the rate limiter budget or before the retry."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.method_metrics(method_name).throttled_time += wait_time
+
+    def record_response_size(self, size: int):
+        """Add size of the API response received while measuring the API call in the current thread."""
+        if not self.enabled:
+            return
+        method_name = getattr(self.local, "method_name", None)
+        if method_name is None:
+            return
+        with self.lock:
+            self.method_metrics(method_name).response_bytes += size
+
+    def record_transfer(self, direction: str, size: int, failed: bool = False):
+        """Count file upload or download of the given size."""
+        if not self.enabled:
+            return
+        with self.lock:
+            metrics = self.transfers[direction]
+            metrics.calls += 1
+            metrics.errors += failed
+            metrics.bytes += size
+
+    def summary(self) -> Dict[str, Any]:
+        """Return summary of the collected metrics."""
+        with self.lock:
+            return {
+                "methods": {name: metrics.summary() for name, metrics in sorted(self.methods.items())},
+                "transfers": {direction: metrics.summary() for direction, metrics in self.transfers.items()},
+            }
+
+    def to_json(self, indent: int = 2) -> str:
+        """Export collected metrics as JSON."""
+        return json.dumps(self.summary(), indent=indent)
+
+    def to_csv(self) -> str:
+        """Export collected metrics as CSV, with the transfers listed after API methods."""
+        summary = self.summary()
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=CSV_COLUMNS, restval="", lineterminator="\n")
+        writer.writeheader()
+        for name, method_summary in summary["methods"].items():
+            writer.writerow({"name": name, **method_summary})
+        for direction, transfer_summary in summary["transfers"].items():
+            writer.writerow({"name": direction, **transfer_summary})
+        return output.getvalue()
+
+    def export(self, file_path: str):
+        """Write collected metrics to the JSON or CSV file, depending on the file extension."""
+        content = self.to_csv() if file_path.lower().endswith(".csv") else self.to_json()
+        with open(file_path, "w", newline="") as metrics_file:
+            metrics_file.write(content)
+
+
+_api_metrics = ApiMetrics()
+
+
+def get_api_metrics() -> ApiMetrics:
+    """Return the process-wide API metrics."""
+    return _api_metrics
+
+
+def metrics_export_path() -> Optional[str]:
+    """Return path of the metrics export file set in the environment, None if metrics are not requested."""
+    return os.environ.get(METRICS_EXPORT_ENV_VAR) or None
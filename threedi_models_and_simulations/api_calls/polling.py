@@ -0,0 +1,104 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import logging
+import random
+import time
+from typing import Callable, Iterator, NamedTuple, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PollTimings(NamedTuple):
+    """Delays (in seconds) between the consecutive polls of the resource."""
+
+    initial_delay: float
+    max_delay: float
+    multiplier: float = 1.5
+    jitter: float = 0.2
+
+
+# Default timings per polled resource, tuned to how long the server usually takes to process it
+POLL_TIMINGS = {
+    "default": PollTimings(1.0, 10.0),
+    "event_file": PollTimings(0.5, 5.0),
+    "initial_waterlevel": PollTimings(0.5, 5.0),
+    "initial_concentration": PollTimings(1.0, 10.0),
+    "raster_task": PollTimings(1.0, 15.0),
+    "revision_files": PollTimings(2.0, 20.0),
+    "revision_validation": PollTimings(0.5, 5.0),
+    "revision_task": PollTimings(1.0, 10.0),
+    "model_task": PollTimings(2.0, 15.0),
+}
+
+
+class PollTimeoutError(Exception):
+    """Polling deadline exceeded exception class."""
+
+    pass
+
+
+class Poller:
+    """Adaptive polling schedule - the first poll is made immediately, the next ones after exponentially growing,
+    jittered delays, until the deadline is reached.
+    """
+
+    def __init__(
+        self,
+        resource: str = "default",
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        timings: PollTimings = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.resource = resource
+        self.timings = timings or POLL_TIMINGS.get(resource, POLL_TIMINGS["default"])
+        self.sleep = sleep
+        self.clock = clock
+        if timeout is not None:
+            timeout_deadline = clock() + timeout
+            deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+        self.deadline = deadline
+        self.polls = 0
+
+    def delays(self) -> Iterator[float]:
+        """Generate delays between the polls."""
+        delay = self.timings.initial_delay
+        jitter = self.timings.jitter
+        while True:
+            yield delay * random.uniform(1 - jitter, 1 + jitter)
+            delay = min(delay * self.timings.multiplier, self.timings.max_delay)
+
+    def remaining(self) -> Optional[float]:
+        """Return time left until the deadline."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - self.clock(), 0.0)
+
+    def __iter__(self) -> Iterator[int]:
+        """Yield consecutive poll numbers, waiting between them. Stops (without error) at the deadline."""
+        self.polls = 1
+        yield self.polls
+        for delay in self.delays():
+            remaining = self.remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    logger.debug("Polling of %s stopped at the deadline after %d polls", self.resource, self.polls)
+                    return
+                delay = min(delay, remaining)
+            self.sleep(delay)
+            self.polls += 1
+            yield self.polls
+
+    def poll(self, check: Callable[[], Optional[T]], timeout_message: str = None) -> T:
+        """Call `check` until it returns anything else than None and return that value.
+
+        Raises PollTimeoutError if the deadline is reached first.
+        """
+        for _ in self:
+            result = check()
+            if result is not None:
+                return result
+        raise PollTimeoutError(timeout_message or f"Timed out while waiting for the {self.resource}")
@@ -0,0 +1,193 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from threedi_api_client.openapi import ApiException
+
+from .metrics import get_api_metrics
+
+logger = logging.getLogger(__name__)
+
+# Budgets per endpoint class as (requests per second, burst size)
+ENDPOINT_CLASS_BUDGETS = {
+    "read": (20.0, 40),
+    "write": (5.0, 10),
+    "upload": (2.0, 4),
+}
+RETRY_STATUSES = (429, 503)
+# Statuses meaning that the request was rejected before it was processed, so even non-idempotent requests are retried
+REJECTED_STATUSES = (429,)
+IDEMPOTENT_ACTION_SUFFIXES = ("_list", "_read", "_overview", "_download", "_delete")
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60.0
+# Methods where the retryable statuses carry a meaning handled by the caller,
+# e.g. 429 on the simulation "start" action means that there are no free sessions and simulation should be queued
+NO_RETRY_METHODS = ("simulations_actions_create",)
+
+
+def endpoint_class(method_name: str) -> str:
+    """Return the budget class of the API method."""
+    if method_name.endswith(("_list", "_read", "_overview", "_download")):
+        return "read"
+    if method_name.endswith("_upload"):
+        return "upload"
+    return "write"
+
+
+def is_idempotent(method_name: str) -> bool:
+    """Check if API method sends an idempotent request (GET, PUT or DELETE), safe to repeat after it was processed."""
+    if method_name.endswith(IDEMPOTENT_ACTION_SUFFIXES):
+        return True
+    # PATCH requests (`*_partial_update`) are not idempotent
+    return method_name.endswith("_update") and not method_name.endswith("_partial_update")
+
+
+def is_retryable(method_name: str, status: int) -> bool:
+    """Check if API method failed with the given status may be retried.
+
+    Non-idempotent requests (e.g. POST of `*_create` methods) are retried only when they were rejected before they
+    were processed, as the 503 can come from a proxy after the server has already created the resource.
+    """
+    if status not in RETRY_STATUSES or method_name in NO_RETRY_METHODS:
+        return False
+    return status in REJECTED_STATUSES or is_idempotent(method_name)
+
+
+def retry_after_delay(error: ApiException) -> Optional[float]:
+    """Return delay (in seconds) requested by the server with the Retry-After header."""
+    headers = error.headers or {}
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at the constant rate."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def refill(self, now: float):
+        """Add tokens accumulated since the last update."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> float:
+        """Take a token, waiting until it is available. Returns time spent on waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def block(self, delay: float):
+        """Stop handing out tokens for the given time, e.g. after the server asked to slow down."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.tokens = 0.0
+
+
+class RateLimiter:
+    """Client-side rate limiter with the per-endpoint-class budgets and retries with the exponential backoff."""
+
+    def __init__(
+        self,
+        budgets: Dict[str, Tuple[float, int]] = None,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+    ):
+        budgets = ENDPOINT_CLASS_BUDGETS if budgets is None else budgets
+        self.buckets = {name: TokenBucket(rate, capacity) for name, (rate, capacity) in budgets.items()}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.Lock()
+        self.retries = 0
+        self.throttled_time = 0.0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Return exponential backoff delay with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def call(self, method_name: str, api_method: Callable, *args, **kwargs) -> Any:
+        """Call API method within its endpoint class budget, retrying when the server is overloaded."""
+        bucket = self.buckets.get(endpoint_class(method_name))
+        attempt = 0
+        while True:
+            if bucket is not None:
+                waited = bucket.acquire()
+                if waited:
+                    with self.lock:
+                        self.throttled_time += waited
+                    get_api_metrics().record_throttle(method_name, waited)
+            try:
+                return api_method(*args, **kwargs)
+            except ApiException as e:
+                if not is_retryable(method_name, e.status) or attempt >= self.max_retries:
+                    raise
+                retry_after = retry_after_delay(e)
+                delay = min(retry_after, self.backoff_max) if retry_after is not None else self.backoff_delay(attempt)
+                if bucket is not None and e.status == 429:
+                    # Slow down all the threads using the same budget, not only the one that hit the limit
+                    bucket.block(delay)
+                attempt += 1
+                with self.lock:
+                    self.retries += 1
+                get_api_metrics().record_retry(method_name)
+                get_api_metrics().record_throttle(method_name, delay)
+                logger.debug("%s got HTTP %s, retry %d in %.2f s", method_name, e.status, attempt, delay)
+                time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return rate limiter statistics."""
+        with self.lock:
+            return {"retries": self.retries, "throttled_time": self.throttled_time}
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
+
+
+def configure_rate_limiter(**rate_limiter_settings) -> RateLimiter:
+    """Replace the process-wide rate limiter with the one using given settings."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = RateLimiter(**rate_limiter_settings)
+        return _rate_limiter
@@ -0,0 +1,49 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import json
+from collections import namedtuple
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, Type
+
+RawPage = namedtuple("RawPage", ["results", "count"])
+
+
+@lru_cache(maxsize=None)
+def api_record_class(fields: Tuple[str, ...]) -> Type[tuple]:
+    """Return lightweight record class (namedtuple with empty `__slots__`) with the given fields."""
+    return namedtuple("ApiRecord", fields, rename=True)
+
+
+def records_from_json(rows: Iterable[Dict[str, Any]], fields: Sequence[str] = None) -> List[tuple]:
+    """Build records out of the decoded JSON rows, keeping only requested fields (all fields if not specified)."""
+    records = []
+    if fields:
+        fields = tuple(fields)
+        record_class = api_record_class(fields)
+        for row in rows:
+            records.append(record_class(*[row.get(field) for field in fields]))
+    else:
+        for row in rows:
+            record_class = api_record_class(tuple(row))
+            records.append(record_class(*row.values()))
+    return records
+
+
+def raw_list_method(api_method: Callable, fields: Sequence[str] = None) -> Callable:
+    """Wrap list API method to return page of records decoded straight from the response JSON.
+
+    Values are kept as they are in the JSON, e.g. datetimes are ISO 8601 strings and nested objects are dicts.
+    """
+
+    @wraps(api_method)
+    def wrapper(*args, **kwargs) -> RawPage:
+        response = api_method(*args, _preload_content=False, **kwargs)
+        try:
+            data = json.loads(response.data)
+        finally:
+            response.release_conn()
+        if isinstance(data, list):
+            return RawPage(records_from_json(data, fields), len(data))
+        return RawPage(records_from_json(data["results"], fields), data["count"])
+
+    return wrapper
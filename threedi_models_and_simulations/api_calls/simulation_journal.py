@@ -0,0 +1,146 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import hashlib
+import json
+import logging
+import os
+from dataclasses import fields, is_dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from threedi_api_client import ThreediApi
+
+from ..utils import CACHE_PATH
+from .json_store import JsonStore, user_store_path
+
+logger = logging.getLogger(__name__)
+
+SIMULATION_JOURNAL_PATH = os.path.join(CACHE_PATH, "simulation_journal")
+# Simulation attributes filled in by the simulation runner, not part of the simulation definition
+RUNTIME_ATTRIBUTES = ("simulation", "initial_status")
+
+
+def simulation_journal_path(threedi_api: ThreediApi, journal_dir: str = None) -> str:
+    """Return simulation journal path of the user and API host of the given API client."""
+    if journal_dir is None:
+        journal_dir = SIMULATION_JOURNAL_PATH
+    return user_store_path(threedi_api, journal_dir)
+
+
+def _definition_value(value: Any) -> Any:
+    """Convert the non JSON serializable value of the simulation definition."""
+    if is_dataclass(value):
+        return {field.name: getattr(value, field.name) for field in fields(value)}
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+def simulation_fingerprint(simulation: Any) -> Optional[str]:
+    """Return checksum of the simulation definition (the NewSimulation data model), if it can be serialized.
+
+    The whole definition is covered, including the simulation name, start and end datetime, as these are set on the
+    simulation when it is created. A renamed or shifted simulation is therefore set up from scratch, not resumed.
+    It has to be taken before the simulation setup, as setup steps replace substance names with the IDs in place.
+    """
+    definition = {field.name: getattr(simulation, field.name) for field in fields(simulation)}
+    for attribute in RUNTIME_ATTRIBUTES:
+        definition.pop(attribute, None)
+    try:
+        serialized = json.dumps(definition, sort_keys=True, default=_definition_value)
+    except (TypeError, ValueError) as e:
+        logger.warning("Simulation '%s' can't be journaled: %s", getattr(simulation, "name", ""), e)
+        return None
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def batch_fingerprints(simulations: Iterable[Any]) -> List[Optional[str]]:
+    """Return fingerprints of the batch simulations, numbering the repeated identical definitions."""
+    fingerprints, occurrences = [], {}
+    for simulation in simulations:
+        fingerprint = simulation_fingerprint(simulation)
+        if fingerprint is not None:
+            occurrence = occurrences[fingerprint] = occurrences.get(fingerprint, 0) + 1
+            if occurrence > 1:
+                fingerprint = f"{fingerprint}-{occurrence}"
+        fingerprints.append(fingerprint)
+    return fingerprints
+
+
+class SimulationJournal(JsonStore):
+    """Local journal of the simulations being set up - the created simulation ID, the started and completed setup
+    steps (with their results), by the simulation definition checksum. Simulations are removed once fully set up.
+    """
+
+    description = "simulation journal"
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the journaled simulation entry."""
+        with self.lock:
+            return self.load().get(fingerprint)
+
+    def start(self, fingerprint: str, name: str, simulation_id: int):
+        """Start journaling of the created simulation."""
+        with self.lock:
+            entries = self.load()
+            entries[fingerprint] = {
+                "name": name,
+                "simulation_id": simulation_id,
+                "started_steps": [],
+                "steps": {},
+                "failed_step": None,
+                "updated": datetime.now(timezone.utc).isoformat(),
+            }
+            self.save(entries)
+
+    def begin_step(self, fingerprint: str, step_name: str):
+        """Record the started setup step."""
+        with self.lock:
+            entries = self.load()
+            entry = entries.get(fingerprint)
+            if entry is None:
+                return
+            entry.setdefault("started_steps", []).append(step_name)
+            entry["updated"] = datetime.now(timezone.utc).isoformat()
+            self.save(entries)
+
+    def complete_step(self, fingerprint: str, step_name: str, result: Any = None):
+        """Record the completed setup step with its (JSON serializable) result."""
+        with self.lock:
+            entries = self.load()
+            entry = entries.get(fingerprint)
+            if entry is None:
+                return
+            entry["steps"][step_name] = result
+            entry["updated"] = datetime.now(timezone.utc).isoformat()
+            self.save(entries)
+
+    def fail_step(self, fingerprint: str, step_name: str):
+        """Record the failed setup step."""
+        with self.lock:
+            entries = self.load()
+            entry = entries.get(fingerprint)
+            if entry is None:
+                return
+            entry["failed_step"] = step_name
+            entry["updated"] = datetime.now(timezone.utc).isoformat()
+            self.save(entries)
+
+    @staticmethod
+    def partial_steps(entry: Dict[str, Any]) -> List[str]:
+        """Return setup steps of the journaled simulation that were started (or failed), but not completed.
+        These may have created some of their events already.
+        """
+        started_steps = entry.get("started_steps", []) + [entry["failed_step"]]
+        return sorted({step_name for step_name in started_steps if step_name and step_name not in entry["steps"]})
+
+    def remove(self, fingerprint: str):
+        """Remove the simulation entry (e.g. fully set up or not resumable anymore)."""
+        with self.lock:
+            entries = self.load()
+            if entries.pop(fingerprint, None) is not None:
+                self.save(entries)
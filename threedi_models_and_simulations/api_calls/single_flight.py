@@ -0,0 +1,90 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import copy
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable
+from weakref import WeakKeyDictionary
+
+from threedi_api_client import ThreediApi
+
+
+class InFlightCall:
+    """Call shared by all concurrent callers requesting the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalescing of the identical concurrent calls into a single execution.
+
+    Waiting callers get their own copies of the result, so they can't affect each other by modifying it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.method_coalesced = defaultdict(int)
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs) -> Any:
+        """Execute function, or wait for the result of the identical call already in progress."""
+        with self.lock:
+            call = self.in_flight.get(key)
+            if call is None:
+                call = self.in_flight[key] = InFlightCall()
+                self.executions += 1
+                is_leader = True
+            else:
+                self.coalesced += 1
+                self.method_coalesced[key[0]] += 1
+                is_leader = False
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+        try:
+            call.result = function(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.done.set()
+        return call.result
+
+    def reset_counters(self):
+        """Reset execution and coalescing counters."""
+        with self.lock:
+            self.executions = self.coalesced = 0
+            self.method_coalesced.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing statistics."""
+        with self.lock:
+            return {
+                "in_flight": len(self.in_flight),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "methods": dict(self.method_coalesced),
+            }
+
+
+_single_flights = WeakKeyDictionary()
+_single_flights_lock = threading.Lock()
+
+
+def get_single_flight(threedi_api: ThreediApi) -> SingleFlight:
+    """Return the single-flight group shared by all users of the given API client, creating it on first use."""
+    with _single_flights_lock:
+        try:
+            single_flight = _single_flights[threedi_api]
+        except KeyError:
+            single_flight = _single_flights[threedi_api] = SingleFlight()
+        return single_flight
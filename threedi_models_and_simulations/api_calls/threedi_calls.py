@@ -1,12 +1,14 @@
 # 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
 # Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
 
 from threedi_api_client import ThreediApi
 from threedi_api_client.openapi import (
     Action,
+    ApiTypeError,
     AggregationSettings,
     ArrivalTimePostProcessing,
     BasicPostProcessing,
@@ -87,10 +89,28 @@ from threedi_api_client.openapi import (
     WindDragCoefficient,
 )
 
+from .api_cache import CachedThreediApi, get_api_cache
+from .client_pool import get_client_pool
+from .delta_sync import DeltaStore, delta_store_path
+from .filters import filter_items, matches, split_filters
+from .http_cache import install_http_cache
+from .metrics import ApiMetrics, get_api_metrics
+from .rate_limiter import get_rate_limiter
+from .records import raw_list_method, records_from_json
+from .single_flight import get_single_flight
+from .transports import DEFAULT_TRANSPORT, install_transport
+
 logger = logging.getLogger(__name__)
 
 
-def get_api_client(api_username: str, api_password: str, api_host: str, version: str = "v3-beta") -> ThreediApi:
+def get_api_client(
+    api_username: str,
+    api_password: str,
+    api_host: str,
+    version: str = "v3-beta",
+    transport: str = DEFAULT_TRANSPORT,
+    http_cache_dir: str = None,
+) -> ThreediApi:
     """Setup 3Di API Client using username and password."""
     config = {
         "THREEDI_API_HOST": api_host,
@@ -98,11 +118,18 @@ def get_api_client(api_username: str, api_password: str, api_host: str, version:
         "THREEDI_API_PASSWORD": api_password,
     }
     api_client = ThreediApi(config=config, version=version)
+    install_transport(api_client, transport)
+    install_http_cache(api_client, http_cache_dir)
     return api_client
 
 
 def get_api_client_with_tokens(
-    api_host: str, api_access_token: str, api_refresh_token: str, version: str = "v3-beta"
+    api_host: str,
+    api_access_token: str,
+    api_refresh_token: str,
+    version: str = "v3-beta",
+    transport: str = DEFAULT_TRANSPORT,
+    http_cache_dir: str = None,
 ) -> ThreediApi:
     """Setup 3Di API Client using access and refresh tokens."""
     config = {
@@ -111,11 +138,17 @@ def get_api_client_with_tokens(
         "THREEDI_API_REFRESH_TOKEN": api_refresh_token,
     }
     api_client = ThreediApi(config=config, version=version)
+    install_transport(api_client, transport)
+    install_http_cache(api_client, http_cache_dir)
     return api_client
 
 
 def get_api_client_with_personal_api_token(
-    personal_api_token: str, api_host: str, version: str = "v3-beta"
+    personal_api_token: str,
+    api_host: str,
+    version: str = "v3-beta",
+    transport: str = DEFAULT_TRANSPORT,
+    http_cache_dir: str = None,
 ) -> ThreediApi:
     """Setup 3Di API Client using Personal API Token."""
     config = {
@@ -124,6 +157,8 @@ def get_api_client_with_personal_api_token(
         "THREEDI_API_PERSONAL_API_TOKEN": personal_api_token,
     }
     api_client = ThreediApi(config=config, version=version)
+    install_transport(api_client, transport)
+    install_http_cache(api_client, http_cache_dir)
     return api_client
 
 
@@ -131,10 +166,51 @@ class ThreediCalls:
     """Class with methods used for the communication with the 3Di API."""
 
     FETCH_LIMIT = 250
+    MAX_FETCH_LIMIT = 1000
+    FETCH_WORKERS = 4
+    STATUSES_BATCH_SIZE = 100
     EXPIRATION_TIME = datetime.now(timezone.utc) - timedelta(days=7)
 
-    def __init__(self, threedi_api: ThreediApi) -> None:
-        self.threedi_api = threedi_api
+    def __init__(self, threedi_api: ThreediApi, cached: bool = False) -> None:
+        if isinstance(threedi_api, CachedThreediApi):
+            threedi_api = threedi_api.threedi_api
+        client_pool = get_client_pool(threedi_api)
+        threedi_api = client_pool.threedi_api
+        # Write calls always invalidate cached responses, even if this instance is not reading from the cache
+        self.threedi_api = CachedThreediApi(
+            threedi_api,
+            get_api_cache(threedi_api),
+            get_single_flight(threedi_api),
+            get_rate_limiter(),
+            get_api_metrics(),
+            cache_reads=cached,
+            client_pool=client_pool,
+        )
+
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return statistics of the API responses cache."""
+        return self.threedi_api.cache.stats()
+
+    @property
+    def single_flight_stats(self) -> Dict[str, Any]:
+        """Return statistics of the coalesced API requests."""
+        return self.threedi_api.single_flight.stats()
+
+    @property
+    def metrics(self) -> ApiMetrics:
+        """Return API calls and file transfers metrics."""
+        return self.threedi_api.metrics
+
+    @property
+    def rate_limiter_stats(self) -> Dict[str, Any]:
+        """Return statistics of the client-side rate limiter."""
+        return self.threedi_api.rate_limiter.stats()
+
+    @property
+    def client_pool_stats(self) -> Dict[str, Any]:
+        """Return statistics of the pooled API clients."""
+        return self.threedi_api.client_pool.stats()
 
     @property
     def expiration_date(self):
@@ -142,19 +218,91 @@ class ThreediCalls:
         return created__date__gt
 
     def paginated_fetch(self, api_method: Callable, *args, **kwargs) -> List[Any]:
-        """Method for iterative fetching of the data via given API endpoint."""
+        """Method for fetching of the data via given API endpoint, with the remaining pages fetched in parallel."""
         limit = self.FETCH_LIMIT
         logger.debug("Paginated fetch for %s...", api_method)
         response = api_method(*args, limit=limit, **kwargs)
         response_count = response.count
-        results_list = response.results
-        if response_count > limit:
-            for offset in range(limit, response_count, limit):
-                logger.debug("Another paginated fetch for %s...", api_method)
-                response = api_method(*args, offset=offset, limit=limit, **kwargs)
-                results_list += response.results
+        # The response may be shared with the coalesced callers, so the results are collected into a new list
+        results_list = list(response.results)
+        fetched_count = len(results_list)
+        if response_count > fetched_count:
+            page_size = self.adaptive_page_size(response_count - fetched_count)
+            offsets = range(fetched_count, response_count, page_size)
+            with ThreadPoolExecutor(max_workers=min(self.FETCH_WORKERS, len(offsets))) as executor:
+                futures = [
+                    executor.submit(self.fetch_page, api_method, offset, page_size, response_count, *args, **kwargs)
+                    for offset in offsets
+                ]
+                try:
+                    for future in futures:
+                        results_list += future.result()
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
         return results_list
 
+    def adaptive_page_size(self, remaining_count: int) -> int:
+        """Calculate page size that spreads remaining items evenly over the fetch workers."""
+        page_size = -(-remaining_count // self.FETCH_WORKERS)
+        page_size = max(self.FETCH_LIMIT, min(page_size, self.MAX_FETCH_LIMIT))
+        return page_size
+
+    def fetch_page(self, api_method: Callable, offset: int, limit: int, total_count: int, *args, **kwargs) -> List[Any]:
+        """Fetch a single page, following up if the server returned fewer items than requested."""
+        limit = min(limit, total_count - offset)
+        page_results = []
+        while len(page_results) < limit:
+            logger.debug("Another paginated fetch for %s (offset %d)...", api_method, offset + len(page_results))
+            response = api_method(*args, offset=offset + len(page_results), limit=limit - len(page_results), **kwargs)
+            if not response.results:
+                break
+            page_results += response.results
+        return page_results
+
+    def iter_paginated_pages(self, api_method: Callable, *args, **kwargs) -> Iterator[List[Any]]:
+        """Lazily iterate over the pages of the given API endpoint, fetching the next page only when requested."""
+        limit = self.FETCH_LIMIT
+        offset = 0
+        while True:
+            logger.debug("Lazy paginated fetch for %s (offset %d)...", api_method, offset)
+            response = api_method(*args, offset=offset, limit=limit, **kwargs)
+            page_results = response.results
+            if not page_results:
+                break
+            yield page_results
+            offset += len(page_results)
+            if offset >= response.count:
+                break
+
+    def iter_paginated(self, api_method: Callable, *args, **kwargs) -> Iterator[Any]:
+        """Lazily iterate over the items of the given API endpoint, fetching the next page only when needed."""
+        for page_results in self.iter_paginated_pages(api_method, *args, **kwargs):
+            yield from page_results
+
+    def filtered_fetch(self, api_method: Callable, *args, filters: Dict[str, Any] = None, **kwargs) -> List[Any]:
+        """Fetch items fulfilling filters, pushing the filters down to the API if the endpoint supports them."""
+        return list(self.iter_filtered(api_method, *args, filters=filters, **kwargs))
+
+    def iter_filtered(self, api_method: Callable, *args, filters: Dict[str, Any] = None, **kwargs) -> Iterator[Any]:
+        """Lazily iterate over items fulfilling filters, pushing the filters down to the API if supported."""
+        filters = filters or {}
+        pushed_filters, local_filters = split_filters(api_method, filters)
+        try:
+            items = self.iter_paginated(api_method, *args, **kwargs, **pushed_filters)
+            first_item = next(items, None)
+        except ApiTypeError:
+            logger.debug("Filters %s not accepted by %s, filtering on the client side", pushed_filters, api_method)
+            local_filters = filters
+            items = self.iter_paginated(api_method, *args, **kwargs)
+            first_item = next(items, None)
+        if first_item is None:
+            return
+        if matches(first_item, local_filters):
+            yield first_item
+        yield from filter_items(items, local_filters)
+
     def fetch_current_user(self) -> User:
         """Fetch current user instance."""
         user = self.threedi_api.auth_profile_list()
@@ -188,6 +336,25 @@ class ThreediCalls:
         show_valid_and_invalid: bool = False,
     ) -> Tuple[List[ThreediModel], int]:
         """Fetch 3Di models available for current user."""
+        params = self.threedi_models_params(
+            limit, offset, name_contains, schematisation_name, schematisation_owner, show_valid_and_invalid
+        )
+        logger.debug("Fetching 3di models for current user...")
+        response = self.threedi_api.threedimodels_list(**params)
+        models_list = response.results
+        models_count = response.count
+        return models_list, models_count
+
+    @staticmethod
+    def threedi_models_params(
+        limit: int = None,
+        offset: int = None,
+        name_contains: str = None,
+        schematisation_name: str = None,
+        schematisation_owner: str = None,
+        show_valid_and_invalid: bool = False,
+    ) -> Dict[str, Any]:
+        """Build 3Di models list query parameters."""
         params = {"revision__schematisation__isnull": False, "is_valid": True, "disabled": False}
         if limit is not None:
             params["limit"] = limit
@@ -201,11 +368,7 @@ class ThreediCalls:
             params["revision__schematisation__owner__unique_id"] = schematisation_owner
         if show_valid_and_invalid:
             params["is_valid"] = ""
-        logger.debug("Fetching 3di models for current user...")
-        response = self.threedi_api.threedimodels_list(**params)
-        models_list = response.results
-        models_count = response.count
-        return models_list, models_count
+        return params
 
     def create_simulation(self, **simulation_data) -> Simulation:
         """Create a new Simulation."""
@@ -231,6 +394,31 @@ class ThreediCalls:
         statuses = self.paginated_fetch(self.threedi_api.statuses_list, **params)
         return statuses
 
+    def fetch_simulation_statuses_raw(self, fields: Sequence[str] = None, **params) -> List[tuple]:
+        """Fetch simulations statuses as lightweight records with the given fields."""
+        params["created__date__gt"] = self.expiration_date
+        statuses = self.paginated_fetch(raw_list_method(self.threedi_api.statuses_list, fields), **params)
+        return statuses
+
+    def fetch_simulation_statuses_delta(self, fields: Sequence[str] = None, **params) -> List[tuple]:
+        """Fetch statuses created since the last sync, merged with the locally stored ones, as lightweight records."""
+        params, local_filters = split_filters(self.threedi_api.statuses_list, params)
+        # Store is keyed by the filters only, the expiration date moves daily and is applied when merging
+        store = DeltaStore(delta_store_path(self.threedi_api, "statuses", params))
+        delta_params = dict(params, created__date__gt=self.expiration_date)
+        high_water_mark = store.high_water_mark()
+        if high_water_mark:
+            delta_params["created__gt"] = high_water_mark
+        new_statuses = self.paginated_fetch(raw_list_method(self.threedi_api.statuses_list), **delta_params)
+        logger.debug("Fetched %d new simulation statuses since %s", len(new_statuses), high_water_mark)
+        rows = store.merge((status._asdict() for status in new_statuses), min_date=self.expiration_date)
+        return records_from_json(filter_items(rows, local_filters), fields)
+
+    def iter_simulation_statuses(self, **params) -> Iterator[SimulationStatus]:
+        """Lazily iterate over simulations statuses."""
+        params["created__date__gt"] = self.expiration_date
+        return self.iter_paginated(self.threedi_api.statuses_list, **params)
+
     def fetch_simulation_progress(self, simulation_pk: int) -> Progress:
         """Get a given simulation progress. Available only if simulation was already started."""
         logger.debug("Fetching simulation progress for sim id %s...", str(simulation_pk))
@@ -238,32 +426,81 @@ class ThreediCalls:
         return simulations_progress
 
     def fetch_simulations_progresses(
-        self, simulations_list: List[Simulation]
+        self, simulations_list: List[Simulation], bulk: bool = False
     ) -> Dict[int, Tuple[Simulation, CurrentStatus, Progress]]:
         """Get all simulations with statuses and progresses."""
         progresses = {}
         if not simulations_list:
             logger.warning("Simulations list not specified, we grab all simulations! ")
             simulations_list = self.fetch_simulations()
+        if bulk:
+            return self.fetch_simulations_progresses_bulk(simulations_list)
         logger.info("Starting to grab sim statuses for %d simulations", len(simulations_list))
         for sim in simulations_list:
             spk = sim.id
             spk_str = str(spk)
             logger.debug("Fetching status for simulation %s", spk_str)
             current_status = self.threedi_api.simulations_status_list(spk_str, limit=self.FETCH_LIMIT)
-            status_name = current_status.name
-            status_time = current_status.time
-            if status_time is None:
-                status_time = 0
-            if status_name == "initialized" and status_time:
-                sim_progress = self.threedi_api.simulations_progress_list(spk_str, limit=self.FETCH_LIMIT)
-            elif status_name == "postprocessing" or status_name == "finished":
-                sim_progress = Progress(percentage=100, time=status_time)
-            else:
-                sim_progress = Progress(percentage=0, time=status_time)
-            progresses[spk] = (sim, current_status, sim_progress)
+            progresses[spk] = (sim, current_status, self.status_progress(spk, current_status))
+        return progresses
+
+    def fetch_simulations_progresses_bulk(
+        self, simulations_list: List[Simulation]
+    ) -> Dict[int, Tuple[Simulation, CurrentStatus, Progress]]:
+        """Get simulations with statuses fetched in bulk and running simulations progresses fetched in parallel."""
+        logger.info("Starting to grab sim statuses in bulk for %d simulations", len(simulations_list))
+        current_statuses = self.fetch_current_statuses([sim.id for sim in simulations_list])
+        statuses_progresses = self.fetch_statuses_progresses(current_statuses)
+        progresses = {
+            sim.id: (sim, current_statuses[sim.id], statuses_progresses[sim.id]) for sim in simulations_list
+        }
+        return progresses
+
+    def fetch_current_statuses(self, simulation_pks: Sequence[int]) -> Dict[int, CurrentStatus]:
+        """Get current statuses of the given simulations with a single paginated query per batch of simulations."""
+        current_statuses = {}
+        for i in range(0, len(simulation_pks), self.STATUSES_BATCH_SIZE):
+            simulation_pks_batch = simulation_pks[i : i + self.STATUSES_BATCH_SIZE]
+            simulation_id__in = ",".join(str(spk) for spk in simulation_pks_batch)
+            for status in self.paginated_fetch(self.threedi_api.statuses_list, simulation_id__in=simulation_id__in):
+                current_statuses[status.simulation_id] = CurrentStatus(
+                    id=status.id,
+                    name=status.name,
+                    created=status.created,
+                    time=status.time,
+                    paused=status.paused,
+                    exit_code=str(status.exit_code) if status.exit_code is not None else None,
+                )
+        for spk in simulation_pks:
+            if spk not in current_statuses:
+                logger.debug("Bulk status missing for simulation %s, fetching it separately", spk)
+                current_statuses[spk] = self.threedi_api.simulations_status_list(str(spk), limit=self.FETCH_LIMIT)
+        return current_statuses
+
+    def fetch_statuses_progresses(self, current_statuses: Dict[int, Any]) -> Dict[int, Progress]:
+        """Get progresses for the current statuses - running simulations progresses are fetched in parallel."""
+        with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as executor:
+            progresses_futures = {
+                spk: executor.submit(self.status_progress, spk, current_status)
+                for spk, current_status in current_statuses.items()
+            }
+            progresses = {spk: future.result() for spk, future in progresses_futures.items()}
         return progresses
 
+    def status_progress(self, simulation_pk: int, current_status: CurrentStatus) -> Progress:
+        """Get simulation progress - only running simulations progress is fetched from the API."""
+        status_name = current_status.name
+        status_time = current_status.time
+        if status_time is None:
+            status_time = 0
+        if status_name == "initialized" and status_time:
+            sim_progress = self.threedi_api.simulations_progress_list(str(simulation_pk), limit=self.FETCH_LIMIT)
+        elif status_name == "postprocessing" or status_name == "finished":
+            sim_progress = Progress(percentage=100, time=status_time)
+        else:
+            sim_progress = Progress(percentage=0, time=status_time)
+        return sim_progress
+
     def fetch_simulation_results(self, simulation_pk: int) -> List[ResultFile]:
         """Fetch simulation results list."""
         spk_str = str(simulation_pk)
@@ -322,6 +559,13 @@ class ThreediCalls:
         breaches = self.paginated_fetch(self.threedi_api.threedimodels_potentialbreaches_list, threedimodel_id)
         return breaches
 
+    def fetch_3di_model_potential_breaches_raw(self, threedimodel_id: str, fields: Sequence[str] = None) -> List[tuple]:
+        """Fetch breaches list as lightweight records with the given fields."""
+        breaches = self.paginated_fetch(
+            raw_list_method(self.threedi_api.threedimodels_potentialbreaches_list, fields), threedimodel_id
+        )
+        return breaches
+
     def fetch_3di_model_point_potential_breach(self, threedimodel_id: str, content_pk: int = None) -> PotentialBreach:
         """Fetch a single potential breach at given connected_pnt_id."""
         params = {"threedimodel_pk": threedimodel_id}
@@ -341,18 +585,37 @@ class ThreediCalls:
         water_levels = self.paginated_fetch(self.threedi_api.threedimodels_initial_waterlevels_list, threedimodel_id)
         return water_levels
 
+    def iter_3di_model_initial_waterlevels(self, threedimodel_id: str) -> Iterator[InitialWaterlevel]:
+        """Lazily iterate over initial water levels."""
+        return self.iter_paginated(self.threedi_api.threedimodels_initial_waterlevels_list, threedimodel_id)
+
     def fetch_3di_model_initial_waterlevel(self, threedimodel_id: str, water_level_id: int) -> InitialWaterlevel:
         """Fetch initial water level with given id"""
         water_level = self.threedi_api.threedimodels_initial_waterlevels_read(water_level_id, threedimodel_id)
         return water_level
 
-    def fetch_3di_model_initial_concentrations(self, threedimodel_id: str) -> List[InitialConcentration]:
+    def fetch_3di_model_initial_concentrations(self, threedimodel_id: str, **filters) -> List[InitialConcentration]:
         """Fetch initial concentrations list"""
-        concentrations = self.paginated_fetch(
-            self.threedi_api.threedimodels_initial_concentrations_list, threedimodel_id
+        concentrations = self.filtered_fetch(
+            self.threedi_api.threedimodels_initial_concentrations_list, threedimodel_id, filters=filters
         )
         return concentrations
 
+    def iter_3di_model_initial_concentrations(self, threedimodel_id: str, **filters) -> Iterator[InitialConcentration]:
+        """Lazily iterate over initial concentrations."""
+        return self.iter_filtered(
+            self.threedi_api.threedimodels_initial_concentrations_list, threedimodel_id, filters=filters
+        )
+
+    def fetch_3di_model_initial_concentration(
+        self, threedimodel_id: str, initial_concentration_id: int
+    ) -> InitialConcentration:
+        """Fetch initial concentration with given id"""
+        initial_concentration = self.threedi_api.threedimodels_initial_concentrations_read(
+            initial_concentration_id, threedimodel_id
+        )
+        return initial_concentration
+
     def fetch_3di_model_rasters(self, threedimodel_id: str, **data) -> List[Raster]:
         """Fetch paginated rasters list"""
         rasters = self.paginated_fetch(self.threedi_api.threedimodels_rasters_list, threedimodel_id, **data)
@@ -373,6 +636,10 @@ class ThreediCalls:
         tasks = self.paginated_fetch(self.threedi_api.threedimodels_tasks_list, threedimodel_id)
         return tasks
 
+    def iter_3di_model_tasks(self, threedimodel_id: str) -> Iterator[ThreediModelTask]:
+        """Lazily iterate over 3Di model tasks."""
+        return self.iter_paginated(self.threedi_api.threedimodels_tasks_list, threedimodel_id)
+
     def fetch_3di_model_task(self, threedimodel_id: str, task_id: int) -> ThreediModelTask:
         """Fetch 3Di model task with given ID."""
         task = self.threedi_api.threedimodels_tasks_read(task_id, threedimodel_id)
@@ -393,13 +660,19 @@ class ThreediCalls:
         organisations = self.paginated_fetch(self.threedi_api.organisations_list)
         return organisations
 
-    def fetch_lateral_files(self, simulation_pk: int) -> List[FileLateral]:
+    def fetch_lateral_files(self, simulation_pk: int, **filters) -> List[FileLateral]:
         """Get list of the lateral files of the given simulation."""
-        lateral_files_list = self.paginated_fetch(
-            self.threedi_api.simulations_events_lateral_file_list, str(simulation_pk)
+        lateral_files_list = self.filtered_fetch(
+            self.threedi_api.simulations_events_lateral_file_list, str(simulation_pk), filters=filters
         )
         return lateral_files_list
 
+    def iter_lateral_files(self, simulation_pk: int, **filters) -> Iterator[FileLateral]:
+        """Lazily iterate over the lateral files of the given simulation."""
+        return self.iter_filtered(
+            self.threedi_api.simulations_events_lateral_file_list, str(simulation_pk), filters=filters
+        )
+
     def fetch_lateral_file(self, simulation_pk: int, lateral_pk: int) -> FileLateral:
         """Get a laterals file with given id."""
         lateral_file = self.threedi_api.simulations_events_lateral_file_read(lateral_pk, str(simulation_pk))
@@ -467,6 +740,10 @@ class ThreediCalls:
         )
         return sc_files_list
 
+    def iter_structure_control_files(self, simulation_pk: int) -> Iterator[FileStructureControl]:
+        """Lazily iterate over the structure control files of the given simulation."""
+        return self.iter_paginated(self.threedi_api.simulations_events_structure_control_file_list, str(simulation_pk))
+
     def fetch_structure_control_file(self, simulation_pk: int, sc_pk: int) -> FileStructureControl:
         """Get a structure control file with given id."""
         sc_file = self.threedi_api.simulations_events_structure_control_file_read(sc_pk, str(simulation_pk))
@@ -504,6 +781,10 @@ class ThreediCalls:
         )
         return bc_files_list
 
+    def iter_boundarycondition_files(self, simulation_pk: int) -> Iterator[FileBoundaryCondition]:
+        """Lazily iterate over the boundary condition files of the given simulation."""
+        return self.iter_paginated(self.threedi_api.simulations_events_boundaryconditions_file_list, str(simulation_pk))
+
     def fetch_boundarycondition_file(self, simulation_pk: int, bc_pk: int) -> FileBoundaryCondition:
         """Get a boundary condition file with given id."""
         bc_file = self.threedi_api.simulations_events_boundaryconditions_file_read(bc_pk, str(simulation_pk))
@@ -533,6 +814,20 @@ class ThreediCalls:
         time_series_rain = self.threedi_api.simulations_events_rain_timeseries_create(str(simulation_pk), rain_data)
         return time_series_rain
 
+    def create_simulation_rain_timeseries_file(self, simulation_pk: int, **data) -> UploadEventFile:
+        """Add rain time series file (JSON list of the time series rain events) to the given simulation."""
+        rain_upload_file = self.threedi_api.simulations_events_rain_timeseries_file_create(str(simulation_pk), data)
+        return rain_upload_file
+
+    def iter_rain_timeseries_files(self, simulation_pk: int) -> Iterator[Any]:
+        """Lazily iterate over the rain time series files of the given simulation."""
+        return self.iter_paginated(self.threedi_api.simulations_events_rain_timeseries_file_list, str(simulation_pk))
+
+    def fetch_rain_timeseries_file(self, simulation_pk: int, rain_file_pk: int) -> Any:
+        """Get a rain time series file with given id."""
+        rain_file = self.threedi_api.simulations_events_rain_timeseries_file_read(rain_file_pk, str(simulation_pk))
+        return rain_file
+
     def create_simulation_raster_netcdf_precipitation(self, simulation_pk: int, **rain_data) -> Upload:
         """Add raster rain time series from NetCDF file to the given simulation."""
         netcdf_upload = self.threedi_api.simulations_events_rain_rasters_netcdf_create(str(simulation_pk), rain_data)
@@ -0,0 +1,196 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator
+
+import urllib3
+
+from .metrics import get_api_metrics
+from .transports import DEFAULT_TRANSPORT, HTTP2_TRANSPORT, Http2PoolManager, resolve_transport
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 30.0
+READ_TIMEOUT = 600.0
+MAX_CONNECTIONS_PER_HOST = 8
+MAX_HOSTS = 10
+TRANSFER_RETRIES = 3
+TRANSFER_BACKOFF_FACTOR = 1.0
+TRANSFER_BACKOFF_MAX = 30.0
+TRANSFER_CHUNK_SIZE = 1024**2
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+class TransferError(Exception):
+    """File transfer exception class."""
+
+    pass
+
+
+class JsonBody:
+    """Request body with JSON serialized data, sent in chunks without joining them into a single JSON document.
+
+    Data is serialized again on each iteration (e.g. on upload retries), and once more to count the content length,
+    so no more than a single chunk of the serialized data is held in memory. Data must not change during the upload.
+    """
+
+    def __init__(self, values: Any, chunk_size: int = JSON_CHUNK_SIZE):
+        self.values = values
+        self.chunk_size = chunk_size
+        self._content_length = None
+
+    def iter_encoded(self) -> Iterator[bytes]:
+        """Yield encoded fragments of the serialized data, the same as produced by `json.dumps`."""
+        for fragment in json.JSONEncoder().iterencode(self.values):
+            yield fragment.encode()
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Yield encoded fragments of the serialized data joined into the chunks of at least `chunk_size` bytes."""
+        buffer, buffer_size = [], 0
+        for fragment in self.iter_encoded():
+            buffer.append(fragment)
+            buffer_size += len(fragment)
+            if buffer_size >= self.chunk_size:
+                yield b"".join(buffer)
+                buffer, buffer_size = [], 0
+        if buffer:
+            yield b"".join(buffer)
+
+    @property
+    def content_length(self) -> int:
+        """Return size of the serialized data in bytes."""
+        if self._content_length is None:
+            self._content_length = sum(len(fragment) for fragment in self.iter_encoded())
+        return self._content_length
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.iter_chunks()
+
+
+class TransferPool:
+    """Thread-safe pool of keep-alive connections shared by all file transfers."""
+
+    def __init__(
+        self,
+        max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        retries: int = TRANSFER_RETRIES,
+        backoff_factor: float = TRANSFER_BACKOFF_FACTOR,
+        transport: str = DEFAULT_TRANSPORT,
+    ):
+        self.max_connections_per_host = max_connections_per_host
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        self.transport = resolve_transport(transport)
+        if self.transport == HTTP2_TRANSPORT:
+            self.pool_manager = Http2PoolManager(timeout=self.timeout, retries=retries)
+        else:
+            self.pool_manager = urllib3.PoolManager(
+                num_pools=MAX_HOSTS,
+                maxsize=max_connections_per_host,
+                block=True,
+                timeout=self.timeout,
+                retries=urllib3.util.Retry(retries, backoff_factor=backoff_factor),
+            )
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Return exponential backoff delay with full jitter, for the retry after the given (zero based) attempt."""
+        return random.uniform(0, min(TRANSFER_BACKOFF_MAX, self.backoff_factor * 2**attempt))
+
+    def request(self, method: str, url: str, **kwargs) -> urllib3.HTTPResponse:
+        """Make a request using one of the pooled connections."""
+        return self.pool_manager.request(method, url, **kwargs)
+
+    def iter_download(self, url: str, chunk_size: int = TRANSFER_CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream the content of the given url in chunks, returning the connection to the pool when done."""
+        metrics = get_api_metrics()
+        downloaded_size = 0
+        failed = True
+        response = self.pool_manager.request("GET", url, preload_content=False)
+        try:
+            if response.status >= 400:
+                raise TransferError(f"Download failed with HTTP status {response.status} ({response.reason})")
+            for chunk in response.stream(chunk_size):
+                if chunk:
+                    downloaded_size += len(chunk)
+                    yield chunk
+            failed = False
+        finally:
+            response.release_conn()
+            metrics.record_transfer("download", downloaded_size, failed)
+
+    def upload_fileobj(self, url: str, fileobj: BinaryIO, headers: Dict[str, str] = None) -> urllib3.HTTPResponse:
+        """Upload the content of the binary file object to the given url."""
+        start_position = fileobj.tell()
+        content_length = os.fstat(fileobj.fileno()).st_size - start_position
+
+        def rewound_fileobj():
+            fileobj.seek(start_position)
+            return fileobj
+
+        return self.upload_body(url, rewound_fileobj, content_length, headers)
+
+    def upload_json(self, url: str, values: Any, headers: Dict[str, str] = None) -> urllib3.HTTPResponse:
+        """Upload JSON serialized data to the given url, streaming it straight into the request body."""
+        body = JsonBody(values)
+        return self.upload_body(url, lambda: body, body.content_length, headers)
+
+    def upload_body(
+        self, url: str, body_factory: Callable[[], Any], content_length: int, headers: Dict[str, str] = None
+    ) -> urllib3.HTTPResponse:
+        """Upload request body of the known length to the given url. Body is created anew for each attempt."""
+        upload_headers = {"Content-Length": str(content_length)}
+        if headers:
+            upload_headers.update(headers)
+        for attempt in range(self.retries + 1):
+            body = body_factory()
+            try:
+                # Retries are handled here, as the body needs to be recreated (e.g. rewound) before sending it again
+                response = self.pool_manager.request("PUT", url, body=body, headers=upload_headers, retries=False)
+            except urllib3.exceptions.HTTPError as e:
+                if attempt == self.retries:
+                    get_api_metrics().record_transfer("upload", 0, failed=True)
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.debug("Upload attempt %d failed (%s), retrying in %.2f s...", attempt + 1, e, delay)
+                time.sleep(delay)
+                continue
+            if response.status >= 400:
+                get_api_metrics().record_transfer("upload", 0, failed=True)
+                raise TransferError(f"Upload failed with HTTP status {response.status} ({response.reason})")
+            get_api_metrics().record_transfer("upload", content_length)
+            return response
+
+    def clear(self):
+        """Close all pooled connections."""
+        self.pool_manager.clear()
+
+
+_transfer_pool = None
+_transfer_pool_lock = threading.Lock()
+
+
+def get_transfer_pool() -> TransferPool:
+    """Return the process-wide transfer pool, creating it on first use."""
+    global _transfer_pool
+    with _transfer_pool_lock:
+        if _transfer_pool is None:
+            _transfer_pool = TransferPool()
+        return _transfer_pool
+
+
+def configure_transfer_pool(**pool_settings) -> TransferPool:
+    """Replace the process-wide transfer pool with the one using given settings."""
+    global _transfer_pool
+    with _transfer_pool_lock:
+        if _transfer_pool is not None:
+            _transfer_pool.clear()
+        _transfer_pool = TransferPool(**pool_settings)
+        return _transfer_pool
@@ -0,0 +1,304 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import io
+import logging
+import threading
+from importlib.util import find_spec
+from typing import Any, Dict, Optional, Union
+from urllib.parse import urlencode
+
+import urllib3
+from threedi_api_client import ThreediApi
+
+# Not exported from the urllib3 package itself before 1.26
+from urllib3._collections import HTTPHeaderDict
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+URLLIB3_TRANSPORT = "urllib3"
+HTTP2_TRANSPORT = "http2"
+TRANSPORTS = (URLLIB3_TRANSPORT, HTTP2_TRANSPORT)
+DEFAULT_TRANSPORT = URLLIB3_TRANSPORT
+# Each HTTP/2 connection multiplexes many concurrent requests, so only a few of them are needed
+HTTP2_MAX_CONNECTIONS = 2
+HTTP2_RETRIES = 3
+HTTP2_CHUNK_SIZE = 64 * 1024
+QUERY_METHODS = ("GET", "HEAD", "DELETE")
+
+
+class TransportError(Exception):
+    """Transport backend exception class."""
+
+    pass
+
+
+def http2_available() -> bool:
+    """Check if the optional HTTP/2 transport dependencies (httpx with h2) are installed."""
+    return httpx is not None and find_spec("h2") is not None
+
+
+def resolve_transport(transport: str) -> str:
+    """Return transport backend to use, falling back to the default one if HTTP/2 dependencies are missing."""
+    if transport not in TRANSPORTS:
+        raise TransportError(f"Unknown transport '{transport}', available options are: {', '.join(TRANSPORTS)}")
+    if transport == HTTP2_TRANSPORT and not http2_available():
+        logger.warning(
+            "HTTP/2 transport requires 'httpx[http2]' package, using %s transport instead", DEFAULT_TRANSPORT
+        )
+        return DEFAULT_TRANSPORT
+    return transport
+
+
+class StreamOpening:
+    """Lock held while the request stream is opened, released once the request headers are sent.
+
+    Released from the httpcore `trace` extension callback (or after the request is sent, whichever comes first).
+    """
+
+    def __init__(self, lock: threading.Lock):
+        self.lock = lock
+        self.locked = True
+
+    def trace(self, event_name: str, info: Dict[str, Any]):
+        """Request trace callback, releasing the lock when headers are sent."""
+        if event_name.endswith(("send_request_headers.complete", "send_request_headers.failed")):
+            self.release()
+
+    def release(self):
+        """Release the lock, if it wasn't released already."""
+        if self.locked:
+            self.locked = False
+            self.lock.release()
+
+
+def httpx_timeout(timeout: Union[urllib3.Timeout, float, None]) -> Optional["httpx.Timeout"]:
+    """Convert urllib3 timeout (or number of seconds) into the httpx timeout."""
+    if timeout is None:
+        return None
+    if isinstance(timeout, urllib3.Timeout):
+        connect_timeout, read_timeout = timeout.connect_timeout, timeout.read_timeout
+        connect_timeout = connect_timeout if isinstance(connect_timeout, (int, float)) else None
+        read_timeout = read_timeout if isinstance(read_timeout, (int, float)) else None
+        return httpx.Timeout(read_timeout, connect=connect_timeout)
+    return httpx.Timeout(timeout)
+
+
+def request_content(body: Any) -> Any:
+    """Convert urllib3 request body into the httpx request content."""
+    if isinstance(body, str):
+        return body.encode()
+    if hasattr(body, "read"):
+        return iter(lambda: body.read(HTTP2_CHUNK_SIZE), b"")
+    return body
+
+
+class Http2ResponseStream(io.RawIOBase):
+    """Readable file object over the streamed httpx response content."""
+
+    def __init__(self, response: "httpx.Response"):
+        self.response = response
+        self.chunks = response.iter_bytes()
+        self.buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        try:
+            while not self.buffer:
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    return 0
+                self.buffer = chunk
+        except httpx.TransportError as e:
+            raise urllib3.exceptions.ProtocolError(str(e)) from e
+        size = min(len(buffer), len(self.buffer))
+        buffer[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.response.close()
+        super().close()
+
+
+class Http2Response(urllib3.HTTPResponse):
+    """The urllib3 response backed by the httpx one, for the code written against the urllib3 responses."""
+
+    def __init__(self, response: "httpx.Response", preload_content: bool = True):
+        self.httpx_response = response
+        headers = HTTPHeaderDict()
+        for name, value in response.headers.multi_items():
+            headers.add(name, value)
+        if headers.pop("Content-Encoding", None) is not None:
+            # Content is already decoded by httpx, so the original length doesn't apply anymore
+            headers.pop("Content-Length", None)
+        body = io.BytesIO(response.content) if preload_content else Http2ResponseStream(response)
+        super().__init__(
+            body=body,
+            headers=headers,
+            status=response.status_code,
+            reason=response.reason_phrase,
+            preload_content=preload_content,
+            decode_content=False,
+        )
+
+    def release_conn(self):
+        """Release the HTTP/2 stream back to the connection."""
+        self.httpx_response.close()
+
+
+class Http2PoolManager:
+    """Replacement of the urllib3 PoolManager sending requests multiplexed over a few HTTP/2 connections.
+
+    Servers not supporting HTTP/2 are still reached over HTTP/1.1, unless `http1` is disabled.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP2_MAX_CONNECTIONS,
+        timeout: Union[urllib3.Timeout, float, None] = None,
+        retries: int = HTTP2_RETRIES,
+        http1: bool = True,
+        verify: Union[bool, str] = True,
+        proxy: str = None,
+    ):
+        if not http2_available():
+            raise TransportError("HTTP/2 transport requires 'httpx[http2]' package.")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.http1 = http1
+        self.verify = verify
+        self.proxy = proxy
+        self.lock = threading.Lock()
+        # The sync HTTP/2 connection of httpcore shares the h2 state machine between the threads of the multiplexed
+        # requests, so concurrently opened streams could get the same stream ID or send headers out of order
+        self.stream_lock = threading.Lock()
+        self._client = None
+
+    @property
+    def client(self) -> "httpx.Client":
+        """Return the httpx client, creating it on first use."""
+        with self.lock:
+            if self._client is None:
+                limits = httpx.Limits(max_connections=self.max_connections)
+                transport = httpx.HTTPTransport(
+                    verify=self.verify, http1=self.http1, http2=True, limits=limits, retries=self.retries
+                )
+                client_kwargs = {"proxy": self.proxy} if self.proxy else {}
+                self._client = httpx.Client(
+                    http1=self.http1,
+                    http2=True,
+                    timeout=httpx_timeout(self.timeout),
+                    transport=transport,
+                    **client_kwargs,
+                )
+            return self._client
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        fields=None,
+        headers=None,
+        body=None,
+        preload_content: bool = True,
+        timeout=None,
+        encode_multipart: bool = True,
+        redirect: bool = True,
+        **kwargs,
+    ) -> Http2Response:
+        """Make a request with the urllib3 `PoolManager.request` arguments.
+
+        Connection errors are retried by the transport, the urllib3 `retries` argument is ignored.
+        """
+        method = method.upper()
+        request_headers = dict(headers or {})
+        content = request_content(body)
+        if fields:
+            if method in QUERY_METHODS:
+                url += ("&" if "?" in url else "?") + urlencode(fields)
+            elif encode_multipart:
+                content, request_headers["Content-Type"] = urllib3.encode_multipart_formdata(fields)
+            else:
+                content = urlencode(fields).encode()
+                request_headers["Content-Type"] = "application/x-www-form-urlencoded"
+        client = self.client
+        request_timeout = httpx_timeout(timeout) if timeout is not None else client.timeout
+        request = client.build_request(method, url, headers=request_headers, content=content, timeout=request_timeout)
+        try:
+            response = self.send(client, request)
+            redirects = 0
+            while redirect and response.next_request is not None:
+                if redirects >= client.max_redirects:
+                    response.close()
+                    raise urllib3.exceptions.MaxRetryError(None, url, "Too many redirects")
+                next_request = response.next_request
+                response.close()
+                response = self.send(client, next_request)
+                redirects += 1
+            if preload_content:
+                try:
+                    response.read()
+                finally:
+                    response.close()
+        except httpx.TimeoutException as e:
+            raise urllib3.exceptions.TimeoutError(str(e)) from e
+        except httpx.TransportError as e:
+            raise urllib3.exceptions.ProtocolError(str(e)) from e
+        return Http2Response(response, preload_content)
+
+    def send(self, client: "httpx.Client", request: "httpx.Request") -> "httpx.Response":
+        """Send request, opening its stream while holding the stream lock, so streams are opened one at a time.
+
+        Only the stream opening is serialized, request bodies and responses of the streams are still multiplexed.
+        """
+        pool_timeout = request.extensions.get("timeout", {}).get("pool")
+        if not self.stream_lock.acquire(timeout=-1 if pool_timeout is None else pool_timeout):
+            raise urllib3.exceptions.TimeoutError("Timed out waiting to open the HTTP/2 stream")
+        stream_opening = StreamOpening(self.stream_lock)
+        request.extensions = dict(request.extensions, trace=stream_opening.trace)
+        try:
+            return client.send(request, stream=True, follow_redirects=False)
+        finally:
+            stream_opening.release()
+
+    def clear(self):
+        """Close all connections."""
+        with self.lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+
+def install_transport(threedi_api: ThreediApi, transport: str = DEFAULT_TRANSPORT) -> str:
+    """Switch API client requests to the given transport backend. Returns the backend in use."""
+    transport = resolve_transport(transport)
+    if transport == URLLIB3_TRANSPORT:
+        return transport
+    configuration = threedi_api._client.configuration
+    rest_client = threedi_api._client.rest_client
+    retries = getattr(configuration.retries, "total", None)
+    verify = (configuration.ssl_ca_cert or True) if configuration.verify_ssl else False
+    pool_manager = Http2PoolManager(
+        retries=retries if isinstance(retries, int) else HTTP2_RETRIES,
+        verify=verify,
+        proxy=configuration.proxy,
+    )
+    # Transport sits below the HTTP cache if it is already installed
+    from .http_cache import ConditionalPoolManager
+
+    if isinstance(rest_client.pool_manager, ConditionalPoolManager):
+        rest_client.pool_manager.pool_manager.clear()
+        rest_client.pool_manager.pool_manager = pool_manager
+    else:
+        rest_client.pool_manager.clear()
+        rest_client.pool_manager = pool_manager
+    return transport
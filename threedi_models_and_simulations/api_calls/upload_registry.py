@@ -0,0 +1,53 @@
+# 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
+# Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
+import os
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from threedi_api_client import ThreediApi
+
+from ..utils import CACHE_PATH
+from .json_store import JsonStore, user_store_path
+
+UPLOAD_REGISTRY_PATH = os.path.join(CACHE_PATH, "upload_registry")
+
+
+def upload_registry_path(threedi_api: ThreediApi, registry_dir: str = None) -> str:
+    """Return upload registry path of the user and API host of the given API client."""
+    if registry_dir is None:
+        registry_dir = UPLOAD_REGISTRY_PATH
+    return user_store_path(threedi_api, registry_dir)
+
+
+class UploadRegistry(JsonStore):
+    """Local registry of the model-level resources created from the uploaded local data, by the content checksum."""
+
+    description = "upload registry"
+
+    @staticmethod
+    def entry_key(threedimodel_id: Any, resource_type: str, content_checksum: str) -> str:
+        """Return registry key of the uploaded content."""
+        return f"{threedimodel_id}:{resource_type}:{content_checksum}"
+
+    def get(self, threedimodel_id: Any, resource_type: str, content_checksum: str) -> Optional[int]:
+        """Return ID of the resource created from the given content, if registered."""
+        with self.lock:
+            entry = self.load().get(self.entry_key(threedimodel_id, resource_type, content_checksum))
+        return entry["id"] if entry else None
+
+    def register(self, threedimodel_id: Any, resource_type: str, content_checksum: str, resource_id: int):
+        """Register ID of the resource created from the given content."""
+        with self.lock:
+            entries = self.load()
+            entries[self.entry_key(threedimodel_id, resource_type, content_checksum)] = {
+                "id": resource_id,
+                "registered": datetime.now(timezone.utc).isoformat(),
+            }
+            self.save(entries)
+
+    def remove(self, threedimodel_id: Any, resource_type: str, content_checksum: str):
+        """Remove registered resource (e.g. not available on the server anymore)."""
+        with self.lock:
+            entries = self.load()
+            if entries.pop(self.entry_key(threedimodel_id, resource_type, content_checksum), None) is not None:
+                self.save(entries)
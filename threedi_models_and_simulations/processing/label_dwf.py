@@ -7,6 +7,7 @@ import urllib3
 from threedi_api_client import ThreediApi
 from threedi_api_client.files import download_file, upload_file
 
+from threedi_models_and_simulations.api_calls.transfers import get_transfer_pool
 from threedi_models_and_simulations.processing.utils import MockFeedback, ProcessingException
 
 DOWNLOAD_TIMEOUT = urllib3.Timeout(connect=60, read=600)
@@ -99,7 +100,8 @@ def label_dwf(
             download_file(
                 url=original_dwf_file_download_url,
                 target=original_dwf_file_path,
-                timeout=DOWNLOAD_TIMEOUT
+                timeout=DOWNLOAD_TIMEOUT,
+                pool=get_transfer_pool().pool_manager,
             )
             original_dwf_file_paths.append(original_dwf_file_path)
             feedback.pushInfo(f"Downloaded {original_dwf_file_path}")
@@ -130,7 +132,7 @@ def label_dwf(
                 "periodic": "daily"
             }
         )
-        res = upload_file(upload_object.put_url, edited_dwf_file_path)
+        res = upload_file(upload_object.put_url, edited_dwf_file_path, pool=get_transfer_pool().pool_manager)
         feedback.pushInfo(f"Processing DWF file...")
         laterals = api_client.simulations_events_lateral_file_list(simulation_pk=simulation.id).results
         found = False
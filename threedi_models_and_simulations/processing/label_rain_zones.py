@@ -7,6 +7,7 @@ from typing import List, Tuple
 from threedi_api_client import ThreediApi
 from threedi_api_client.files import upload_file
 
+from threedi_models_and_simulations.api_calls.transfers import get_transfer_pool
 from threedi_models_and_simulations.processing.utils import MockFeedback, ProcessingException
 
 
@@ -21,7 +22,7 @@ def post_rain_events(api_client: ThreediApi, data: List, simulation, feedback, w
     with tempfile.NamedTemporaryFile(mode='w+', suffix='.json', delete=False) as rain_events_file:
         json.dump(data, rain_events_file, indent=4)
         rain_events_file_path = Path(rain_events_file.name)
-    res = upload_file(upload_object.put_url, rain_events_file_path)
+    res = upload_file(upload_object.put_url, rain_events_file_path, pool=get_transfer_pool().pool_manager)
     feedback.pushInfo("Processing rain file...")
     rain_events = api_client.simulations_events_rain_timeseries_file_list(simulation_pk=simulation.id).results[0]
     for i in range(max_retries):
@@ -10,6 +10,7 @@ from qgis.PyQt import uic
 from qgis.PyQt.QtCore import QSettings, pyqtSignal
 from qgis.PyQt.QtWidgets import QDialog, QFileDialog, QInputDialog
 
+from .api_calls.transports import DEFAULT_TRANSPORT, HTTP2_TRANSPORT
 from .communication import UICommunication
 
 
@@ -21,6 +22,8 @@ class SettingsDialog(QDialog):
     LIVE_URL_PREFIX = "https://www."
     DEFAULT_BASE_URL = "3di.live"
     DEFAULT_UPLOAD_TIMEOUT = 900
+    DEFAULT_USE_HTTP2 = False
+    DEFAULT_CONCURRENT_SIMULATIONS = 1
 
     settings_changed = pyqtSignal()
 
@@ -33,6 +36,8 @@ class SettingsDialog(QDialog):
         self.settings_communication = UICommunication(self.iface, "3Di Models and Simulations Settings")
         self.upload_timeout = None
         self.working_dir = None
+        self.use_http2 = None
+        self.concurrent_simulations = None
         self.browse_pb.clicked.connect(self.set_working_directory)
         self.set_pak_pb.clicked.connect(self.set_personal_api_key)
         self.obtain_pak_pb.clicked.connect(self.obtain_personal_api_key)
@@ -77,6 +82,10 @@ class SettingsDialog(QDialog):
             url = f"{self.LIVE_URL_PREFIX}{self.DEFAULT_BASE_URL}"
         return url
 
+    @property
+    def transport(self):
+        return HTTP2_TRANSPORT if self.use_http2 else DEFAULT_TRANSPORT
+
     @staticmethod
     def get_3di_auth():
         """Getting 3Di credentials from the QGIS Authorization Manager."""
@@ -154,6 +163,12 @@ class SettingsDialog(QDialog):
         self.working_dir_le.setText(self.working_dir)
         self.upload_timeout = QSettings().value("threedi/timeout", self.DEFAULT_UPLOAD_TIMEOUT, type=int)
         self.upload_timeout_sb.setValue(self.upload_timeout)
+        self.use_http2 = QSettings().value("threedi/use_http2", self.DEFAULT_USE_HTTP2, type=bool)
+        self.http2_cb.setChecked(self.use_http2)
+        self.concurrent_simulations = QSettings().value(
+            "threedi/concurrent_simulations", self.DEFAULT_CONCURRENT_SIMULATIONS, type=int
+        )
+        self.concurrent_simulations_sb.setValue(self.concurrent_simulations)
         username, password = self.get_3di_auth()
         if password:
             self.set_personal_api_key_label(True)
@@ -164,9 +179,13 @@ class SettingsDialog(QDialog):
         """Saving plugin settings in QSettings."""
         self.working_dir = self.working_dir_le.text()
         self.upload_timeout = self.upload_timeout_sb.value()
+        self.use_http2 = self.http2_cb.isChecked()
+        self.concurrent_simulations = self.concurrent_simulations_sb.value()
         QSettings().setValue("threedi/base_url", self.base_url)
         QSettings().setValue("threedi/working_dir", self.working_dir)
         QSettings().setValue("threedi/timeout", self.upload_timeout)
+        QSettings().setValue("threedi/use_http2", self.use_http2)
+        QSettings().setValue("threedi/concurrent_simulations", self.concurrent_simulations)
 
     def settings_are_valid(self):
         """Check validity of the settings."""
@@ -207,6 +226,8 @@ class SettingsDialog(QDialog):
         self.base_url_le.setText(self.DEFAULT_BASE_URL)
         self.working_dir_le.setText(self.default_working_dir() or "")
         self.upload_timeout_sb.setValue(self.DEFAULT_UPLOAD_TIMEOUT)
+        self.http2_cb.setChecked(self.DEFAULT_USE_HTTP2)
+        self.concurrent_simulations_sb.setValue(self.DEFAULT_CONCURRENT_SIMULATIONS)
 
     def accept(self):
         """Accepting changes and closing dialog."""
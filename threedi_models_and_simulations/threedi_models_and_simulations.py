@@ -7,6 +7,7 @@ from qgis.PyQt.QtCore import Qt
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction, QApplication
 
+from .api_calls.metrics import get_api_metrics, metrics_export_path
 from .communication import UICommunication
 from .processing.providers import ThreediModelsAndSimulationsProvider
 from .settings import SettingsDialog
@@ -32,6 +33,10 @@ class ThreediModelsAndSimulations:
         self.toolbar.setObjectName("ThreediModelsAndSimulations")
         self.pluginIsActive = False
         self.dockwidget = None
+        # API metrics are collected only when their export file is set in the environment
+        self.metrics_export_path = metrics_export_path()
+        if self.metrics_export_path:
+            get_api_metrics().enable()
 
     def add_action(
         self,
@@ -79,6 +84,14 @@ class ThreediModelsAndSimulations:
             parent=self.iface.mainWindow(),
             add_to_toolbar=False,
         )
+        if self.metrics_export_path:
+            self.add_action(
+                icon_path,
+                text="Export API metrics",
+                callback=self.export_api_metrics,
+                parent=self.iface.mainWindow(),
+                add_to_toolbar=False,
+            )
         self.provider = ThreediModelsAndSimulationsProvider()
         QgsApplication.processingRegistry().addProvider(self.provider)
 
@@ -96,11 +109,23 @@ class ThreediModelsAndSimulations:
             self.iface.removeToolBarIcon(action)
         # remove the toolbar
         del self.toolbar
+        if self.metrics_export_path:
+            self.export_api_metrics()
+            get_api_metrics().disable()
 
     def settings(self):
         """Show plugin settings dialog."""
         self.plugin_settings.exec_()
 
+    def export_api_metrics(self):
+        """Write collected API metrics to the export file set in the environment."""
+        uc = UICommunication(self.iface, "3Di Models and Simulations")
+        try:
+            get_api_metrics().export(self.metrics_export_path)
+            uc.bar_info(f"API metrics exported to: {self.metrics_export_path}")
+        except OSError as e:
+            uc.bar_warn(f"Failed to export API metrics to '{self.metrics_export_path}': {e}")
+
     def ensure_required_api_client_version(self, available_api_client_version):
         """Ensure availability of the required 'threedi_api_client' version."""
         uc = UICommunication(self.iface, "3Di Models and Simulations")
@@ -5,22 +5,18 @@ import json
 import os
 import tempfile
 from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from enum import Enum
-from typing import List
+from typing import Any, Callable, Dict, Iterable, List
 from zipfile import ZIP_DEFLATED, ZipFile
 
-import requests
+from .api_calls.transfers import get_transfer_pool
 
 TEMPDIR = tempfile.gettempdir()
 PLUGIN_PATH = os.path.dirname(os.path.realpath(__file__))
 CACHE_PATH = os.path.join(PLUGIN_PATH, "_cached_data")
 TEMPLATE_PATH = os.path.join(CACHE_PATH, "templates.json")
-INITIAL_WATERLEVELS_TEMPLATE = os.path.join(CACHE_PATH, "initial_waterlevels.json")
-INITIAL_CONCENTRATIONS_TEMPLATE = os.path.join(CACHE_PATH, "initial_concentrations.json")
-BOUNDARY_CONDITIONS_TEMPLATE = os.path.join(CACHE_PATH, "boundary_conditions.json")
-LATERALS_FILE_TEMPLATE = os.path.join(CACHE_PATH, "laterals.json")
-DWF_FILE_TEMPLATE = os.path.join(CACHE_PATH, "dwf.json")
 CHUNK_SIZE = 1024**2
 RADAR_ID = "d6c2347d-7bd1-4d9d-a1f6-b342c865516f"
 API_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
@@ -175,13 +171,6 @@ def read_json_data(json_filepath):
         return data
 
 
-def write_json_data(values, json_file_template):
-    """Writing data to the JSON file."""
-    with open(json_file_template, "w") as json_file:
-        jsonf = json.dumps(values)
-        json_file.write(jsonf)
-
-
 def write_template(template_name, simulation_template):
     """Writing parameters as a template."""
     with open(TEMPLATE_PATH, "a"):
@@ -200,10 +189,16 @@ def write_template(template_name, simulation_template):
 def upload_local_file(upload, filepath):
     """Upload file."""
     with open(filepath, "rb") as file:
-        response = requests.put(upload.put_url, data=file)
+        response = get_transfer_pool().upload_fileobj(upload.put_url, file)
         return response
 
 
+def upload_json_data(upload, values):
+    """Upload JSON serialized data, streamed without writing it to a file."""
+    response = get_transfer_pool().upload_json(upload.put_url, values)
+    return response
+
+
 def file_cached(file_path):
     """Checking if file exists."""
     return os.path.isfile(file_path)
@@ -211,11 +206,9 @@ def file_cached(file_path):
 
 def get_download_file(download, file_path):
     """Getting file from Download object and writing it under given path."""
-    r = requests.get(download.get_url, stream=True, timeout=15)
     with open(file_path, "wb") as f:
-        for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
-            if chunk:
-                f.write(chunk)
+        for chunk in get_transfer_pool().iter_download(download.get_url, chunk_size=CHUNK_SIZE):
+            f.write(chunk)
 
 
 def is_file_checksum_equal(file_path, etag):
@@ -226,6 +219,20 @@ def is_file_checksum_equal(file_path, etag):
         return etag == md5_returned
 
 
+def file_checksum(file_path, chunk_size=CHUNK_SIZE):
+    """Calculate SHA-256 checksum of the file content."""
+    checksum = hashlib.sha256()
+    with open(file_path, "rb") as file_to_check:
+        for chunk in iter(lambda: file_to_check.read(chunk_size), b""):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def data_checksum(values):
+    """Calculate SHA-256 checksum of the JSON serializable data."""
+    return hashlib.sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
 def zip_into_archive(file_path, compression=ZIP_DEFLATED):
     """Zip file."""
     zip_filename = os.path.basename(file_path)
@@ -320,6 +327,31 @@ def split_to_even_chunks(collection, chunk_length):
     return [collection[i : i + chunk_length] for i in range(0, len(collection), chunk_length)]
 
 
+def timeseries_rain_events(values, offset, duration, units, interpolate, substances, chunk_length=300):
+    """Split rain time series into the time series rain events of at most `chunk_length` values.
+    Each event starts at its first time step, with the constant substance concentrations over its time steps.
+    """
+    events = []
+    for values_chunk in split_to_even_chunks(values, chunk_length):
+        chunk_offset = values_chunk[0][0]
+        event_values = [[t - chunk_offset, v] for t, v in values_chunk]
+        event_substances = [
+            {**substance, "concentrations": [[t, substance["concentrations"][0][1]] for t, _ in event_values]}
+            for substance in substances
+        ]
+        events.append(
+            {
+                "offset": offset + chunk_offset,
+                "duration": duration,
+                "values": event_values,
+                "units": units,
+                "interpolate": interpolate,
+                "substances": event_substances,
+            }
+        )
+    return events
+
+
 def intervals_are_even(time_series):
     """Check if intervals in the time series are all even."""
     expected_interval = time_series[1][0] - time_series[0][0]
@@ -351,6 +383,46 @@ def translate_illegal_chars(text, illegal_characters=r'\/:*?"<>|', replacement_c
     return sanitized_text
 
 
+def run_dependency_graph(
+    tasks: Dict[str, Callable[[], Any]],
+    dependencies: Dict[str, Iterable[str]],
+    max_workers: int = 4,
+    on_task_done: Callable[[str], None] = None,
+) -> Dict[str, Any]:
+    """Run tasks concurrently, each as soon as all the tasks it depends on are finished. Returns results by task name.
+
+    After the first task failure no more tasks are started, and its exception is raised once the running ones finish.
+    """
+    remaining = {name: set(dependencies.get(name, ())) for name in tasks}
+    unknown_tasks = set().union(*remaining.values()) - set(tasks)
+    if unknown_tasks:
+        raise ValueError(f"Unknown task dependencies: {', '.join(sorted(unknown_tasks))}")
+    results, running, error = {}, {}, None
+    with ThreadPoolExecutor(max_workers) as executor:
+        while running or (remaining and error is None):
+            if error is None:
+                for name in [name for name, task_dependencies in remaining.items() if not task_dependencies]:
+                    del remaining[name]
+                    running[executor.submit(tasks[name])] = name
+                if not running:
+                    raise ValueError(f"Cyclic task dependencies: {', '.join(sorted(remaining))}")
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                for task_dependencies in remaining.values():
+                    task_dependencies.discard(name)
+                if on_task_done is not None:
+                    on_task_done(name)
+    if error is not None:
+        raise error
+    return results
+
+
 class NestedObject:
     """A class to convert a nested dictionary into an object."""
 
@@ -11,6 +11,8 @@ from qgis.PyQt.QtCore import QTimer
 from threedi_api_client.openapi import ApiException
 
 from ..api_calls.threedi_calls import ThreediCalls, get_api_client_with_personal_api_token
+from ..api_calls.transfers import configure_transfer_pool, get_transfer_pool
+from ..api_calls.transports import resolve_transport
 from ..utils import extract_error_message
 
 base_dir = os.path.dirname(os.path.dirname(__file__))
@@ -105,8 +107,13 @@ class LogInDialog(uicls, basecls):
             username, personal_api_token = self.plugin_dock.plugin_settings.get_3di_auth()
             if not username or not personal_api_token:
                 raise AuthorizationException(missing_personal_api_key_message)
-            self.threedi_api = get_api_client_with_personal_api_token(personal_api_token, self.api_url)
-            tc = ThreediCalls(self.threedi_api)
+            transport = resolve_transport(self.plugin_dock.plugin_settings.transport)
+            self.threedi_api = get_api_client_with_personal_api_token(
+                personal_api_token, self.api_url, transport=transport
+            )
+            if get_transfer_pool().transport != transport:
+                configure_transfer_pool(transport=transport)
+            tc = ThreediCalls(self.threedi_api, cached=True)
             user_profile = tc.fetch_current_user()
             self.user = user_profile.username
             self.user_first_name = user_profile.first_name
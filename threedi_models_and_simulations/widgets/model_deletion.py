@@ -63,7 +63,7 @@ class ModelDeletionDialog(uicls, basecls):
         """Check 3Di models creation limits."""
         self.threedi_models_to_show.clear()
         try:
-            tc = ThreediCalls(self.threedi_api)
+            tc = ThreediCalls(self.threedi_api, cached=True)
             schematisation_limit_filters = {
                 "limit": tc.FETCH_LIMIT,
                 "schematisation_name": self.local_schematisation.name,
@@ -146,7 +146,7 @@ class ModelSelectionDialog(uicls, basecls):
             return
         schematisation_id = self.get_selected_model_schematisation()
         try:
-            tc = ThreediCalls(self.threedi_api)
+            tc = ThreediCalls(self.threedi_api, cached=True)
             model_schematisation = tc.fetch_schematisation(schematisation_id)
             model_schematisation_owner = model_schematisation.owner
             organisation = self.organisations.get(model_schematisation_owner)
@@ -153,7 +153,7 @@ class SimulationOverview(uicls, basecls):
                 events,
                 lizard_post_processing_overview,
                 organisation=self.model_selection_dlg.organisation,
-                api=ThreediCalls(self.threedi_api),
+                api=ThreediCalls(self.threedi_api, cached=True),
                 parent=self,
             )
             self.simulation_init_wizard.exec_()
@@ -164,7 +164,7 @@ class SimulationOverview(uicls, basecls):
         """Fetching simulation, settings and events data from the simulation template."""
         simulation, settings_overview, events, lizard_post_processing_overview = None, None, None, None
         try:
-            tc = ThreediCalls(self.threedi_api)
+            tc = ThreediCalls(self.threedi_api, cached=True)
             simulation = template.simulation
             sim_id = simulation.id
             settings_overview = tc.fetch_simulation_settings_overview(str(sim_id))
@@ -197,7 +197,13 @@ class SimulationOverview(uicls, basecls):
     def start_simulations(self, simulations_to_run):
         """Start the simulations."""
         upload_timeout = self.settings.value("threedi/timeout", 900, type=int)
-        simulations_runner = SimulationRunner(self.threedi_api, simulations_to_run, upload_timeout=upload_timeout)
+        concurrent_simulations = self.settings.value("threedi/concurrent_simulations", 1, type=int)
+        simulations_runner = SimulationRunner(
+            self.threedi_api,
+            simulations_to_run,
+            upload_timeout=upload_timeout,
+            max_concurrent_simulations=concurrent_simulations,
+        )
         simulations_runner.signals.initializing_simulations_progress.connect(self.on_initializing_progress)
         simulations_runner.signals.initializing_simulations_failed.connect(self.on_initializing_failed)
         simulations_runner.signals.initializing_simulations_finished.connect(self.on_initializing_finished)
@@ -214,7 +214,7 @@ class SimulationResults(uicls, basecls):
         working_dir = self.plugin_dock.plugin_settings.working_dir
         local_schematisations = list_local_schematisations(working_dir, use_config_for_revisions=False)
         try:
-            tc = ThreediCalls(self.plugin_dock.threedi_api)
+            tc = ThreediCalls(self.plugin_dock.threedi_api, cached=True)
             simulation = tc.fetch_simulation(sim_id)
             simulation_name = simulation.name
             simulation_model_id = int(simulation.threedimodel_id)
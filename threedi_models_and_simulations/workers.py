@@ -1,30 +1,33 @@
 # 3Di Models and Simulations for QGIS, licensed under GPLv2 or (at your option) any later version
 # Copyright (C) 2023 by Lutra Consulting for 3Di Water Management
 import base64
+import copy
 import json
 import logging
 import os
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import partial
 
-import requests
+from dateutil.parser import isoparse
 from PyQt5.QtNetwork import QNetworkRequest
-from qgis.PyQt.QtCore import QByteArray, QObject, QRunnable, QUrl, pyqtSignal, pyqtSlot
+from qgis.PyQt.QtCore import QByteArray, QObject, QRunnable, QTimer, QUrl, pyqtSignal, pyqtSlot
 from threedi_api_client.files import upload_file
 from threedi_api_client.openapi import ApiException
 from threedi_mi_utils import bypass_max_path_limit
 
+from .api_calls.filters import filter_items
+from .api_calls.polling import Poller
+from .api_calls.simulation_journal import SimulationJournal, batch_fingerprints, simulation_journal_path
 from .api_calls.threedi_calls import ThreediCalls
+from .api_calls.transfers import get_transfer_pool
+from .api_calls.upload_registry import UploadRegistry, upload_registry_path
 from .data_models import simulation_data_models as dm
 from .data_models.enumerators import SimulationStatusName
 from .utils import (
     API_DATETIME_FORMAT,
-    BOUNDARY_CONDITIONS_TEMPLATE,
     CHUNK_SIZE,
-    DWF_FILE_TEMPLATE,
-    INITIAL_CONCENTRATIONS_TEMPLATE,
-    INITIAL_WATERLEVELS_TEMPLATE,
-    LATERALS_FILE_TEMPLATE,
     RADAR_ID,
     TEMPDIR,
     RainEventTypes,
@@ -34,12 +37,15 @@ from .utils import (
     ThreediFileState,
     ThreediModelTaskStatus,
     UploadFileStatus,
+    data_checksum,
     extract_error_message,
+    file_checksum,
     get_download_file,
-    split_to_even_chunks,
+    run_dependency_graph,
+    timeseries_rain_events,
     unzip_archive,
+    upload_json_data,
     upload_local_file,
-    write_json_data,
     zip_into_archive,
 )
 
@@ -49,9 +55,26 @@ logger = logging.getLogger(__name__)
 class WSProgressesSentinel(QObject):
     """
     Worker object that will be moved to a separate thread and will check progresses of the running simulations.
-    This worker is fetching data through the websocket.
+    This worker is fetching data through the websocket, or by polling the API if websockets are not available.
     """
 
+    POLLING_INTERVAL = 5000  # milliseconds
+    ACTIVE_STATUS_NAMES = [
+        SimulationStatusName.QUEUED.value,
+        SimulationStatusName.STARTING.value,
+        SimulationStatusName.INITIALIZED.value,
+        SimulationStatusName.POSTPROCESSING.value,
+    ]
+    ACTIVE_STATUS_FIELDS = [
+        "simulation_id",
+        "simulation_name",
+        "simulation_user_first_name",
+        "simulation_user_last_name",
+        "created",
+        "name",
+        "time",
+    ]
+
     thread_finished = pyqtSignal(str)
     thread_failed = pyqtSignal(str)
     progresses_fetched = pyqtSignal(dict)
@@ -64,6 +87,7 @@ class WSProgressesSentinel(QObject):
         self.personal_api_key = personal_api_key
         self.tc = None
         self.ws_client = None
+        self.polling_timer = None
         self.running_simulations = {}
         self.model_id = model_id
 
@@ -78,15 +102,25 @@ class WSProgressesSentinel(QObject):
         try:
             self.tc = ThreediCalls(self.threedi_api)
             logger.debug("Fetching finished simulation statuses")
-            finished_simulations_statuses = self.tc.fetch_simulation_statuses(name=SimulationStatusName.FINISHED.value)
+            status_fields = [
+                "simulation_id",
+                "simulation_name",
+                "simulation_user_first_name",
+                "simulation_user_last_name",
+                "threedimodel_id",
+                "created",
+                "name",
+            ]
+            status_filters = {"name": SimulationStatusName.FINISHED.value}
             if self.model_id:
                 logger.debug(f"Filtering simulation statuses on model id {self.model_id}")
-                finished_simulations_statuses = (
-                    status for status in finished_simulations_statuses if status.threedimodel_id == self.model_id
-                )
+                status_filters["threedimodel_id"] = self.model_id
+            finished_simulations_statuses = self.tc.fetch_simulation_statuses_delta(
+                fields=status_fields, **status_filters
+            )
             finished_simulations_data = {
                 status.simulation_id: {
-                    "date_created": status.created.strftime(API_DATETIME_FORMAT),
+                    "date_created": isoparse(status.created).strftime(API_DATETIME_FORMAT),
                     "name": status.simulation_name,
                     "progress": 100,
                     "status": status.name,
@@ -115,15 +149,31 @@ class WSProgressesSentinel(QObject):
         except ImportError:
             QtWebSockets = None
         if QtWebSockets is None:
-            logger.error("QtWebSockets is not available. WebSocket will not work.")
+            logger.warning("QtWebSockets is not available, falling back to polling simulations progresses.")
+            self.start_polling()
             return
         self.ws_client = QtWebSockets.QWebSocket(version=QtWebSockets.QWebSocketProtocol.VersionLatest)
         self.ws_client.textMessageReceived.connect(self.all_simulations_progress_web_socket)
         self.ws_client.error.connect(self.websocket_error)
         self.ws_client.open(ws_request)
 
+    def start_polling(self):
+        """Start polling of active simulations progresses through the API."""
+        self.running_simulations.clear()
+        self.polling_timer = QTimer()
+        self.polling_timer.timeout.connect(self.all_simulations_progress_polling)
+        self.polling_timer.start(self.POLLING_INTERVAL)
+        self.all_simulations_progress_polling()
+
     def stop_listening(self, be_quite=False):
-        """Close websocket client."""
+        """Close websocket client or stop polling."""
+        if self.polling_timer is not None:
+            self.polling_timer.stop()
+            self.polling_timer.timeout.disconnect(self.all_simulations_progress_polling)
+            self.polling_timer = None
+            if be_quite is False:
+                stop_message = "Checking running simulation stopped."
+                self.thread_finished.emit(stop_message)
         if self.ws_client is not None:
             self.ws_client.textMessageReceived.disconnect(self.all_simulations_progress_web_socket)
             self.ws_client.error.disconnect(self.websocket_error)
@@ -161,16 +211,56 @@ class WSProgressesSentinel(QObject):
             sim_data["status"] = status_name
             if status_name == SimulationStatusName.FINISHED.value:
                 if sim_data["progress"] == 100:
-                    statuses = {status.simulation_id: status for status in self.tc.fetch_simulation_statuses()}
-                    sim_status = statuses[sim_id]
+                    sim_status = next(
+                        (status for status in self.tc.iter_simulation_statuses() if status.simulation_id == sim_id),
+                        None,
+                    )
                     sim_data["status"] = SimulationStatusName.FINISHED.value
-                    sim_data["simulation_user_first_name"] = sim_status.simulation_user_first_name
-                    sim_data["simulation_user_last_name"] = sim_status.simulation_user_last_name
-                    self.simulation_finished.emit({sim_id: sim_data})
+                    if sim_status is not None:
+                        sim_data["simulation_user_first_name"] = sim_status.simulation_user_first_name
+                        sim_data["simulation_user_last_name"] = sim_status.simulation_user_last_name
+                        self.simulation_finished.emit({sim_id: sim_data})
+                    else:
+                        # It will be listed with the other finished simulations on the next refresh
+                        logger.warning(f"Status of the finished simulation {sim_id} not found")
                 else:
                     sim_data["status"] = SimulationStatusName.STOPPED.value
         self.progresses_fetched.emit(self.running_simulations)
 
+    def all_simulations_progress_polling(self):
+        """Get all simulations progresses through the API - statuses are fetched in bulk."""
+        try:
+            active_statuses = self.tc.fetch_simulation_statuses_raw(
+                fields=self.ACTIVE_STATUS_FIELDS, name__in=",".join(self.ACTIVE_STATUS_NAMES)
+            )
+            statuses = {status.simulation_id: status for status in active_statuses}
+            # Simulations that are no longer active need their final status
+            ended_simulations = [sim_id for sim_id in self.running_simulations if sim_id not in statuses]
+            statuses.update(self.tc.fetch_current_statuses(ended_simulations))
+            progresses = self.tc.fetch_statuses_progresses(statuses)
+        except ApiException as e:
+            error_msg = extract_error_message(e)
+            self.thread_failed.emit(error_msg)
+            return
+        for sim_id, status in statuses.items():
+            if sim_id not in self.running_simulations:
+                first_name, last_name = status.simulation_user_first_name, status.simulation_user_last_name
+                self.running_simulations[sim_id] = {
+                    "name": status.simulation_name,
+                    "user_name": f"{first_name} {last_name}",
+                    "date_created": isoparse(status.created).strftime(API_DATETIME_FORMAT),
+                    "simulation_user_first_name": first_name,
+                    "simulation_user_last_name": last_name,
+                }
+            sim_data = self.running_simulations[sim_id]
+            sim_data["status"] = status.name
+            sim_data["progress"] = progresses[sim_id].percentage
+            if status.name == SimulationStatusName.FINISHED.value:
+                self.simulation_finished.emit({sim_id: sim_data})
+        self.progresses_fetched.emit(self.running_simulations)
+        for sim_id in ended_simulations:
+            del self.running_simulations[sim_id]
+
 
 class DownloadWorkerSignals(QObject):
     """Definition of the download worker signals."""
@@ -214,13 +304,11 @@ class DownloadProgressWorker(QRunnable):
             filename_path = bypass_max_path_limit(os.path.join(self.directory, filename), is_file=True)
             try:
                 os.makedirs(self.directory, exist_ok=True)
-                file_data = requests.get(download.get_url, stream=True, timeout=15)
                 with open(filename_path, "wb") as f:
-                    for chunk in file_data.iter_content(chunk_size=CHUNK_SIZE):
-                        if chunk:
-                            f.write(chunk)
-                            size += len(chunk)
-                            self.signals.download_progress.emit(size / total_size * 100, self.simulation_id)
+                    for chunk in get_transfer_pool().iter_download(download.get_url, chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+                        self.signals.download_progress.emit(size / total_size * 100, self.simulation_id)
                 if filename.lower().endswith(".zip"):
                     unzip_archive(filename_path)
                 continue
@@ -254,10 +342,11 @@ class RevisionUploadError(Exception):
 class UploadProgressWorker(QRunnable):
     """Worker object responsible for uploading models."""
 
-    UPLOAD_CHECK_INTERVAL = 10
-    UPLOAD_CHECK_RETRIES = 15
-    TASK_CHECK_INTERVAL = 2.5
-    TASK_CHECK_RETRIES = 4
+    UPLOAD_CHECK_TIMEOUT = 150
+    TASK_CHECK_TIMEOUT = 10
+    REVISION_VALIDATION_TIMEOUT = 600
+    MODEL_CHECKER_TIMEOUT = 1800
+    MODEL_TASKS_TIMEOUT = 7200
 
     def __init__(self, threedi_api, local_schematisation, upload_specification, upload_row_number):
         super().__init__()
@@ -361,7 +450,13 @@ class UploadProgressWorker(QRunnable):
         upload = self.tc.upload_schematisation_revision_sqlite(
             self.schematisation.id, self.revision.id, zipped_geopackage_file_name
         )
-        upload_file(upload.put_url, zipped_geopackage_filepath, CHUNK_SIZE, callback_func=self.monitor_upload_progress)
+        upload_file(
+            upload.put_url,
+            zipped_geopackage_filepath,
+            CHUNK_SIZE,
+            pool=get_transfer_pool().pool_manager,
+            callback_func=self.monitor_upload_progress,
+        )
         os.remove(zipped_geopackage_filepath)
         self.current_task_progress = 100
         self.report_upload_progress()
@@ -391,7 +486,13 @@ class UploadProgressWorker(QRunnable):
         raster_upload = self.tc.upload_schematisation_revision_raster(
             raster_revision.id, self.schematisation.id, self.revision.id, raster_file
         )
-        upload_file(raster_upload.put_url, raster_filepath, CHUNK_SIZE, callback_func=self.monitor_upload_progress)
+        upload_file(
+            raster_upload.put_url,
+            raster_filepath,
+            CHUNK_SIZE,
+            pool=get_transfer_pool().pool_manager,
+            callback_func=self.monitor_upload_progress,
+        )
         self.current_task_progress = 100
         self.report_upload_progress()
 
@@ -419,7 +520,7 @@ class UploadProgressWorker(QRunnable):
         self.current_task_progress = 0
         self.report_upload_progress()
         commit_ready_file_states = {FileState.UPLOADED, FileState.PROCESSED}
-        for i in range(self.UPLOAD_CHECK_RETRIES):
+        for _ in Poller("revision_files", self.UPLOAD_CHECK_TIMEOUT):
             before_commit_revision = self.tc.fetch_schematisation_revision(self.schematisation.id, self.revision.id)
             revision_files = [before_commit_revision.sqlite.file] + [r.file for r in before_commit_revision.rasters]
             revision_file_states = {FileState(file.state) for file in revision_files}
@@ -428,19 +529,33 @@ class UploadProgressWorker(QRunnable):
             elif FileState.ERROR in revision_file_states:
                 err = RevisionUploadError("Processing of the uploaded files failed!")
                 raise err
-            else:
-                time.sleep(self.UPLOAD_CHECK_INTERVAL)
         commit_message = self.upload_specification["commit_message"]
         self.tc.commit_schematisation_revision(self.schematisation.id, self.revision.id, commit_message=commit_message)
-        self.revision = self.tc.fetch_schematisation_revision(self.schematisation.id, self.revision.id)
-        while self.revision.is_valid is None:
-            time.sleep(2)
-            self.revision = self.tc.fetch_schematisation_revision(self.schematisation.id, self.revision.id)
+        self.revision = Poller("revision_validation", self.REVISION_VALIDATION_TIMEOUT).poll(
+            self.fetch_validated_revision, "Timed out while waiting for the revision validation."
+        )
         self.current_task_progress = 100
         self.report_upload_progress()
         self.local_schematisation.update_wip_revision(self.revision.number)
         self.signals.revision_committed.emit()
 
+    def fetch_validated_revision(self):
+        """Fetch the committed revision. Returns None until the revision is validated."""
+        revision = self.tc.fetch_schematisation_revision(self.schematisation.id, self.revision.id)
+        return revision if revision.is_valid is not None else None
+
+    def fetch_finished_model_checker_task(self, model_checker_task_id):
+        """Fetch the 'modelchecker' revision task. Returns None until the task succeeds."""
+        model_checker_task = self.tc.fetch_schematisation_revision_task(
+            model_checker_task_id, self.schematisation.id, self.revision.id
+        )
+        status = model_checker_task.status
+        if status == ThreediModelTaskStatus.SUCCESS.value:
+            return model_checker_task
+        elif status == ThreediModelTaskStatus.FAILURE.value:
+            raise RevisionUploadError(model_checker_task.detail["message"])
+        return None
+
     def create_3di_model_task(self, inherit_templates=False):
         """Run creation of the new model out of revision data."""
         self.current_task = "MAKE 3DI MODEL"
@@ -448,30 +563,20 @@ class UploadProgressWorker(QRunnable):
         self.report_upload_progress()
         # Wait for the 'modelchecker' validations
         model_checker_task = None
-        revision_tasks = self.tc.fetch_schematisation_revision_tasks(self.schematisation.id, self.revision.id)
-        for i in range(self.TASK_CHECK_RETRIES):
+        for _ in Poller("revision_task", self.TASK_CHECK_TIMEOUT):
+            revision_tasks = self.tc.fetch_schematisation_revision_tasks(self.schematisation.id, self.revision.id)
             for rtask in revision_tasks:
                 if rtask.name == "modelchecker":
                     model_checker_task = rtask
                     break
             if model_checker_task:
                 break
-            else:
-                time.sleep(self.TASK_CHECK_INTERVAL)
         if model_checker_task:
-            status = model_checker_task.status
-            while status != ThreediModelTaskStatus.SUCCESS.value:
-                model_checker_task = self.tc.fetch_schematisation_revision_task(
-                    model_checker_task.id, self.schematisation.id, self.revision.id
+            if model_checker_task.status != ThreediModelTaskStatus.SUCCESS.value:
+                model_checker_task = Poller("revision_task", self.MODEL_CHECKER_TIMEOUT).poll(
+                    partial(self.fetch_finished_model_checker_task, model_checker_task.id),
+                    "Timed out while waiting for the schematisation checker.",
                 )
-                status = model_checker_task.status
-                if status == ThreediModelTaskStatus.SUCCESS.value:
-                    break
-                elif status == ThreediModelTaskStatus.FAILURE.value:
-                    err = RevisionUploadError(model_checker_task.detail["message"])
-                    raise err
-                else:
-                    time.sleep(self.TASK_CHECK_INTERVAL)
             checker_errors = model_checker_task.detail["result"]["errors"]
             if checker_errors:
                 error_msg = "\n".join(error["description"] for error in checker_errors)
@@ -491,7 +596,7 @@ class UploadProgressWorker(QRunnable):
             "make_simulation_templates": False,
         }
         expected_tasks_number = len(finished_tasks)
-        while not all(finished_tasks.values()):
+        for _ in Poller("model_task", self.MODEL_TASKS_TIMEOUT):
             model_tasks = self.tc.fetch_3di_model_tasks(model_id)
             for task in model_tasks:
                 task_status = task.status
@@ -505,8 +610,10 @@ class UploadProgressWorker(QRunnable):
                 finished_tasks = {task_name: True for task_name in finished_tasks.keys()}
             finished_tasks_count = len([val for val in finished_tasks.values() if val])
             self.monitor_upload_progress(finished_tasks_count, expected_tasks_number)
-            if finished_tasks_count != expected_tasks_number:
-                time.sleep(self.TASK_CHECK_INTERVAL)
+            if finished_tasks_count == expected_tasks_number:
+                break
+        else:
+            raise RevisionUploadError("Timed out while waiting for the 3Di model generation.")
 
     def report_upload_progress(self):
         """Report upload progress."""
@@ -527,6 +634,12 @@ class SimulationRunnerError(Exception):
     pass
 
 
+class SimulationRunnerTimeoutError(SimulationRunnerError):
+    """Simulation runner processing timeout exception class."""
+
+    pass
+
+
 class SimulationRunnerSignals(QObject):
     """Definition of the simulation runner signals."""
 
@@ -541,13 +654,106 @@ class SimulationRunnerSignals(QObject):
 class SimulationRunner(QRunnable):
     """Worker object responsible for running simulations."""
 
-    def __init__(self, threedi_api, simulations_to_run, upload_timeout=900):
+    INITIAL_CONCENTRATION_TIMEOUT = 60
+    PRECIPITATION_CHUNK_SIZE = 300
+    SETUP_STEPS_WORKERS = 4
+    # Steps setting up the created simulation, with the steps they depend on (substance names are replaced with IDs).
+    # Steps without a dependency between them run concurrently, so they must not create the same kind of events nor
+    # look up the events or files created by each other. Laterals and DWF are both uploaded as the lateral files,
+    # so the DWF step runs after the laterals one.
+    SETUP_STEPS = {
+        "include_init_options": (),
+        "include_substances": (),
+        "include_boundary_conditions": ("include_substances",),
+        "include_structure_controls": (),
+        "include_initial_conditions": ("include_substances",),
+        "include_laterals": ("include_substances",),
+        "include_dwf": ("include_laterals",),
+        "include_breaches": (),
+        "include_precipitation": ("include_substances",),
+        "include_wind": (),
+        "include_settings": (),
+        "include_new_saved_state": (),
+        "include_lizard_post_processing": (),
+    }
+    # Simulation events created by the setup steps, checked before the partially run step is resumed. Partially run
+    # steps missing here can't be checked, so their simulation is set up from scratch instead of being resumed.
+    STEP_EVENTS = {
+        "include_init_options": (
+            "rasteredits",
+            "obstacleedits",
+            "lizardrastersourcessinks",
+            "lizardtimeseriessourcessinks",
+            "timeseriessourcessinks",
+            "lizardtimeseriesrain",
+            "localrain",
+        ),
+        "include_substances": ("substances",),
+        "include_boundary_conditions": ("fileboundaryconditions",),
+        "include_structure_controls": (
+            "filestructurecontrols",
+            "memorystructurecontrols",
+            "tablestructurecontrols",
+            "timedstructurecontrols",
+        ),
+        "include_initial_conditions": (
+            "initial_onedwaterlevel",
+            "initial_onedwaterlevelpredefined",
+            "initial_onedwaterlevelfile",
+            "initial_twodwaterlevel",
+            "initial_twodwaterraster",
+            "initial_groundwaterlevel",
+            "initial_groundwaterraster",
+            "initial_savedstate",
+            "initial_oned_substance_concentrations",
+            "initial_twod_substance_concentrations",
+        ),
+        "include_laterals": ("laterals", "filelaterals"),
+        "include_dwf": ("dwf_filelaterals",),
+        "include_breaches": ("breach",),
+        "include_precipitation": (
+            "timeseriesrain",
+            "bulktimeseriesrain",
+            "filetimeseriesrain",
+            "filerasterrain",
+            "lizardrasterrain",
+        ),
+        "include_wind": ("wind", "initial_winddragcoefficient"),
+        "include_new_saved_state": ("savedstates",),
+        # Single requests, failing without creating anything
+        "start_simulation": (),
+        "create_template": (),
+    }
+    # Step event keys selecting the part of the simulation events list shared with another step
+    STEP_EVENTS_FILTERS = {
+        "filelaterals": ("filelaterals", {"periodic__ne": "daily"}),
+        "dwf_filelaterals": ("filelaterals", {"periodic": "daily"}),
+    }
+
+    def __init__(self, threedi_api, simulations_to_run, upload_timeout=900, max_concurrent_simulations=1):
         super().__init__()
         self.threedi_api = threedi_api
         self.simulations_to_run = simulations_to_run
+        self.max_concurrent_simulations = max(1, min(max_concurrent_simulations, len(simulations_to_run)))
+        # Simulations are set up in parallel threads, each with its own current simulation and substances
+        self.local = threading.local()
+        self.progress_lock = threading.Lock()
+        # Model-level resources uploaded within the batch, by model ID, resource type and content checksum
+        self.uploads = {}
+        self.uploads_lock = threading.Lock()
+        self.upload_registry = None
+        # Setup progress of the simulations, resumed after the failed or interrupted run
+        self.journal = None
+        self.resumed_simulations = set()
+        # Potential breaches of the 3Di models by their connected point ID, resolved once per runner
+        self.potential_breaches = {}
+        self.potential_breaches_lock = threading.Lock()
         self.current_simulation: dm.NewSimulation = None
         self.upload_timeout = upload_timeout
         self.tc = None
+        # Workers of the setup steps of a single simulation, and of the API calls made within a single step
+        self.setup_workers = self.SETUP_STEPS_WORKERS
+        self.fetch_workers = ThreediCalls.FETCH_WORKERS
         self.signals = SimulationRunnerSignals()
         self.total_progress = 100
         self.steps_per_simulation = 10
@@ -556,6 +762,122 @@ class SimulationRunner(QRunnable):
         self.percentage_per_step = self.total_progress / self.number_of_steps
         self.substances = {}
 
+    @property
+    def current_simulation(self):
+        """Simulation set up by the current thread."""
+        return getattr(self.local, "current_simulation", None)
+
+    @current_simulation.setter
+    def current_simulation(self, simulation):
+        self.local.current_simulation = simulation
+
+    @property
+    def substances(self):
+        """Substance IDs (by substance name) of the simulation set up by the current thread."""
+        try:
+            return self.local.substances
+        except AttributeError:
+            substances = self.local.substances = {}
+            return substances
+
+    @substances.setter
+    def substances(self, substances):
+        self.local.substances = substances
+
+    def limit_concurrency(self, max_api_calls):
+        """Split the concurrent API calls limit between the nested thread pools of the runner.
+        Calls of all the threads check out clients from the same bounded pool, so the setup steps workers are shared
+        by the concurrent simulations, and the calls made within a step get what is left of the limit.
+        """
+        self.max_concurrent_simulations = min(self.max_concurrent_simulations, max_api_calls)
+        self.setup_workers = max(1, self.SETUP_STEPS_WORKERS // self.max_concurrent_simulations)
+        outer_workers = self.max_concurrent_simulations * self.setup_workers
+        self.fetch_workers = max(1, min(ThreediCalls.FETCH_WORKERS, max_api_calls // outer_workers))
+        self.tc.FETCH_WORKERS = self.fetch_workers
+
+    def simulation_file_path(self, file_path):
+        """Return path of the file generated for the simulation set up by the current thread."""
+        if self.max_concurrent_simulations == 1:
+            return file_path
+        simulation_number = next(i for i, sim in enumerate(self.simulations_to_run) if sim is self.current_simulation)
+        root, ext = os.path.splitext(file_path)
+        return f"{root}_{simulation_number}{ext}"
+
+    @staticmethod
+    def event_file_state(uploaded_file, file_state=False):
+        """Return processing state of the uploaded event file as (is valid, is invalid, state detail).
+        With `file_state` the state of the uploaded file itself is used (e.g. for the rain time series files,
+        which are processed into the separate events).
+        """
+        if file_state:
+            state = uploaded_file.file.state
+            invalid_states = (FileState.ERROR.value, FileState.REMOVED.value)
+            return state == FileState.PROCESSED.value, state in invalid_states, uploaded_file.file.state_description
+        valid = uploaded_file.state == ThreediFileState.VALID.value
+        return valid, uploaded_file.state == ThreediFileState.INVALID.value, uploaded_file.state_detail
+
+    def wait_for_event_file(self, event_name, filename, iter_files, fetch_file, file_state=False):
+        """Wait for the processing of the uploaded event file. Raises SimulationRunnerTimeoutError on timeout.
+        The file is looked up in the simulation files list once, then only that single file is polled.
+        """
+        uploaded_file = None
+        for _ in Poller("event_file", self.upload_timeout):
+            if uploaded_file is None:
+                uploaded_file = next((f for f in iter_files() if f.file.filename == filename), None)
+                if uploaded_file is None:
+                    continue
+            else:
+                uploaded_file = fetch_file(uploaded_file.id)
+            valid, invalid, state_detail = self.event_file_state(uploaded_file, file_state)
+            if valid:
+                return
+            elif invalid:
+                state_detail = str(state_detail).strip("{}").strip()
+                err_msg = f"Failed to upload {event_name} file due to the following reasons: {state_detail}"
+                raise SimulationRunnerError(err_msg)
+        raise SimulationRunnerTimeoutError(f"Timed out while waiting for the processing of the {event_name} file.")
+
+    def upload_event_file(
+        self, event_name, filename, create_upload, upload_content, iter_files, fetch_file, file_state=False
+    ):
+        """Upload the simulation event file and wait for its processing. Raises SimulationRunnerTimeoutError on timeout.
+        Files already uploaded to the resumed simulation by the interrupted run are not uploaded again.
+        """
+        uploaded_file = None
+        if self.current_simulation.simulation.id in self.resumed_simulations:
+            uploaded_file = next((f for f in iter_files() if f.file.filename == filename), None)
+        if uploaded_file is None or self.event_file_state(uploaded_file, file_state)[1]:
+            upload = create_upload()
+            upload_content(upload)
+            filename = upload.filename
+        self.wait_for_event_file(event_name, filename, iter_files, fetch_file, file_state)
+
+    def wait_for_raster_task(self, threedimodel_id, raster_id, err_msg):
+        """Wait for the processing of the uploaded 3Di model raster. Raises SimulationRunnerError on timeout.
+        The raster task is looked up in the model tasks list once, then only that single task is polled.
+        """
+        raster_task = None
+        for _ in Poller("raster_task", self.upload_timeout):
+            if raster_task is None:
+                raster_task = next(
+                    (
+                        task
+                        for task in self.tc.iter_3di_model_tasks(threedimodel_id)
+                        if task.params and raster_id in task.params.get("only_raster_ids", [])
+                    ),
+                    None,
+                )
+                if raster_task is None:
+                    continue
+            else:
+                raster_task = self.tc.fetch_3di_model_task(threedimodel_id, raster_task.id)
+            if raster_task.status == ThreediModelTaskStatus.SUCCESS.value:
+                break
+            elif raster_task.status == ThreediModelTaskStatus.FAILURE.value:
+                raise SimulationRunnerError(err_msg)
+        else:
+            raise SimulationRunnerError(f"{err_msg} (processing timed out)")
+
     def create_simulation(self):
         """Create a new simulation out of the NewSimulation data model."""
         simulation = self.tc.create_simulation(
@@ -668,13 +990,14 @@ class SimulationRunner(QRunnable):
             self.tc.create_obstacle_edits(sim_id, **obstacle_edit_data)
 
     def include_substances(self):
-        """Add substances to the new simulation."""
+        """Add substances to the new simulation. Returns substance IDs by substance name."""
         sim_id = self.current_simulation.simulation.id
         if self.current_simulation.substances:
             substances = self.current_simulation.substances.data
             for substance in substances:
                 substance_from_api = self.tc.create_simulation_substances(sim_id, **substance)
                 self.substances[substance["name"]] = substance_from_api.id
+        return dict(self.substances)
 
     def include_boundary_conditions(self):
         """Apply boundary conditions to the new simulation."""
@@ -682,19 +1005,15 @@ class SimulationRunner(QRunnable):
         sim_name = self.current_simulation.name
         boundary_conditions = self.current_simulation.boundary_conditions
 
-        def upload_file_boundary_conditions(filename, filepath):
-            bc_upload = self.tc.create_simulation_boundarycondition_file(sim_id, filename=filename)
-            upload_local_file(bc_upload, filepath)
-            for ti in range(int(self.upload_timeout // 2)):
-                uploaded_bc = self.tc.fetch_boundarycondition_files(sim_id)[0]
-                if uploaded_bc.state == ThreediFileState.VALID.value:
-                    break
-                elif uploaded_bc.state == ThreediFileState.INVALID.value:
-                    state_detail = str(uploaded_bc.state_detail).strip("{}").strip()
-                    err_msg = f"Failed to upload Boundary Conditions file due to the following reasons: {state_detail}"
-                    raise SimulationRunnerError(err_msg)
-                else:
-                    time.sleep(2)
+        def upload_file_boundary_conditions(filename, data):
+            self.upload_event_file(
+                "Boundary Conditions",
+                filename,
+                lambda: self.tc.create_simulation_boundarycondition_file(sim_id, filename=filename),
+                lambda bc_upload: upload_json_data(bc_upload, data),
+                lambda: self.tc.iter_boundarycondition_files(sim_id),
+                lambda bc_id: self.tc.fetch_boundarycondition_file(sim_id, bc_id),
+            )
 
         if boundary_conditions.data:
             boundary_conditions_data = boundary_conditions.data
@@ -706,9 +1025,8 @@ class SimulationRunner(QRunnable):
                         if substance_name in self.substances:
                             substance_id = self.substances[substance_name]
                             substance["substance"] = substance_id
-            write_json_data(boundary_conditions_data, BOUNDARY_CONDITIONS_TEMPLATE)
             bc_file_name = f"{sim_name}_boundary_conditions.json"
-            upload_file_boundary_conditions(bc_file_name, BOUNDARY_CONDITIONS_TEMPLATE)
+            upload_file_boundary_conditions(bc_file_name, boundary_conditions_data)
 
     def include_structure_controls(self):
         """Apply structure controls to the new simulation."""
@@ -718,26 +1036,21 @@ class SimulationRunner(QRunnable):
         structure_controls = self.current_simulation.structure_controls
 
         def upload_file_structure_controls(filename, filepath, offset):
-            sc_upload = self.tc.create_simulation_structure_control_file(sim_id, filename=filename, offset=offset)
-            upload_local_file(sc_upload, filepath)
-            for ti in range(int(self.upload_timeout // 2)):
-                uploaded_files = {scf.file.filename: scf for scf in self.tc.fetch_structure_control_files(sim_id)}
-                uploaded_sc = uploaded_files[sc_upload.filename]
-                if uploaded_sc.state == ThreediFileState.VALID.value:
-                    break
-                elif uploaded_sc.state == ThreediFileState.INVALID.value:
-                    state_detail = str(uploaded_sc.state_detail).strip("{}").strip()
-                    err_msg = f"Failed to upload Structure Controls file due to the following reasons: {state_detail}"
-                    raise SimulationRunnerError(err_msg)
-                else:
-                    time.sleep(2)
+            self.upload_event_file(
+                "Structure Controls",
+                filename,
+                lambda: self.tc.create_simulation_structure_control_file(sim_id, filename=filename, offset=offset),
+                lambda sc_upload: upload_local_file(sc_upload, filepath),
+                lambda: self.tc.iter_structure_control_files(sim_id),
+                lambda sc_id: self.tc.fetch_structure_control_file(sim_id, sc_id),
+            )
 
         if structure_controls.file_structure_controls:
             sc_file = structure_controls.file_structure_controls
             sc_file_download = self.tc.fetch_structure_control_file_download(sim_temp_id, sc_file.id)
             sc_file_name = sc_file.file.filename
             sc_file_offset = sc_file.offset
-            sc_filepath = os.path.join(TEMPDIR, sc_file_name)
+            sc_filepath = self.simulation_file_path(os.path.join(TEMPDIR, sc_file_name))
             get_download_file(sc_file_download, sc_filepath)
             upload_file_structure_controls(sc_file_name, sc_filepath, sc_file_offset)
             os.remove(sc_filepath)
@@ -762,6 +1075,172 @@ class SimulationRunner(QRunnable):
             }
             self.tc.create_simulation_structure_control_timed(sim_id, **sc_timed_data)
 
+    def upload_once(self, upload_key, upload_function):
+        """Upload (and wait for processing of) the model-level resource once per batch.
+        Simulations uploading the same content share the result of the first upload.
+        """
+        with self.uploads_lock:
+            upload_future = self.uploads.get(upload_key)
+            first_upload = upload_future is None
+            if first_upload:
+                upload_future = self.uploads[upload_key] = Future()
+        if first_upload:
+            try:
+                upload_future.set_result(upload_function())
+            except Exception as e:
+                # Let the simulations waiting for this upload fail, but the later ones try it again
+                with self.uploads_lock:
+                    del self.uploads[upload_key]
+                upload_future.set_exception(e)
+        return upload_future.result()
+
+    def registered_upload(self, threedimodel_id, resource_type, content_checksum, upload_function, fetch_valid):
+        """Upload model-level resource once per batch, or reuse the valid one registered by the previous uploads.
+        The `fetch_valid` function returns the registered resource (like `upload_function` does) if it is still valid.
+        """
+
+        def reuse_or_upload():
+            registered_id = self.upload_registry.get(threedimodel_id, resource_type, content_checksum)
+            if registered_id is not None:
+                try:
+                    resource = fetch_valid(registered_id)
+                except ApiException as e:
+                    if e.status != 404:
+                        raise
+                    resource = None
+                if resource is not None:
+                    logger.info(f"Reusing registered {resource_type} (ID: {registered_id}), upload skipped")
+                    return resource
+                self.upload_registry.remove(threedimodel_id, resource_type, content_checksum)
+            resource = upload_function()
+            if resource is not None:
+                resource_id = getattr(resource, "id", resource)
+                self.upload_registry.register(threedimodel_id, resource_type, content_checksum, resource_id)
+            return resource
+
+        return self.upload_once((threedimodel_id, resource_type, content_checksum), reuse_or_upload)
+
+    def fetch_valid_initial_waterlevel(self, threedimodel_id, initial_waterlevel_id):
+        """Fetch initial water level with given ID, if it is valid."""
+        initial_waterlevel = self.tc.fetch_3di_model_initial_waterlevel(threedimodel_id, initial_waterlevel_id)
+        return initial_waterlevel if initial_waterlevel.state == ThreediFileState.VALID.value else None
+
+    def fetch_valid_initial_concentration(self, threedimodel_id, initial_concentration_id):
+        """Fetch initial concentration with given ID, if it is valid."""
+        initial_concentration = self.tc.fetch_3di_model_initial_concentration(threedimodel_id, initial_concentration_id)
+        return initial_concentration if initial_concentration.state == ThreediFileState.VALID.value else None
+
+    def fetch_valid_initial_concentration_raster(self, threedimodel_id, raster_id):
+        """Return given initial concentration raster ID, if its initial concentration is valid."""
+        initial_concentration = next(
+            self.tc.iter_3di_model_initial_concentrations(
+                threedimodel_id, dimension="two_d", source_raster_id=raster_id
+            ),
+            None,
+        )
+        if initial_concentration is not None and initial_concentration.state == ThreediFileState.VALID.value:
+            return raster_id
+        return None
+
+    def upload_initial_waterlevels_1d(self, threedimodel_id, initial_waterlevels_1d, filename):
+        """Upload 1D initial water levels of the 3Di model and wait for processing. Returns initial water level ID."""
+        # Steps to upload initial 1D water levels file
+        # Step 1: Create a new initial water level instance for this model
+        initial_waterlevel_instance = self.tc.create_initial_water_level(threedimodel_id, dimension="one_d")
+        initial_waterlevel_id = initial_waterlevel_instance.id
+        # Step 2: Create an upload instance for the initial waterl level
+        initial_waterlevel_upload = self.tc.upload_initial_water_level(
+            threedimodel_id, initial_waterlevel_id, filename=filename
+        )
+        upload_json_data(initial_waterlevel_upload, initial_waterlevels_1d)
+        # Step 3: Wait for the data to be processed (initial_waterlevel.state == "valid")
+        for _ in Poller("initial_waterlevel", self.upload_timeout):
+            uploaded_initial_waterlevel = self.tc.fetch_3di_model_initial_waterlevel(
+                threedimodel_id, initial_waterlevel_id
+            )
+            if uploaded_initial_waterlevel.state == ThreediFileState.VALID.value:
+                break
+            elif uploaded_initial_waterlevel.state == ThreediFileState.INVALID.value:
+                state_detail = str(uploaded_initial_waterlevel.state_detail).strip("{}").strip()
+                err_msg = f"Failed to upload Initial Waterlevel file due to the following reasons: {state_detail}"
+                raise SimulationRunnerError(err_msg)
+
+        if uploaded_initial_waterlevel.state != ThreediFileState.VALID.value:
+            state_detail = str(uploaded_initial_waterlevel.state_detail).strip("{}").strip()
+            err_msg = f"Failed to upload Initial Waterlevel file due to the following reasons: {state_detail}"
+            raise SimulationRunnerError(err_msg)
+        return initial_waterlevel_id
+
+    def upload_initial_waterlevel_raster(self, threedimodel_id, local_raster, raster_type, error_msg):
+        """Upload initial (groundwater) water level raster of the 3Di model and wait for processing.
+        Returns created initial water level.
+        """
+        local_raster_name = os.path.basename(local_raster)
+        initial_water_level_raster = self.tc.create_3di_model_raster(
+            threedimodel_id, name=local_raster_name, type=raster_type
+        )
+        initial_wl_raster_id = initial_water_level_raster.id
+        init_water_level_upload = self.tc.upload_3di_model_raster(
+            threedimodel_id,
+            initial_wl_raster_id,
+            filename=local_raster_name,
+        )
+        upload_local_file(init_water_level_upload, local_raster)
+        self.wait_for_raster_task(threedimodel_id, initial_wl_raster_id, f"{error_msg}: {local_raster_name}")
+        for iw in self.tc.iter_3di_model_initial_waterlevels(threedimodel_id):
+            if iw.source_raster_id == initial_wl_raster_id:
+                return iw
+        return None
+
+    def upload_initial_concentration_1d(self, threedimodel_id, local_data, filename):
+        """Upload 1D initial concentrations of the 3Di model and wait for processing.
+        Returns created initial concentration.
+        """
+        # create a new initial concentration
+        initial_concentration_1d = self.tc.create_3di_model_initial_concentration(
+            threedimodel_id=threedimodel_id, dimension="one_d"
+        )
+
+        # create an upload url
+        initial_concentration_upload = self.tc.upload_3di_model_initial_concentration(
+            threedimodel_id=threedimodel_id,
+            initial_concentration_id=initial_concentration_1d.id,
+            filename=filename,
+        )
+
+        # now upload the data (in json format)
+        upload_json_data(initial_concentration_upload, local_data)
+
+        # wait until the data is processed
+        newly_generated_id = initial_concentration_1d.id
+        for _ in Poller("initial_concentration", self.INITIAL_CONCENTRATION_TIMEOUT):
+            generated_concentration = self.tc.fetch_3di_model_initial_concentration(threedimodel_id, newly_generated_id)
+            if generated_concentration.state == ThreediFileState.VALID.value:
+                return generated_concentration
+            elif generated_concentration.state == ThreediFileState.INVALID.value:
+                state_detail = str(generated_concentration.state_detail).strip("{}").strip()
+                err_msg = f"Failed to upload Initial Concentration file due to the following reasons: {state_detail}"
+                raise SimulationRunnerError(err_msg)
+        raise SimulationRunnerError(f"Processing of the 1D initial concentrations file timed out: {filename}")
+
+    def upload_initial_concentration_raster(self, threedimodel_id, local_raster_path):
+        """Upload initial concentration raster of the 3Di model and wait for processing. Returns created raster ID."""
+        # Create a 3Di model raster
+        local_raster_ic_name = os.path.basename(local_raster_path)
+        raster = self.tc.create_3di_model_raster(
+            threedimodel_id, name=local_raster_ic_name, type="initial_concentration_file"
+        )
+        raster_id = raster.id
+        # Upload the raster
+        initial_concentration_raster_upload = self.tc.upload_3di_model_raster(
+            threedimodel_id, raster_id, filename=local_raster_ic_name
+        )
+        upload_local_file(initial_concentration_raster_upload, local_raster_path)
+        # Wait for the raster processing
+        error_msg = f"Failed to process Initial Concentration raster: {local_raster_ic_name}"
+        self.wait_for_raster_task(threedimodel_id, raster_id, error_msg)
+        return raster_id
+
     def include_initial_conditions(self):
         """Add initial conditions to the new simulation."""
         sim_id = self.current_simulation.simulation.id
@@ -774,35 +1253,17 @@ class SimulationRunner(QRunnable):
         if initial_conditions.from_geopackage_1d:
             self.tc.create_simulation_initial_1d_water_level_predefined(sim_id)
         if initial_conditions.initial_waterlevels_1d is not None:
-            write_json_data(initial_conditions.initial_waterlevels_1d, INITIAL_WATERLEVELS_TEMPLATE)
+            initial_waterlevels_1d = initial_conditions.initial_waterlevels_1d
             filename = f"{sim_name}_1d_initial_waterlevels.json"
-            # Steps to upload initial 1D water levels file
-            # Step 1: Create a new initial water level instance for this model
-            initial_waterlevel_instance = self.tc.create_initial_water_level(threedimodel_id, dimension="one_d")
-            initial_waterlevel_id = initial_waterlevel_instance.id
-            # Step 2: Create an upload instance for the initial waterl level
-            initial_waterlevel_upload = self.tc.upload_initial_water_level(
-                threedimodel_id, initial_waterlevel_id, filename=filename
+            initial_waterlevel_id = self.registered_upload(
+                threedimodel_id,
+                "initial_waterlevels_1d",
+                data_checksum(initial_waterlevels_1d),
+                partial(self.upload_initial_waterlevels_1d, threedimodel_id, initial_waterlevels_1d, filename),
+                lambda registered_id: (
+                    registered_id if self.fetch_valid_initial_waterlevel(threedimodel_id, registered_id) else None
+                ),
             )
-            upload_local_file(initial_waterlevel_upload, INITIAL_WATERLEVELS_TEMPLATE)
-            # Step 3: Wait for the data to be processed (initial_waterlevel.state == "valid")
-            for ti in range(int(self.upload_timeout // 2)):
-                uploaded_initial_waterlevel = self.tc.fetch_3di_model_initial_waterlevel(
-                    threedimodel_id, initial_waterlevel_id
-                )
-                if uploaded_initial_waterlevel.state == ThreediFileState.VALID.value:
-                    break
-                elif uploaded_initial_waterlevel.state == ThreediFileState.INVALID.value:
-                    state_detail = str(uploaded_initial_waterlevel.state_detail).strip("{}").strip()
-                    err_msg = f"Failed to upload Initial Waterlevel file due to the following reasons: {state_detail}"
-                    raise SimulationRunnerError(err_msg)
-                else:
-                    time.sleep(2)
-
-            if uploaded_initial_waterlevel.state != ThreediFileState.VALID.value:
-                state_detail = str(uploaded_initial_waterlevel.state_detail).strip("{}").strip()
-                err_msg = f"Failed to upload Initial Waterlevel file due to the following reasons: {state_detail}"
-                raise SimulationRunnerError(err_msg)
 
         # These options should be mutually exclusive
         assert not (
@@ -833,41 +1294,20 @@ class SimulationRunner(QRunnable):
         if initial_conditions.global_value_2d is not None:
             self.tc.create_simulation_initial_2d_water_level_constant(sim_id, value=initial_conditions.global_value_2d)
         if initial_conditions.online_raster_2d is None and initial_conditions.local_raster_2d is not None:
-            local_raster_2d_name = os.path.basename(initial_conditions.local_raster_2d)
-            initial_water_level_raster_2d = self.tc.create_3di_model_raster(
-                threedimodel_id, name=local_raster_2d_name, type="initial_waterlevel_file"
-            )
-            initial_wl_raster_2d_id = initial_water_level_raster_2d.id
-            init_water_level_upload_2d = self.tc.upload_3di_model_raster(
+            local_raster_2d = initial_conditions.local_raster_2d
+            initial_conditions.online_raster_2d = self.registered_upload(
                 threedimodel_id,
-                initial_wl_raster_2d_id,
-                filename=local_raster_2d_name,
+                "initial_waterlevel_file",
+                file_checksum(local_raster_2d),
+                partial(
+                    self.upload_initial_waterlevel_raster,
+                    threedimodel_id,
+                    local_raster_2d,
+                    "initial_waterlevel_file",
+                    "Failed to process 2D raster",
+                ),
+                partial(self.fetch_valid_initial_waterlevel, threedimodel_id),
             )
-            upload_local_file(init_water_level_upload_2d, initial_conditions.local_raster_2d)
-            raster_task_2d = None
-            for ti in range(int(self.upload_timeout // 2)):
-                if raster_task_2d is None:
-                    model_tasks = self.tc.fetch_3di_model_tasks(threedimodel_id)
-                    for task in model_tasks:
-                        try:
-                            if initial_wl_raster_2d_id in task.params["only_raster_ids"]:
-                                raster_task_2d = task
-                                break
-                        except KeyError:
-                            continue
-                else:
-                    raster_task_2d = self.tc.fetch_3di_model_task(threedimodel_id, raster_task_2d.id)
-                if raster_task_2d and raster_task_2d.status == ThreediModelTaskStatus.SUCCESS.value:
-                    break
-                elif raster_task_2d and raster_task_2d.status == ThreediModelTaskStatus.FAILURE.value:
-                    raise SimulationRunnerError(f"Failed to process 2D raster: {local_raster_2d_name}")
-                else:
-                    time.sleep(2)
-            initial_waterlevels = self.tc.fetch_3di_model_initial_waterlevels(threedimodel_id)
-            for iw in initial_waterlevels:
-                if iw.source_raster_id == initial_wl_raster_2d_id:
-                    initial_conditions.online_raster_2d = iw
-                    break
         if initial_conditions.online_raster_2d is not None:
             try:
                 self.tc.create_simulation_initial_2d_water_level_raster(
@@ -887,43 +1327,20 @@ class SimulationRunner(QRunnable):
             initial_conditions.online_raster_groundwater is None
             and initial_conditions.local_raster_groundwater is not None
         ):
-            local_raster_gw_name = os.path.basename(initial_conditions.local_raster_groundwater)
-            initial_water_level_raster_gw = self.tc.create_3di_model_raster(
-                threedimodel_id,
-                name=local_raster_gw_name,
-                type="initial_groundwater_level_file",
-            )
-            initial_wl_raster_gw_id = initial_water_level_raster_gw.id
-            init_water_level_upload_gw = self.tc.upload_3di_model_raster(
+            local_raster_groundwater = initial_conditions.local_raster_groundwater
+            initial_conditions.online_raster_groundwater = self.registered_upload(
                 threedimodel_id,
-                initial_wl_raster_gw_id,
-                filename=local_raster_gw_name,
+                "initial_groundwater_level_file",
+                file_checksum(local_raster_groundwater),
+                partial(
+                    self.upload_initial_waterlevel_raster,
+                    threedimodel_id,
+                    local_raster_groundwater,
+                    "initial_groundwater_level_file",
+                    "Failed to process Groundwater raster",
+                ),
+                partial(self.fetch_valid_initial_waterlevel, threedimodel_id),
             )
-            upload_local_file(init_water_level_upload_gw, initial_conditions.local_raster_groundwater)
-            raster_task_gw = None
-            for ti in range(int(self.upload_timeout // 2)):
-                if raster_task_gw is None:
-                    model_tasks = self.tc.fetch_3di_model_tasks(threedimodel_id)
-                    for task in model_tasks:
-                        try:
-                            if initial_wl_raster_gw_id in task.params["only_raster_ids"]:
-                                raster_task_gw = task
-                                break
-                        except KeyError:
-                            continue
-                else:
-                    raster_task_gw = self.tc.fetch_3di_model_task(threedimodel_id, raster_task_gw.id)
-                if raster_task_gw and raster_task_gw.status == ThreediModelTaskStatus.SUCCESS.value:
-                    break
-                elif raster_task_gw and raster_task_gw.status == ThreediModelTaskStatus.FAILURE.value:
-                    raise SimulationRunnerError(f"Failed to process Groundwater raster: {local_raster_gw_name}")
-                else:
-                    time.sleep(2)
-            initial_waterlevels = self.tc.fetch_3di_model_initial_waterlevels(threedimodel_id)
-            for iw in initial_waterlevels:
-                if iw.source_raster_id == initial_wl_raster_gw_id:
-                    initial_conditions.online_raster_groundwater = iw
-                    break
         if initial_conditions.online_raster_groundwater is not None:
             try:
                 self.tc.create_simulation_initial_groundwater_level_raster(
@@ -947,46 +1364,25 @@ class SimulationRunner(QRunnable):
                 online_file = params.get("online_file")
                 if online_file is not None:
                     # find the initial concentration refering to this file.
-                    results = self.tc.fetch_3di_model_initial_concentrations(threedimodel_id)
-                    one_d_ids = [x for x in results if x.dimension == "one_d" and x.file == online_file]
-                    if len(one_d_ids) > 0:
-                        initial_concentration_1d = one_d_ids[0]
+                    initial_concentration_1d = next(
+                        (
+                            x
+                            for x in self.tc.iter_3di_model_initial_concentrations(threedimodel_id, dimension="one_d")
+                            if x.file == online_file
+                        ),
+                        None,
+                    )
                 else:
                     assert local_data is not None
-
-                    # create a new initial concentration
-                    initial_concentration_1d = self.tc.create_3di_model_initial_concentration(
-                        threedimodel_id=threedimodel_id, dimension="one_d"
-                    )
-
-                    # create an upload url
-                    initial_concentration_upload = self.tc.upload_3di_model_initial_concentration(
-                        threedimodel_id=threedimodel_id,
-                        initial_concentration_id=initial_concentration_1d.id,
-                        filename=f"{sim_name}_initial_concent_1d.json",
+                    filename = f"{sim_name}_initial_concent_1d.json"
+                    initial_concentration_1d = self.registered_upload(
+                        threedimodel_id,
+                        "initial_concentration_1d",
+                        data_checksum(local_data),
+                        partial(self.upload_initial_concentration_1d, threedimodel_id, local_data, filename),
+                        partial(self.fetch_valid_initial_concentration, threedimodel_id),
                     )
 
-                    # now write and upload the data (in json format)
-                    write_json_data(local_data, INITIAL_CONCENTRATIONS_TEMPLATE)
-                    upload_local_file(initial_concentration_upload, INITIAL_CONCENTRATIONS_TEMPLATE)
-
-                    # wait until the data is processed
-                    retries = 0
-                    newly_generated_id = initial_concentration_1d.id
-                    initial_concentration_1d = None
-                    while not initial_concentration_1d and retries < 12:
-                        results = self.tc.fetch_3di_model_initial_concentrations(threedimodel_id)
-                        one_d_ids = [
-                            x
-                            for x in results
-                            if x.dimension == "one_d" and x.state == "valid" and x.id == newly_generated_id
-                        ]
-                        if len(one_d_ids) > 0:
-                            initial_concentration_1d = one_d_ids[0]
-                            break
-                        retries += 1
-                        time.sleep(5)
-
                 assert initial_concentration_1d is not None
                 self.tc.create_simulation_initial_1d_substance_concentrations(
                     sim_id,
@@ -1005,50 +1401,25 @@ class SimulationRunner(QRunnable):
                 if online_raster:
                     raster_id = online_raster
                 elif local_raster_path:
-                    # Create a 3Di model raster
-                    local_raster_ic_name = os.path.basename(local_raster_path)
-                    raster = self.tc.create_3di_model_raster(
-                        threedimodel_id, name=local_raster_ic_name, type="initial_concentration_file"
-                    )
-                    raster_id = raster.id
-                    # Upload the raster
-                    initial_concentration_raster_upload = self.tc.upload_3di_model_raster(
-                        threedimodel_id, raster_id, filename=local_raster_ic_name
+                    raster_id = self.registered_upload(
+                        threedimodel_id,
+                        "initial_concentration_file",
+                        file_checksum(local_raster_path),
+                        partial(self.upload_initial_concentration_raster, threedimodel_id, local_raster_path),
+                        partial(self.fetch_valid_initial_concentration_raster, threedimodel_id),
                     )
-                    upload_local_file(initial_concentration_raster_upload, local_raster_path)
-                    # Wait for the raster processing
-                    raster_task_ic = None
-                    for ti in range(int(self.upload_timeout // 2)):
-                        if raster_task_ic is None:
-                            model_tasks = self.tc.fetch_3di_model_tasks(threedimodel_id)
-                            for task in model_tasks:
-                                try:
-                                    if task.params and raster_id in task.params.get("only_raster_ids", []):
-                                        raster_task_ic = task
-                                        break
-                                except KeyError:
-                                    continue
-                        else:
-                            raster_task_ic = self.tc.fetch_3di_model_task(threedimodel_id, raster_task_ic.id)
-                        if raster_task_ic and raster_task_ic.status == ThreediModelTaskStatus.SUCCESS.value:
-                            break
-                        elif raster_task_ic and raster_task_ic.status == ThreediModelTaskStatus.FAILURE.value:
-                            error_msg = f"Failed to process Initial Concentration raster: {local_raster_ic_name}"
-                            raise SimulationRunnerError(error_msg)
-                        else:
-                            time.sleep(2)
                 if raster_id:
                     # Wait for the processing of initial concentration file to finish
-                    retries = 0
                     initial_concentration_2d = None
-                    while not initial_concentration_2d and retries < 12:
-                        results = self.tc.fetch_3di_model_initial_concentrations(threedimodel_id)
-                        two_d_ids = [x for x in results if x.dimension == "two_d" and x.source_raster_id == raster_id]
-                        if len(two_d_ids) > 0:
-                            initial_concentration_2d = two_d_ids[0]
+                    for _ in Poller("initial_concentration", self.INITIAL_CONCENTRATION_TIMEOUT):
+                        initial_concentration_2d = next(
+                            self.tc.iter_3di_model_initial_concentrations(
+                                threedimodel_id, dimension="two_d", source_raster_id=raster_id
+                            ),
+                            None,
+                        )
+                        if initial_concentration_2d:
                             break
-                        retries += 1
-                        time.sleep(5)
                     if initial_concentration_2d:
                         # Link substance to initial concentration
                         try:
@@ -1086,21 +1457,15 @@ class SimulationRunner(QRunnable):
                         if substance_name in self.substances:
                             substance_id = self.substances[substance_name]
                             substance["substance"] = substance_id
-            write_json_data(file_lateral_values, LATERALS_FILE_TEMPLATE)
             filename = f"{sim_name}_laterals.json"
-            upload_event_file = self.tc.create_simulation_lateral_file(sim_id, filename=filename, offset=0)
-            upload_local_file(upload_event_file, LATERALS_FILE_TEMPLATE)
-            for ti in range(int(self.upload_timeout // 2)):
-                lateral_files = self.tc.fetch_lateral_files(sim_id)
-                uploaded_lateral = next((file for file in lateral_files if file.periodic != "daily"), None)
-                if uploaded_lateral.state == ThreediFileState.VALID.value:
-                    break
-                elif uploaded_lateral.state == ThreediFileState.INVALID.value:
-                    state_detail = str(uploaded_lateral.state_detail).strip("{}").strip()
-                    err_msg = f"Failed to upload Laterals file due to the following reasons: {state_detail}"
-                    raise SimulationRunnerError(err_msg)
-                else:
-                    time.sleep(2)
+            self.upload_event_file(
+                "Laterals",
+                filename,
+                lambda: self.tc.create_simulation_lateral_file(sim_id, filename=filename, offset=0),
+                lambda upload: upload_json_data(upload, file_lateral_values),
+                lambda: self.tc.iter_lateral_files(sim_id, periodic__ne="daily"),
+                lambda lateral_id: self.tc.fetch_lateral_file(sim_id, lateral_id),
+            )
 
     def include_dwf(self):
         """Add Dry Weather Flow to the new simulation."""
@@ -1108,58 +1473,70 @@ class SimulationRunner(QRunnable):
         sim_name = self.current_simulation.name
         if self.current_simulation.dwf:
             dwf_values = list(self.current_simulation.dwf.data.values())
-            write_json_data(dwf_values, DWF_FILE_TEMPLATE)
             filename = f"{sim_name}_dwf.json"
-            upload_event_file = self.tc.create_simulation_lateral_file(
-                sim_id,
-                filename=filename,
-                offset=0,
-                periodic="daily",
+            self.upload_event_file(
+                "Dry Weather Flow",
+                filename,
+                lambda: self.tc.create_simulation_lateral_file(sim_id, filename=filename, offset=0, periodic="daily"),
+                lambda upload: upload_json_data(upload, dwf_values),
+                lambda: self.tc.iter_lateral_files(sim_id, periodic="daily"),
+                lambda dwf_id: self.tc.fetch_lateral_file(sim_id, dwf_id),
             )
-            upload_local_file(upload_event_file, DWF_FILE_TEMPLATE)
-            for ti in range(int(self.upload_timeout // 2)):
-                lateral_files = self.tc.fetch_lateral_files(sim_id)
-                uploaded_dwf = next((file for file in lateral_files if file.periodic == "daily"), None)
-                if uploaded_dwf.state == ThreediFileState.VALID.value:
-                    break
-                elif uploaded_dwf.state == ThreediFileState.INVALID.value:
-                    state_detail = str(uploaded_dwf.state_detail).strip("{}").strip()
-                    err_msg = f"Failed to upload Dry Weather Flow file due to the following reasons: {state_detail}"
-                    raise SimulationRunnerError(err_msg)
-                else:
-                    time.sleep(2)
+
+    def potential_breach_url(self, threedimodel_id, connected_pnt_id):
+        """Return URL of the 3Di model potential breach at given connected point ID.
+        All potential breaches of the model are fetched and indexed at once, on the first lookup.
+        """
+        with self.potential_breaches_lock:
+            try:
+                model_breaches = self.potential_breaches[threedimodel_id]
+            except KeyError:
+                breach_records = self.tc.fetch_3di_model_potential_breaches_raw(
+                    str(threedimodel_id), fields=["connected_pnt_id", "url"]
+                )
+                model_breaches = {record.connected_pnt_id: record.url for record in breach_records}
+                self.potential_breaches[threedimodel_id] = model_breaches
+        try:
+            return model_breaches[connected_pnt_id]
+        except KeyError:
+            breach_obj = self.tc.fetch_3di_model_point_potential_breach(threedimodel_id, connected_pnt_id)
+            return breach_obj.url
 
     def include_breaches(self):
         """Add breaches to the new simulation."""
         sim_id = self.current_simulation.simulation.id
         threedimodel_id = self.current_simulation.threedimodel_id
         if self.current_simulation.breaches:
+            breaches_data = []
             for potential_breach in self.current_simulation.breaches.potential_breaches or []:
-                breach_obj = self.tc.fetch_3di_model_point_potential_breach(threedimodel_id, potential_breach.breach_id)
-                breach = breach_obj.to_dict()
-                self.tc.create_simulation_breaches(
-                    sim_id,
-                    potential_breach=breach["url"],
-                    duration_till_max_depth=potential_breach.duration_till_max_depth,
-                    initial_width=potential_breach.width,
-                    offset=potential_breach.offset,
-                    discharge_coefficient_positive=potential_breach.discharge_coefficient_positive,
-                    discharge_coefficient_negative=potential_breach.discharge_coefficient_negative,
-                    levee_material=potential_breach.levee_material,
-                    maximum_breach_depth=potential_breach.max_breach_depth,
+                breaches_data.append(
+                    {
+                        "potential_breach": self.potential_breach_url(threedimodel_id, potential_breach.breach_id),
+                        "duration_till_max_depth": potential_breach.duration_till_max_depth,
+                        "initial_width": potential_breach.width,
+                        "offset": potential_breach.offset,
+                        "discharge_coefficient_positive": potential_breach.discharge_coefficient_positive,
+                        "discharge_coefficient_negative": potential_breach.discharge_coefficient_negative,
+                        "levee_material": potential_breach.levee_material,
+                        "maximum_breach_depth": potential_breach.max_breach_depth,
+                    }
                 )
             for flowline in self.current_simulation.breaches.flowlines or []:
-                self.tc.create_simulation_breaches(
-                    sim_id,
-                    line_id=flowline.breach_id,
-                    duration_till_max_depth=flowline.duration_till_max_depth,
-                    initial_width=flowline.width,
-                    offset=flowline.offset,
-                    discharge_coefficient_positive=flowline.discharge_coefficient_positive,
-                    discharge_coefficient_negative=flowline.discharge_coefficient_negative,
-                    levee_material=flowline.levee_material,
-                    maximum_breach_depth=flowline.max_breach_depth,
+                breaches_data.append(
+                    {
+                        "line_id": flowline.breach_id,
+                        "duration_till_max_depth": flowline.duration_till_max_depth,
+                        "initial_width": flowline.width,
+                        "offset": flowline.offset,
+                        "discharge_coefficient_positive": flowline.discharge_coefficient_positive,
+                        "discharge_coefficient_negative": flowline.discharge_coefficient_negative,
+                        "levee_material": flowline.levee_material,
+                        "maximum_breach_depth": flowline.max_breach_depth,
+                    }
                 )
+            if breaches_data:
+                with ThreadPoolExecutor(self.fetch_workers) as executor:
+                    list(executor.map(lambda data: self.tc.create_simulation_breaches(sim_id, **data), breaches_data))
 
     def include_precipitation(self):
         """Add precipitation to the new simulation."""
@@ -1208,24 +1585,14 @@ class SimulationRunner(QRunnable):
                     substances=substances,
                 )
             elif precipitation_type == RainEventTypes.FROM_CSV.value:
-                for values_chunk in split_to_even_chunks(values, 300):
-                    chunk_offset = values_chunk[0][0]
-                    values_chunk = [[t - chunk_offset, v] for t, v in values_chunk]
-
-                    # Adjust substance timekeys for precipitation type
-                    for substance in substances:
-                        substance_value = substance["concentrations"][0][1]
-                        substance["concentrations"] = [[t - chunk_offset, substance_value] for t, _ in values_chunk]
-
-                    self.tc.create_simulation_custom_precipitation(
-                        sim_id,
-                        values=values_chunk,
-                        units=units,
-                        duration=duration,
-                        offset=offset + chunk_offset,
-                        interpolate=interpolate,
-                        substances=substances,
-                    )
+                rain_events = timeseries_rain_events(
+                    values, offset, duration, units, interpolate, substances, self.PRECIPITATION_CHUNK_SIZE
+                )
+                # Long time series are uploaded as a single file, instead of an API call per chunk of values
+                if len(rain_events) > 1 and self.upload_rain_timeseries_file(rain_events):
+                    return
+                for rain_event in rain_events:
+                    self.tc.create_simulation_custom_precipitation(sim_id, **rain_event)
             elif precipitation_type == RainEventTypes.FROM_NETCDF.value:
                 # No substances for this type
                 filename = os.path.basename(netcdf_filepath)
@@ -1254,6 +1621,48 @@ class SimulationRunner(QRunnable):
                     sim_id, reference_uuid=RADAR_ID, units=units, duration=duration, offset=offset, start_datetime=start
                 )
 
+    def upload_rain_timeseries_file(self, rain_events):
+        """Add time series rain events to the new simulation as a single uploaded file.
+        Returns False if the file could not be used and the events have to be added separately.
+        Raises SimulationRunnerTimeoutError if the uploaded file isn't processed within the upload timeout.
+        """
+        if not hasattr(self.tc.threedi_api, "simulations_events_rain_timeseries_file_create"):
+            logger.info("Rain time series files not available in the API client, adding the events separately")
+            return False
+        sim_id = self.current_simulation.simulation.id
+        filename = f"{self.current_simulation.name}_precipitation.json"
+        upload_created = False
+
+        def create_upload():
+            nonlocal upload_created
+            rain_upload = self.tc.create_simulation_rain_timeseries_file(sim_id, filename=filename, offset=0)
+            upload_created = True
+            return rain_upload
+
+        try:
+            self.upload_event_file(
+                "Precipitation",
+                filename,
+                create_upload,
+                lambda rain_upload: upload_json_data(rain_upload, rain_events),
+                lambda: self.tc.iter_rain_timeseries_files(sim_id),
+                lambda rain_file_id: self.tc.fetch_rain_timeseries_file(sim_id, rain_file_id),
+                file_state=True,
+            )
+        except ApiException as e:
+            # API server without the rain time series files, unless already uploaded
+            if upload_created or e.status not in (404, 405):
+                raise
+            logger.info("Rain time series files not available (%s), adding precipitation events separately", e)
+            return False
+        except SimulationRunnerTimeoutError:
+            # The file may still be processed later on, so the events can't be added separately
+            raise
+        except SimulationRunnerError as e:
+            logger.warning("%s Adding precipitation events separately.", e)
+            return False
+        return True
+
     def include_wind(self):
         """Add wind to the new simulation."""
         sim_id = self.current_simulation.simulation.id
@@ -1355,67 +1764,197 @@ class SimulationRunner(QRunnable):
             # simulation_start can only be disabled when template name is set.
             assert self.current_simulation.template_name
 
+    def create_template(self):
+        """Create a template out of the new simulation, if requested. Returns created template ID."""
+        sim_id = self.current_simulation.simulation.id
         if self.current_simulation.template_name is not None:
             template = self.tc.create_template_from_simulation(self.current_simulation.template_name, str(sim_id))
             return template.id
-        
         return None
 
-    @pyqtSlot()
-    def run(self):
-        """Run new simulation(s)."""
+    def run_journaled_step(self, fingerprint, step_name, step, completed_steps):
+        """Run the setup step, unless completed by the interrupted run, and journal its outcome."""
+        if step_name in completed_steps:
+            return completed_steps[step_name]
+        if fingerprint is not None:
+            self.journal.begin_step(fingerprint, step_name)
         try:
-            self.tc = ThreediCalls(self.threedi_api)
-            for simulation_to_run in self.simulations_to_run:
-                self.current_simulation = simulation_to_run
-                self.report_progress(increase_current_step=False)
+            result = step()
+        except Exception:
+            if fingerprint is not None:
+                self.journal.fail_step(fingerprint, step_name)
+            raise
+        if fingerprint is not None:
+            self.journal.complete_step(fingerprint, step_name, result)
+        return result
+
+    def setup_step(self, step_name, fingerprint=None, completed_steps=None):
+        """Return setup step function running in the step thread on the simulation of the current thread."""
+        simulation, substances = self.current_simulation, self.substances
+        step = getattr(self, step_name)
+
+        def run_step():
+            self.current_simulation = simulation
+            self.substances = substances
+            return self.run_journaled_step(fingerprint, step_name, step, completed_steps or {})
+
+        return run_step
+
+    def partial_steps_created_events(self, sim_id, step_names):
+        """Check if the partially run setup steps may have created some of their simulation events already.
+        Running such steps again on the resumed simulation would duplicate their events.
+        """
+        if not step_names:
+            return False
+        if any(step_name not in self.STEP_EVENTS for step_name in step_names):
+            return True
+        events = self.tc.fetch_simulation_events(sim_id)
+        for step_name in step_names:
+            for event_key in self.STEP_EVENTS[step_name]:
+                event_name, event_filters = self.STEP_EVENTS_FILTERS.get(event_key, (event_key, None))
+                step_events = getattr(events, event_name, None)
+                if step_events and event_filters:
+                    step_events = next(filter_items(step_events, event_filters), None)
+                if step_events:
+                    return True
+        return False
+
+    def resume_simulation(self, fingerprint):
+        """Pick up the simulation created by the failed or interrupted run. Returns its journal entry, if resumable."""
+        entry = self.journal.get(fingerprint) if fingerprint is not None else None
+        if entry is None:
+            return None
+        sim_id = entry["simulation_id"]
+        try:
+            simulation = self.tc.fetch_simulation(sim_id)
+            current_status = self.tc.fetch_simulation_status(sim_id)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            simulation = current_status = None
+        started = "start_simulation" in entry["steps"]
+        if (
+            simulation is None
+            or (not started and current_status.name != SimulationStatusName.CREATED.value)
+            or self.partial_steps_created_events(sim_id, SimulationJournal.partial_steps(entry))
+        ):
+            logger.info("Journaled simulation %s can't be resumed, creating a new one", sim_id)
+            self.journal.remove(fingerprint)
+            return None
+        self.current_simulation.simulation = simulation
+        self.current_simulation.initial_status = current_status
+        self.resumed_simulations.add(sim_id)
+        return entry
+
+    def journal_failure(self, fingerprint, resumed_entry):
+        """Keep the failed simulation journaled, unless it was resumed and failed at the same step again.
+        Returns a note about the next run for the error message.
+        """
+        entry = self.journal.get(fingerprint) if fingerprint is not None else None
+        if entry is None:
+            return ""
+        if resumed_entry is not None and entry["failed_step"] == resumed_entry["failed_step"]:
+            self.journal.remove(fingerprint)
+            return "Setup of this simulation will start over on the next run."
+        return "Completed setup steps will be resumed when the simulation is run again."
+
+    def initialize_simulation(self, simulation_to_run, fingerprint=None):
+        """Set up and start a single simulation. Returns created template ID and the error message (if failed).
+        Progress is journaled by the simulation definition fingerprint, so a failed setup resumes on the next run.
+        """
+        self.current_simulation = simulation_to_run
+        self.substances = {}
+        entry = None
+        try:
+            self.report_progress(increase_current_step=False)
+            entry = self.resume_simulation(fingerprint)
+            if entry is None:
                 self.create_simulation()
-                self.report_progress()
-                self.include_init_options()
-                self.report_progress()
-                self.include_substances()
-                self.report_progress()
-                self.include_boundary_conditions()
-                self.report_progress()
-                self.include_structure_controls()
-                self.report_progress()
-                self.include_initial_conditions()
-                self.report_progress()
-                self.include_laterals()
-                self.report_progress()
-                self.include_dwf()
-                self.report_progress()
-                self.include_breaches()
-                self.report_progress()
-                self.include_precipitation()
-                self.report_progress()
-                self.include_wind()
-                self.report_progress()
-                self.include_settings()
-                self.report_progress()
-                self.include_new_saved_state()
-                self.report_progress()
-                self.include_lizard_post_processing()
-                self.report_progress()
-                template_id = self.start_simulation()
-                self.report_progress(simulation_initialized=True)
-            msg = f"Simulations successfully initialized!"
-            if template_id:
-                msg += f" Created template ID: {template_id}"
-
-            self.report_finished(msg)
+                if fingerprint is not None:
+                    self.journal.start(fingerprint, simulation_to_run.name, simulation_to_run.simulation.id)
+            self.report_progress()
+            completed_steps = entry["steps"] if entry is not None else {}
+            self.substances = dict(completed_steps.get("include_substances") or {})
+            setup_steps = {
+                step_name: self.setup_step(step_name, fingerprint, completed_steps) for step_name in self.SETUP_STEPS
+            }
+            run_dependency_graph(
+                setup_steps,
+                self.SETUP_STEPS,
+                max_workers=self.setup_workers,
+                on_task_done=lambda step_name: self.report_progress(),
+            )
+            self.run_journaled_step(fingerprint, "start_simulation", self.start_simulation, completed_steps)
+            template_id = self.run_journaled_step(fingerprint, "create_template", self.create_template, completed_steps)
+            if fingerprint is not None:
+                self.journal.remove(fingerprint)
+            self.report_progress(simulation_initialized=True)
+            return template_id, None
         except ApiException as e:
             error_msg = extract_error_message(e)
-            self.report_failure(error_msg)
         except Exception as e:
             error_msg = f"Error: {e}"
-            self.report_failure(error_msg)
+        if len(self.simulations_to_run) > 1:
+            error_msg = f'Simulation "{simulation_to_run.name}" failed. {error_msg}'
+        try:
+            journal_note = self.journal_failure(fingerprint, entry)
+        except OSError as e:
+            logger.warning("Failed to update simulation journal: %s", e)
+            journal_note = ""
+        if journal_note:
+            error_msg = f"{error_msg.rstrip('.')}. {journal_note}"
+        return None, error_msg
+
+    @pyqtSlot()
+    def run(self):
+        """Run new simulation(s). Failure of a single simulation doesn't stop the rest of them, failures of the batch
+        are reported together once all simulations are done.
+        """
+        try:
+            self.tc = ThreediCalls(self.threedi_api)
+            self.limit_concurrency(self.tc.threedi_api.client_pool.max_clients)
+            self.upload_registry = UploadRegistry(upload_registry_path(self.threedi_api))
+            self.journal = SimulationJournal(simulation_journal_path(self.threedi_api))
+        except Exception as e:
+            self.report_failure(f"Error: {e}")
+            return
+        # Fingerprints are taken before the setup, as it modifies the simulation data in place
+        fingerprints = batch_fingerprints(self.simulations_to_run)
+        # The wizard shares the events and settings objects between the simulations of the batch, so each simulation
+        # is set up from its own copy of them
+        self.simulations_to_run = [copy.deepcopy(simulation_to_run) for simulation_to_run in self.simulations_to_run]
+        if self.max_concurrent_simulations > 1:
+            executor = ThreadPoolExecutor(self.max_concurrent_simulations, thread_name_prefix="simulation_runner")
+            with executor:
+                results = list(executor.map(self.initialize_simulation, self.simulations_to_run, fingerprints))
+        else:
+            results = [
+                self.initialize_simulation(simulation_to_run, fingerprint)
+                for simulation_to_run, fingerprint in zip(self.simulations_to_run, fingerprints)
+            ]
+        template_ids = [str(template_id) for template_id, error_msg in results if template_id]
+        error_messages = [error_msg for template_id, error_msg in results if error_msg]
+        if error_messages:
+            if len(results) > 1:
+                failed_number = len(error_messages)
+                initialized_number = len(results) - failed_number
+                msg = f"{initialized_number} of {len(results)} simulations initialized, {failed_number} failed."
+                if template_ids:
+                    msg += f" Created template ID: {', '.join(template_ids)}"
+                error_messages.insert(0, msg)
+            self.report_failure("\n".join(error_messages))
+            return
+        msg = "Simulations successfully initialized!"
+        if template_ids:
+            msg += f" Created template ID: {', '.join(template_ids)}"
+        self.report_finished(msg)
 
     def report_progress(self, simulation_initialized=False, increase_current_step=True):
         """Report worker progress."""
-        current_progress = int(self.current_step * self.percentage_per_step)
-        if increase_current_step:
-            self.current_step += 1
+        with self.progress_lock:
+            current_progress = int(self.current_step * self.percentage_per_step)
+            if increase_current_step:
+                self.current_step += 1
         self.signals.initializing_simulations_progress.emit(
             self.current_simulation, simulation_initialized, current_progress, self.total_progress
         )